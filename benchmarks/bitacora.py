@@ -0,0 +1,97 @@
+"""
+Benchmark de la bitácora de acciones (catapulta.bitacora).
+
+Juega partidas con las acciones del servidor (sin Flask) y mide, para
+varios valores de instantanea_cada (K):
+
+    - el coste por acción de grabar las tiradas y añadir el registro,
+      frente a ejecutar la acción sin bitácora
+    - el tamaño del fichero
+    - el tiempo de rehacer el juego completo (el de una recuperación), que
+      depende de K y no de la longitud de la partida
+
+Uso:
+    python benchmarks/bitacora.py [--acciones 5000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catapulta import acciones, eventos
+from catapulta.acciones import preparar_generador
+from catapulta.bitacora import BitacoraJuegos, reproducir
+from catapulta.serializacion import juego_a_dict
+
+
+MATERIALES = {'palos': [50, 50], 'gomas': [10], 'tapones': 5, 'corchos': 2_000, 'pegamento': 10}
+
+
+def partida(num_acciones, semilla):
+    """Secuencia de (acción, datos) de una partida: construir y luchar oleada tras oleada"""
+    rng = random.Random(semilla)
+    yield 'crear_catapulta', {'nombre': 'Banco'}
+    yield 'agregar_materiales', MATERIALES
+    for _ in range(num_acciones):
+        eleccion = rng.random()
+        if eleccion < 0.05:
+            yield 'construir', {}
+        elif eleccion < 0.10:
+            yield 'generar_oleada', {}
+        elif eleccion < 0.20:
+            yield 'reparar', {}
+        elif eleccion < 0.25:
+            yield 'disparar_area', {'distancia': rng.randint(10, 50)}
+        else:
+            yield 'disparar', {'id': rng.randint(0, 10)}
+
+
+def jugar(num_acciones, bitacora=None, game_id='0123456789abcdef'):
+    """Ejecuta la partida como lo hace el servidor; retorna (juego, segundos)"""
+    juego = acciones.nuevo_juego()
+    juego['semilla'] = 1
+    inicio = time.perf_counter()
+    for nombre, datos in partida(num_acciones, 1):
+        preparar_generador(juego)
+        grabador = bitacora.preparar(game_id, juego) if bitacora else None
+        respuesta, cambio = acciones.ACCIONES[nombre](juego, datos)
+        if grabador is not None:
+            grabador.soltar(juego)
+        if cambio:
+            juego['version'] += 1
+            if grabador is not None:
+                bitacora.registrar(game_id, nombre, datos, juego, grabador.tiradas)
+    if bitacora:
+        bitacora.vaciar()
+    return juego, time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Coste de la bitácora de acciones y de rehacer juegos")
+    parser.add_argument('--acciones', type=int, default=5_000, help="acciones de la partida")
+    args = parser.parse_args()
+    eventos.configurar_sumidero(eventos.NULO)  # como el servidor
+
+    _, base = jugar(args.acciones)
+    print(f"Sin bitácora: {base / args.acciones * 1e6:.1f} µs por acción")
+    print(f"{'K':>6} {'µs/acción':>10} {'KiB':>8} {'rehacer':>10} {'igual':>6}")
+    for cada in (10, 100, 1_000, 100_000):
+        with tempfile.TemporaryDirectory() as directorio:
+            bitacora = BitacoraJuegos(directorio, instantanea_cada=cada)
+            juego, segundos = jugar(args.acciones, bitacora)
+            ruta = bitacora.ruta('0123456789abcdef')
+            inicio = time.perf_counter()
+            rehecho = reproducir(ruta)
+            rehacer = time.perf_counter() - inicio
+            igual = juego_a_dict(rehecho) == juego_a_dict(juego)
+            print(f"{cada:>6} {segundos / args.acciones * 1e6:>10.1f} {os.path.getsize(ruta) / 1024:>8.0f} "
+                  f"{rehacer * 1000:>7.1f} ms {'sí' if igual else 'NO':>6}")
+
+
+if __name__ == "__main__":
+    main()
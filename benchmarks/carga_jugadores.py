@@ -0,0 +1,295 @@
+"""
+Prueba de carga con sesiones de jugadores reales contra el servidor web.
+
+Cada usuario virtual repite lo que hace index.html en el navegador:
+
+    GET / → crear_catapulta → agregar_material × N → construir (hasta que
+    sale) → generar_oleada → disparar al primer enemigo vivo hasta la
+    victoria o la destrucción de la catapulta
+
+con una pausa de "pensar" entre acciones y, a la vez, un sondeo de
+/api/estado cada 100 ms (con ?version=, como el cliente que aplica
+parches). Al terminar la sesión empieza otra con una cookie nueva, es
+decir, con un juego nuevo en el almacén.
+
+La carga sube por etapas (--usuarios 10,50,100,...): en cada una se añaden
+usuarios hasta el número indicado y, durante --segundos, se miden
+peticiones por segundo, latencias (p50, p95, p99) de acciones y sondeos,
+errores y sesiones completadas. Al final de cada etapa se leen la memoria
+del proceso servidor (de /proc) y los juegos vivos del almacén (de
+/metrics, catapulta_juegos_vivos), para ver cuánto crece el almacén con
+los jugadores.
+
+Por defecto arranca el servidor de main_web.py (Flask con un hilo por
+conexión) en un proceso aparte; con --puerto se mide uno ya en marcha (con
+--pid, también su memoria).
+
+Uso:
+    python benchmarks/carga_jugadores.py [--usuarios 10,50,100,200] [--segundos 10]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from carga_servidores import SERVIDORES, Cliente, esperar_puerto, memoria_e_hilos, puerto_libre
+from catapulta.estado_juego import aplicar_parche
+
+
+# Segundos entre dos sondeos de /api/estado (los del navegador)
+INTERVALO_SONDEO = 0.1
+# Materiales que añade cada jugador, uno por petición como los botones de la página
+MATERIALES = [('palo', 40), ('palo', 40), ('goma', 8), ('tapon', 1), ('tapon', 1),
+              ('corcho', 30), ('pegamento', 8)]
+
+
+class Medidas:
+    """Latencias y contadores de una etapa"""
+
+    def __init__(self):
+        self.acciones = []
+        self.sondeos = []
+        self.errores = 0
+        self.sesiones = 0
+        self.victorias = 0
+        self.inicio = time.perf_counter()
+
+
+class Carga:
+    """Usuarios virtuales contra un servidor; `medidas` es la etapa en curso"""
+
+    def __init__(self, puerto, pausa, repeticiones_materiales):
+        self.puerto = puerto
+        self.pausa = pausa
+        self.materiales = MATERIALES * repeticiones_materiales
+        self.medidas = Medidas()
+
+    async def pedir(self, cliente, metodo, ruta, datos=None, latencias=None):
+        inicio = time.perf_counter()
+        try:
+            estado, respuesta = await cliente.peticion(metodo, ruta, datos)
+        except (OSError, asyncio.IncompleteReadError, ValueError):
+            cliente.cerrar()
+            self.medidas.errores += 1
+            return None
+        (self.medidas.acciones if latencias is None else latencias).append(time.perf_counter() - inicio)
+        if estado >= 400:
+            self.medidas.errores += 1
+            return None
+        return respuesta if estado != 304 else {}
+
+    async def pensar(self):
+        if self.pausa:
+            await asyncio.sleep(self.pausa * random.uniform(0.5, 1.5))
+
+    async def usuario(self):
+        """Encadena sesiones hasta que se cancela la tarea"""
+        while True:
+            try:
+                await self.sesion()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.medidas.errores += 1
+                await asyncio.sleep(0.5)
+
+    async def sesion(self):
+        cliente = Cliente(self.puerto)
+        sondeo = Cliente(self.puerto)
+        sondeo.cookies = cliente.cookies  # el navegador comparte la cookie de sesión
+        juego = {}  # estado conocido por el "navegador"
+        tarea_sondeo = None
+        try:
+            await self.pedir(cliente, 'GET', '/')
+            tarea_sondeo = asyncio.create_task(self.sondear(sondeo, juego))
+
+            await self.pensar()
+            await self.pedir(cliente, 'POST', '/api/crear_catapulta', {'nombre': 'Carga'})
+            for tipo, valor in self.materiales:
+                await self.pensar()
+                await self.pedir(cliente, 'POST', '/api/agregar_material', {'tipo': tipo, 'valor': valor})
+            for _ in range(20):
+                await self.pensar()
+                respuesta = await self.pedir(cliente, 'POST', '/api/construir')
+                if respuesta and respuesta['success']:
+                    break
+            else:
+                return
+
+            await self.pensar()
+            respuesta = await self.pedir(cliente, 'POST', '/api/generar_oleada')
+            if not respuesta or not respuesta['success']:
+                return
+            enemigos = respuesta['enemigos']
+            while True:
+                await self.pensar()
+                if juego.get('enemigos') is not None:
+                    enemigos = juego['enemigos']
+                vivos = [e['id'] for e in enemigos if e['vivo']]
+                if not vivos:
+                    break
+                respuesta = await self.pedir(cliente, 'POST', '/api/disparar',
+                                             {'id': vivos[0], 'version': juego.get('version')})
+                if not respuesta or not respuesta['success']:
+                    break
+                if 'parche' in respuesta:
+                    self.actualizar(juego, respuesta)
+                else:
+                    # Estado completo en otro formato: el sondeo pedirá el siguiente entero
+                    juego.clear()
+                    enemigos = respuesta['enemigos']
+                if respuesta['victoria'] or respuesta['game_over']:
+                    self.medidas.victorias += respuesta['victoria']
+                    break
+            self.medidas.sesiones += 1
+        finally:
+            if tarea_sondeo is not None:
+                tarea_sondeo.cancel()
+            cliente.cerrar()
+            sondeo.cerrar()
+
+    async def sondear(self, cliente, juego):
+        """GET /api/estado cada INTERVALO_SONDEO, aplicando los parches al estado conocido"""
+        while True:
+            ruta = f"/api/estado?version={juego['version']}" if 'version' in juego else '/api/estado'
+            respuesta = await self.pedir(cliente, 'GET', ruta, latencias=self.medidas.sondeos)
+            if respuesta:
+                self.actualizar(juego, respuesta)
+            await asyncio.sleep(INTERVALO_SONDEO)
+
+    @staticmethod
+    def actualizar(juego, datos):
+        """Incorpora al estado conocido una respuesta completa o un parche"""
+        if 'parche' in datos:
+            if juego.get('version') == datos['base']:
+                juego.update(aplicar_parche(juego, datos['parche']))
+        elif 'catapulta' in datos:
+            juego.clear()
+            juego.update(datos)
+
+
+def percentil(valores, p):
+    return valores[min(len(valores) - 1, int(len(valores) * p))] if valores else 0.0
+
+
+async def juegos_vivos(puerto):
+    """Juegos del almacén según /metrics (None si el servidor no expone métricas)"""
+    try:
+        reader, writer = await asyncio.open_connection('127.0.0.1', puerto)
+        writer.write(f"GET /metrics HTTP/1.0\r\nHost: 127.0.0.1:{puerto}\r\n\r\n".encode())
+        texto = (await reader.read()).decode('utf-8', 'replace')
+        writer.close()
+    except OSError:
+        return None
+    for linea in texto.splitlines():
+        if linea.startswith('catapulta_juegos_vivos '):
+            return int(float(linea.split()[1]))
+    return None
+
+
+async def rampa(args, pid):
+    carga = Carga(args.puerto, args.pausa, args.repeticiones_materiales)
+    tareas = []
+    resultados = []
+    memoria_inicial, _ = memoria_e_hilos(pid) if pid else (None, None)
+
+    print(f"{'usuarios':>8} {'pet/s':>8} {'acc p50':>9} {'acc p95':>9} {'acc p99':>9} "
+          f"{'sondeo p99':>11} {'errores':>7} {'sesiones':>8} {'juegos':>7} {'memoria':>10} {'KiB/juego':>10}")
+    for usuarios in args.usuarios:
+        # Los nuevos usuarios llegan repartidos a lo largo del primer segundo
+        nuevos = usuarios - len(tareas)
+        for _ in range(max(0, nuevos)):
+            tareas.append(asyncio.create_task(carga.usuario()))
+            await asyncio.sleep(1 / nuevos)
+
+        carga.medidas = medidas = Medidas()
+        await asyncio.sleep(args.segundos)
+        duracion = time.perf_counter() - medidas.inicio
+
+        memoria, hilos = memoria_e_hilos(pid) if pid else (None, None)
+        juegos = await juegos_vivos(args.puerto)
+        acciones, sondeos = sorted(medidas.acciones), sorted(medidas.sondeos)
+        por_juego = (memoria - memoria_inicial) * 1024 / juegos \
+            if memoria is not None and memoria_inicial is not None and juegos else None
+        resultado = {
+            'usuarios': usuarios,
+            'peticiones_por_segundo': (len(acciones) + len(sondeos)) / duracion,
+            'acciones_p50_ms': percentil(acciones, 0.50) * 1000,
+            'acciones_p95_ms': percentil(acciones, 0.95) * 1000,
+            'acciones_p99_ms': percentil(acciones, 0.99) * 1000,
+            'sondeos_p50_ms': percentil(sondeos, 0.50) * 1000,
+            'sondeos_p99_ms': percentil(sondeos, 0.99) * 1000,
+            'errores': medidas.errores,
+            'sesiones': medidas.sesiones,
+            'victorias': medidas.victorias,
+            'juegos': juegos,
+            'memoria_mib': memoria,
+            'hilos': hilos,
+            'kib_por_juego': por_juego,
+        }
+        resultados.append(resultado)
+        print(f"{usuarios:>8} {resultado['peticiones_por_segundo']:>8.0f} "
+              f"{resultado['acciones_p50_ms']:>6.1f} ms {resultado['acciones_p95_ms']:>6.1f} ms "
+              f"{resultado['acciones_p99_ms']:>6.1f} ms {resultado['sondeos_p99_ms']:>8.1f} ms "
+              f"{medidas.errores:>7} {medidas.sesiones:>8} {juegos if juegos is not None else '-':>7} "
+              + (f"{memoria:>6.1f} MiB" if memoria is not None else f"{'-':>10}")
+              + (f" {por_juego:>10.1f}" if por_juego is not None else f" {'-':>10}"), flush=True)
+
+    for tarea in tareas:
+        tarea.cancel()
+    await asyncio.gather(*tareas, return_exceptions=True)
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Carga con sesiones de jugadores contra el servidor web")
+    parser.add_argument('--usuarios', default='10,50,100,200',
+                        type=lambda texto: [int(n) for n in texto.split(',')],
+                        help="usuarios virtuales de cada etapa, separados por comas")
+    parser.add_argument('--segundos', type=float, default=10, help="duración de cada etapa")
+    parser.add_argument('--pausa', type=float, default=0.3,
+                        help="segundos medios de pausa entre acciones de un jugador (0 = sin pausa)")
+    parser.add_argument('--repeticiones-materiales', type=int, default=1,
+                        help="cuántas veces añade cada jugador la lista de materiales")
+    parser.add_argument('--servidor', choices=sorted(SERVIDORES), default='flask',
+                        help="servidor que se arranca (si no se indica --puerto)")
+    parser.add_argument('--puerto', type=int, help="medir un servidor ya en marcha en este puerto")
+    parser.add_argument('--pid', type=int, help="con --puerto, proceso del servidor (para su memoria)")
+    parser.add_argument('--json', metavar='FICHERO', help="guardar los resultados en JSON")
+    args = parser.parse_args()
+
+    proceso = None
+    pid = args.pid
+    if args.puerto is None:
+        args.puerto = puerto_libre()
+        entorno = dict(os.environ, PYTHONPATH=RAIZ)
+        proceso = subprocess.Popen([sys.executable, '-c', SERVIDORES[args.servidor], str(args.puerto)],
+                                   env=entorno)
+        pid = proceso.pid
+    try:
+        esperar_puerto(args.puerto)
+        print(f"Servidor en el puerto {args.puerto}; etapas de {args.segundos:.0f} s, "
+              f"pausa media {args.pausa} s, sondeo cada {INTERVALO_SONDEO * 1000:.0f} ms")
+        resultados = asyncio.run(rampa(args, pid))
+    finally:
+        if proceso is not None:
+            proceso.terminate()
+            proceso.wait()
+
+    if args.json:
+        with open(args.json, 'w') as fichero:
+            json.dump({'servidor': args.servidor if proceso else None, 'etapas': resultados},
+                      fichero, indent=2)
+        print(f"Resultados guardados en {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""
+Prueba de carga: servidor Flask (servidor_web) frente a asyncio (servidor_asgi).
+
+Arranca cada servidor en un proceso aparte y, desde un cliente asyncio:
+
+    1. abre --streams conexiones /api/stream (navegadores conectados sin
+       hacer nada) y mide cuánto tarda y la memoria e hilos del servidor;
+    2. con esos streams abiertos, --jugadores jugadores juegan durante
+       --segundos (crear, materiales, construir, oleadas y disparos con
+       sondeos de /api/estado) y se miden peticiones por segundo y latencias.
+
+Flask se sirve con el servidor de Werkzeug con un hilo por conexión; el
+asyncio, con el ServidorHTTP del módulo (o el que se use en producción, si
+se indica --uvicorn).
+
+Uso:
+    python benchmarks/carga_servidores.py [--streams 1000] [--jugadores 20] [--segundos 10]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+
+SERVIDORES = {
+    'flask': (
+        "import sys\n"
+        "from werkzeug.serving import WSGIRequestHandler, make_server\n"
+        "from catapulta.servidor_web import app\n"
+        "WSGIRequestHandler.log_request = lambda *args: None\n"
+        "make_server('127.0.0.1', int(sys.argv[1]), app, threaded=True).serve_forever()\n"
+    ),
+    'asyncio': (
+        "import asyncio, sys\n"
+        "from catapulta.servidor_asgi import ServidorHTTP, app\n"
+        "asyncio.run(ServidorHTTP(app, '127.0.0.1', int(sys.argv[1])).servir())\n"
+    ),
+    'uvicorn': (
+        "import sys, uvicorn\n"
+        "uvicorn.run('catapulta.servidor_asgi:app', host='127.0.0.1', port=int(sys.argv[1]), "
+        "log_level='warning')\n"
+    ),
+}
+
+
+# === CLIENTE HTTP MÍNIMO ===
+
+class Cliente:
+    """Conexión HTTP/1.1 keep-alive con las cookies de un jugador"""
+
+    def __init__(self, puerto):
+        self.puerto = puerto
+        self.cookies = {}
+        self._reader = self._writer = None
+
+    async def _conectar(self):
+        self._reader, self._writer = await asyncio.open_connection('127.0.0.1', self.puerto)
+
+    def _cabeceras(self, metodo, ruta, cuerpo):
+        lineas = [f"{metodo} {ruta} HTTP/1.1", f"Host: 127.0.0.1:{self.puerto}"]
+        if self.cookies:
+            lineas.append("Cookie: " + "; ".join(f"{k}={v}" for k, v in self.cookies.items()))
+        if cuerpo is not None:
+            lineas += ["Content-Type: application/json", f"Content-Length: {len(cuerpo)}"]
+        return ("\r\n".join(lineas) + "\r\n\r\n").encode('latin-1') + (cuerpo or b'')
+
+    async def _leer_cabeceras(self):
+        estado = int((await self._reader.readline()).split()[1])
+        cabeceras = {}
+        while True:
+            linea = (await self._reader.readline()).decode('latin-1')
+            if linea in ('\r\n', '\n', ''):
+                return estado, cabeceras
+            nombre, _, valor = linea.partition(':')
+            nombre, valor = nombre.strip().lower(), valor.strip()
+            if nombre == 'set-cookie':
+                clave, _, resto = valor.partition('=')
+                self.cookies[clave] = resto.split(';')[0]
+            cabeceras[nombre] = valor
+
+    async def peticion(self, metodo, ruta, datos=None):
+        """Retorna (estado, cuerpo decodificado de JSON o None)"""
+        if self._writer is None:
+            await self._conectar()
+        cuerpo = json.dumps(datos).encode() if datos is not None else None
+        self._writer.write(self._cabeceras(metodo, ruta, cuerpo))
+        await self._writer.drain()
+        estado, cabeceras = await self._leer_cabeceras()
+
+        if cabeceras.get('transfer-encoding') == 'chunked':
+            partes = []
+            while True:
+                largo = int((await self._reader.readline()).strip(), 16)
+                partes.append(await self._reader.readexactly(largo + 2))
+                if not largo:
+                    break
+            respuesta = b''.join(parte[:-2] for parte in partes)
+        else:
+            respuesta = await self._reader.readexactly(int(cabeceras.get('content-length', 0)))
+
+        if cabeceras.get('connection', '').lower() == 'close':
+            self.cerrar()
+        if respuesta and cabeceras.get('content-type', '').startswith('application/json'):
+            return estado, json.loads(respuesta)
+        return estado, None
+
+    async def abrir_stream(self):
+        """Abre /api/stream en otra conexión y espera al primer evento; retorna su writer"""
+        reader, writer = await asyncio.open_connection('127.0.0.1', self.puerto)
+        writer.write(self._cabeceras('GET', '/api/stream', None))
+        await writer.drain()
+        leido = b''
+        while b'data:' not in leido or not leido.rstrip(b'\r\n').endswith(b'}'):
+            trozo = await reader.read(65536)
+            if not trozo:
+                raise ConnectionError("stream cerrado")
+            leido += trozo
+        return writer
+
+    def cerrar(self):
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+
+# === ESCENARIOS ===
+
+async def abrir_streams(puerto, n):
+    """Abre n streams (cada uno de un jugador distinto). Retorna sus writers"""
+    async def uno():
+        cliente = Cliente(puerto)
+        await cliente.peticion('GET', '/')
+        cliente.cerrar()
+        return await cliente.abrir_stream()
+
+    writers = []
+    for inicio in range(0, n, 100):
+        writers += await asyncio.gather(*(uno() for _ in range(min(100, n - inicio))))
+    return writers
+
+
+async def jugador(puerto, hasta, latencias, errores):
+    """Juega partidas hasta el instante `hasta`, anotando la latencia de cada petición"""
+    cliente = Cliente(puerto)
+
+    async def pedir(metodo, ruta, datos=None):
+        inicio = time.perf_counter()
+        estado, respuesta = await cliente.peticion(metodo, ruta, datos)
+        latencias.append(time.perf_counter() - inicio)
+        if estado >= 400:
+            errores.append(estado)
+        return respuesta
+
+    await pedir('GET', '/')
+    while time.monotonic() < hasta:
+        await pedir('POST', '/api/crear_catapulta', {'nombre': 'Carga'})
+        await pedir('POST', '/api/agregar_materiales',
+                    {'palos': [50, 50], 'gomas': [10], 'tapones': 5, 'corchos': 300, 'pegamento': 10})
+        for _ in range(20):
+            if (await pedir('POST', '/api/construir'))['success']:
+                break
+        enemigos = (await pedir('POST', '/api/generar_oleada'))['enemigos']
+        while time.monotonic() < hasta:
+            vivos = [e['id'] for e in enemigos if e['vivo']]
+            respuesta = await pedir('POST', '/api/disparar', {'id': vivos[0]})
+            await pedir('GET', '/api/estado')
+            if not respuesta['success'] or respuesta['game_over']:
+                break
+            if respuesta['victoria']:
+                enemigos = (await pedir('POST', '/api/generar_oleada'))['enemigos']
+            else:
+                enemigos = respuesta['enemigos']
+    cliente.cerrar()
+
+
+def memoria_e_hilos(pid):
+    """(MiB residentes, hilos) del proceso, leídos de /proc (None fuera de Linux)"""
+    try:
+        with open(f"/proc/{pid}/status") as fichero:
+            campos = dict(linea.split(':', 1) for linea in fichero if ':' in linea)
+        return int(campos['VmRSS'].split()[0]) / 1024, int(campos['Threads'])
+    except OSError:
+        return None, None
+
+
+async def medir(nombre, pid, puerto, args):
+    inicio = time.perf_counter()
+    streams = await abrir_streams(puerto, args.streams)
+    apertura = time.perf_counter() - inicio
+    memoria, hilos = memoria_e_hilos(pid)
+
+    latencias, errores = [], []
+    hasta = time.monotonic() + args.segundos
+    inicio = time.perf_counter()
+    await asyncio.gather(*(jugador(puerto, hasta, latencias, errores) for _ in range(args.jugadores)))
+    duracion = time.perf_counter() - inicio
+    for writer in streams:
+        writer.close()
+
+    latencias.sort()
+    p50 = latencias[len(latencias) // 2] if latencias else 0
+    p99 = latencias[int(len(latencias) * 0.99)] if latencias else 0
+    print(f"{nombre:<10} {apertura:>8.2f} s {memoria or 0:>8.1f} MiB {hilos or 0:>6} "
+          f"{len(latencias) / duracion:>9.0f} {p50 * 1000:>8.2f} ms {p99 * 1000:>8.2f} ms {len(errores):>7}")
+
+
+def puerto_libre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def esperar_puerto(puerto, limite=15):
+    fin = time.monotonic() + limite
+    while time.monotonic() < fin:
+        try:
+            socket.create_connection(('127.0.0.1', puerto), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"el servidor no escucha en el puerto {puerto}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Carga: servidor Flask frente a asyncio")
+    parser.add_argument('--streams', type=int, default=1000)
+    parser.add_argument('--jugadores', type=int, default=20)
+    parser.add_argument('--segundos', type=float, default=10)
+    parser.add_argument('--uvicorn', action='store_true', help="servir el ASGI con uvicorn")
+    args = parser.parse_args()
+
+    entorno = dict(os.environ, PYTHONPATH=RAIZ, CATAPULTA_ALMACEN='memoria')
+    print(f"{args.streams} streams abiertos, {args.jugadores} jugadores durante {args.segundos:.0f} s")
+    print(f"{'servidor':<10} {'apertura':>10} {'memoria':>12} {'hilos':>6} "
+          f"{'pet/s':>9} {'p50':>11} {'p99':>11} {'errores':>7}")
+    for nombre in ('flask', 'uvicorn' if args.uvicorn else 'asyncio'):
+        puerto = puerto_libre()
+        proceso = subprocess.Popen([sys.executable, '-c', SERVIDORES[nombre], str(puerto)], env=entorno)
+        try:
+            esperar_puerto(puerto)
+            asyncio.run(medir(nombre, proceso.pid, puerto, args))
+        finally:
+            proceso.terminate()
+            proceso.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Benchmark de los disparos de área.
+
+Compara, sobre una oleada grande, resolver el área recorriendo todos los
+enemigos en cada disparo con Oleada.danar_area / OleadaMasiva.danar_area,
+que solo recorren el tramo del índice por distancia que cubre el área.
+
+Uso:
+    python benchmarks/disparo_area.py [--enemigos 100000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catapulta.enemigos import Oleada, DISTANCIA_MINIMA, DISTANCIA_MAXIMA
+from catapulta.oleada_masiva import TIPOS, generar_oleada_masiva
+
+
+DISPAROS = 200
+RADIO = 1
+DANIO = 12
+
+
+def recorrido_completo(oleada, centro, radio, danio):
+    """Resolución ingenua: mira todos los enemigos en cada disparo"""
+    afectados = eliminados = 0
+    for enemigo in oleada:
+        if enemigo.vivo and abs(enemigo.distancia - centro) <= radio:
+            afectados += 1
+            eliminados += enemigo.recibir_danio(danio)
+    return afectados, eliminados
+
+
+def medir(nombre, oleada, resolver):
+    rng = random.Random(1)
+    inicio = time.perf_counter()
+    for _ in range(DISPAROS):
+        resolver(oleada, rng.randint(DISTANCIA_MINIMA, DISTANCIA_MAXIMA), RADIO, DANIO)
+    duracion = (time.perf_counter() - inicio) / DISPAROS
+    print(f"{nombre:<26} {duracion * 1000:>9.2f} ms/disparo  ({oleada.num_vivos} vivos al final)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de disparos de área")
+    parser.add_argument('--enemigos', type=int, default=100_000)
+    args = parser.parse_args()
+
+    def oleadas():
+        masiva = generar_oleada_masiva(10, random.Random(0), args.enemigos)
+        objetos = Oleada(TIPOS[t](d) for t, d in zip(masiva.tipos, masiva.distancias))
+        return masiva, objetos
+
+    print(f"{DISPAROS} disparos de radio {RADIO}m sobre {args.enemigos} enemigos")
+    masiva, objetos = oleadas()
+    medir("objetos, recorrido", objetos, recorrido_completo)
+    medir("objetos, danar_area", oleadas()[1], Oleada.danar_area)
+    medir("columnas, danar_area", masiva, type(masiva).danar_area)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Benchmark de la serialización de juegos: instantánea binaria frente a JSON
+compacto (juego_a_bytes) y pickle del juego entero.
+
+Para varios juegos típicos muestra el tamaño y el tiempo de codificar y
+decodificar con cada formato, y después el coste de un punto de control
+(PuntoControl.guardar) de muchos juegos: el primero, que los codifica
+todos, y uno incremental en el que solo cambió una parte.
+
+Uso:
+    python benchmarks/instantaneas.py [--juegos 10000]
+"""
+
+import argparse
+import os
+import pickle
+import random
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catapulta.almacen import AlmacenMemoria, PuntoControl
+from catapulta.catapulta import EstadoCatapulta
+from catapulta.enemigos import generar_oleada_enemigos
+from catapulta.oleada_masiva import generar_oleada_masiva
+from catapulta.serializacion import (
+    juego_a_bytes, juego_desde_bytes, juego_a_instantanea, juego_desde_instantanea
+)
+from catapulta.simulador import Construccion
+
+
+FORMATOS = {
+    'instantánea': (juego_a_instantanea, juego_desde_instantanea),
+    'json': (juego_a_bytes, juego_desde_bytes),
+    'pickle': (pickle.dumps, pickle.loads),
+}
+
+
+def crear_juego(rng, construccion, nivel, disparos, oleada=None):
+    """Juego del servidor con una catapulta que ya ha disparado `disparos` veces"""
+    catapulta = construccion.crear_catapulta(rng=rng)
+    while not catapulta.construir():
+        pass
+    enemigos = generar_oleada_enemigos(nivel, rng)
+    for _ in range(disparos):
+        if enemigos.superada:
+            enemigos = generar_oleada_enemigos(nivel, rng)
+        while not enemigos.en_alcance(catapulta.alcance):
+            enemigos.avanzar(10)
+        catapulta.disparar(enemigos.mas_cercano(catapulta.alcance))
+        if catapulta.estado != EstadoCatapulta.LISTA:
+            catapulta.reparar()
+    return {
+        'catapulta': catapulta,
+        'enemigos': oleada if oleada is not None else enemigos,
+        'nivel': nivel,
+        'puntos': 50 * catapulta.enemigos_eliminados,
+        'version': disparos,
+        'semilla': rng.getrandbits(64),
+        'rng': rng,
+    }
+
+
+def juegos_de_prueba():
+    rng = random.Random(0)
+    normal = Construccion(palos=[40, 40], gomas=[8], tapones=3, corchos=2_000, pegamento=8)
+    grande = Construccion(palos=[40] * 5_000, gomas=[8] * 5_000, tapones=500, corchos=1_000_000, pegamento=9)
+    return {
+        'recién construida': crear_juego(rng, normal, 1, 0),
+        'partida (nivel 8, 1000 disparos)': crear_juego(rng, normal, 8, 1_000),
+        'inventario grande': crear_juego(rng, grande, 8, 100),
+        'oleada masiva (100k)': crear_juego(rng, normal, 5, 100, generar_oleada_masiva(5, rng, 100_000)),
+    }
+
+
+def medir(funcion, argumento):
+    """Segundos por llamada (el mejor de 5 repeticiones)"""
+    veces = max(1, int(0.05 / max(timeit.timeit(lambda: funcion(argumento), number=1), 1e-7)))
+    return min(timeit.repeat(lambda: funcion(argumento), number=veces, repeat=5)) / veces
+
+
+def comparar_formatos():
+    print(f"{'juego':<34} {'formato':<12} {'bytes':>10} {'codificar':>12} {'decodificar':>12}")
+    for nombre, juego in juegos_de_prueba().items():
+        for formato, (codificar, decodificar) in FORMATOS.items():
+            try:
+                datos = codificar(juego)
+            except (TypeError, pickle.PicklingError) as e:
+                print(f"{nombre:<34} {formato:<12} no serializable: {e}")
+                continue
+            tiempo_codificar = medir(codificar, juego)
+            tiempo_decodificar = medir(decodificar, datos)
+            print(f"{nombre:<34} {formato:<12} {len(datos):>10} {tiempo_codificar * 1e6:>9.1f} µs "
+                  f"{tiempo_decodificar * 1e6:>9.1f} µs")
+        print()
+
+
+def medir_puntos_control(num_juegos):
+    rng = random.Random(1)
+    normal = Construccion(palos=[40, 40], gomas=[8], tapones=3, corchos=200, pegamento=8)
+    almacen = AlmacenMemoria(max_juegos=num_juegos)
+    for i in range(num_juegos):
+        almacen.guardar(f"{i:016x}", crear_juego(rng, normal, 1 + i % 10, i % 50))
+
+    with tempfile.TemporaryDirectory() as directorio:
+        punto = PuntoControl(almacen, os.path.join(directorio, 'juegos.bin'))
+        punto.guardar()
+        juegos, total, segundos = punto.ultimo
+        print(f"Punto de control de {juegos} juegos: {total / 1024:.0f} KiB, {segundos * 1000:.1f} ms")
+
+        # Cambia el 10 % de los juegos
+        for game_id, juego in almacen.elementos()[::10]:
+            juego['version'] += 1
+        punto.guardar()
+        print(f"Incremental (10 % cambiados): {punto.ultimo[2] * 1000:.1f} ms")
+
+        recuperado = PuntoControl(AlmacenMemoria(max_juegos=num_juegos), punto.ruta)
+        segundos = timeit.timeit(recuperado.cargar, number=1)
+        print(f"Carga al arrancar: {segundos * 1000:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serialización de juegos: instantánea, JSON y pickle")
+    parser.add_argument('--juegos', type=int, default=10_000, help="juegos del punto de control")
+    args = parser.parse_args()
+
+    comparar_formatos()
+    medir_puntos_control(args.juegos)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Microbenchmark del consumo de munición.
+
+Mide el coste por disparo de sacar un corcho con distintas reservas: con la
+lista de antes (list.pop(0), que desplaza toda la lista) y con Municion. El
+coste de Municion debe ser plano, independiente del número de corchos.
+
+Uso:
+    python benchmarks/municion.py
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catapulta.materiales import Corcho, Municion
+
+
+RESERVAS = (10, 1_000, 100_000, 1_000_000)
+DISPAROS = 1_000
+REPETICIONES = 5
+
+
+def coste_lista(reserva):
+    """Segundos por disparo sacando de una lista con pop(0)"""
+    def preparar():
+        return [Corcho() for _ in range(reserva + DISPAROS)]
+    return _medir(preparar, lambda corchos: corchos.pop(0))
+
+
+def coste_municion(reserva):
+    """Segundos por disparo sacando de Municion"""
+    def preparar():
+        return Municion(Corcho(), reserva + DISPAROS)
+    return _medir(preparar, Municion.sacar)
+
+
+def _medir(preparar, sacar):
+    mejor = float('inf')
+    for _ in range(REPETICIONES):
+        corchos = preparar()
+        inicio = timeit.default_timer()
+        for _ in range(DISPAROS):
+            sacar(corchos)
+        mejor = min(mejor, timeit.default_timer() - inicio)
+    return mejor / DISPAROS
+
+
+def main():
+    print(f"{'Corchos':>10} {'list.pop(0)':>14} {'Municion':>12}")
+    for reserva in RESERVAS:
+        print(f"{reserva:>10} {coste_lista(reserva) * 1e9:>11.0f} ns {coste_municion(reserva) * 1e9:>9.0f} ns")
+
+
+if __name__ == "__main__":
+    main()
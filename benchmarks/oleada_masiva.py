@@ -0,0 +1,76 @@
+"""
+Benchmark de generación de oleadas grandes.
+
+Compara generar_oleada_enemigos (un objeto por enemigo) con
+generar_oleada_masiva (columnas y vistas perezosas): tiempo de generación,
+memoria retenida por la oleada y coste de las consultas de alcance.
+
+Uso:
+    python benchmarks/oleada_masiva.py [--enemigos 100000]
+"""
+
+import argparse
+import gc
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catapulta.enemigos import Oleada, Soldado, Caballero, Arquero, Gigante, DISTANCIA_MINIMA, DISTANCIA_MAXIMA
+from catapulta.oleada_masiva import generar_oleada_masiva
+
+
+NIVEL = 10
+ALCANCE = 25
+
+
+def oleada_de_objetos(num_enemigos, rng):
+    """Como generar_oleada_enemigos, pero con num_enemigos enemigos"""
+    tipos = [Soldado, Caballero, Arquero, Gigante]
+    return Oleada(rng.choice(tipos)(rng.randint(DISTANCIA_MINIMA, DISTANCIA_MAXIMA))
+                  for _ in range(num_enemigos))
+
+
+def medir(nombre, generar, num_enemigos):
+    gc.collect()
+    inicio = time.perf_counter()
+    oleada = generar(num_enemigos, random.Random(0))
+    generacion = time.perf_counter() - inicio
+
+    # Memoria retenida, en una segunda generación (tracemalloc ralentiza)
+    del oleada
+    gc.collect()
+    tracemalloc.start()
+    oleada = generar(num_enemigos, random.Random(0))
+    memoria = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    inicio = time.perf_counter()
+    for _ in range(100):
+        oleada.mas_cercano(ALCANCE)
+    cercano = (time.perf_counter() - inicio) / 100
+
+    inicio = time.perf_counter()
+    al_alcance = len(oleada.en_alcance(ALCANCE))
+    alcance = time.perf_counter() - inicio
+
+    print(f"{nombre:<10} {generacion * 1000:>10.1f} ms {memoria / 2**20:>9.1f} MiB "
+          f"{cercano * 1e6:>10.1f} µs {alcance * 1000:>9.1f} ms ({al_alcance} al alcance)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de oleadas grandes")
+    parser.add_argument('--enemigos', type=int, default=100_000)
+    args = parser.parse_args()
+
+    print(f"Oleada de {args.enemigos} enemigos (nivel {NIVEL}, alcance {ALCANCE}m)")
+    print(f"{'':<10} {'generación':>13} {'memoria':>13} {'más cercano':>13} {'en alcance':>12}")
+    medir("objetos", oleada_de_objetos, args.enemigos)
+    medir("columnas", lambda n, rng: generar_oleada_masiva(NIVEL, rng, n), args.enemigos)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,343 @@
+"""
+Suite de benchmarks de los caminos calientes del juego.
+
+Mide tiempo por llamada (mínimo y mediana de varias repeticiones) y memoria
+(pico y memoria retenida por llamada, con tracemalloc) de:
+
+    - las características de Catapulta con inventarios grandes,
+      construir, disparar y reparar;
+    - generar_oleada_enemigos con niveles altos;
+    - la serialización del estado (obtener_estado_catapulta, obtener_enemigos);
+    - una petición por ruta del servidor Flask, con su cliente de pruebas.
+
+Los resultados se pueden guardar en JSON y comparar con una línea base: los
+casos más lentos (o con más memoria) que la base por encima de la tolerancia
+se marcan como regresión y el script termina con código 1. La línea base
+guardada (benchmarks/linea_base.json) solo vale para la máquina en la que se
+midió: en otra, se genera primero con --guardar.
+
+Uso:
+    python benchmarks/suite.py                       # tabla
+    python benchmarks/suite.py --json resultados.json
+    python benchmarks/suite.py --guardar             # nueva línea base
+    python benchmarks/suite.py --comparar [--tolerancia 0.25]
+    python benchmarks/suite.py --casos web.          # solo los que contienen 'web.'
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+# El servidor, con el almacén en memoria y sin métricas (se mide la ruta, no
+# la instrumentación); se fijan antes de importarlo
+os.environ.setdefault('CATAPULTA_ALMACEN', 'memoria')
+os.environ.setdefault('CATAPULTA_METRICAS', '0')
+
+from catapulta.catapulta import EstadoCatapulta
+from catapulta.enemigos import Gigante, Soldado, generar_oleada_enemigos
+from catapulta.estado_juego import obtener_enemigos, obtener_estado_catapulta
+from catapulta.simulador import Construccion
+
+
+LINEA_BASE = os.path.join(RAIZ, 'benchmarks', 'linea_base.json')
+TOLERANCIA = 0.25
+REPETICIONES = 5
+
+INVENTARIO_GRANDE = Construccion(palos=[40] * 5_000, gomas=[8] * 5_000, tapones=500,
+                                 corchos=1_000_000, pegamento=9)
+INVENTARIO_NORMAL = Construccion(palos=[40, 40], gomas=[8], tapones=3, corchos=200, pegamento=8)
+
+
+class Caso:
+    """
+    Un benchmark: preparar(rng, n) retorna los argumentos de n llamadas (no
+    se mide) y operacion(argumento) es lo que se mide, una vez por argumento.
+    """
+
+    def __init__(self, nombre, preparar, operacion, llamadas):
+        self.nombre = nombre
+        self.preparar = preparar
+        self.operacion = operacion
+        self.llamadas = llamadas
+
+
+def catapulta_construida(construccion, rng):
+    catapulta = construccion.crear_catapulta(rng=rng)
+    while not catapulta.construir():
+        pass
+    return catapulta
+
+
+# === MODELO ===
+
+def _estadisticas(catapulta):
+    return catapulta.potencia, catapulta.alcance, catapulta.precision, catapulta.estabilidad
+
+
+def preparar_estadisticas(rng, n):
+    return [catapulta_construida(INVENTARIO_GRANDE, rng)] * n
+
+
+def preparar_construir(rng, n):
+    return [INVENTARIO_NORMAL.crear_catapulta(rng=rng) for _ in range(n)]
+
+
+def preparar_construir_grande(rng, n):
+    return [INVENTARIO_GRANDE.crear_catapulta(rng=rng) for _ in range(n)]
+
+
+def preparar_disparar(rng, n):
+    """Cada llamada es una ráfaga: una catapulta nueva dispara hasta romperse"""
+    argumentos = []
+    for _ in range(n):
+        enemigo = Gigante(10)
+        enemigo.vida = enemigo.vida_maxima = 10 ** 9  # que no muera antes que la catapulta
+        argumentos.append((catapulta_construida(INVENTARIO_NORMAL, rng), enemigo))
+    return argumentos
+
+
+def _rafaga(argumento):
+    catapulta, enemigo = argumento
+    while catapulta.estado == EstadoCatapulta.LISTA:
+        catapulta.disparar(enemigo)
+
+
+def preparar_reparar(rng, n):
+    return [catapulta_construida(INVENTARIO_GRANDE, rng)] * n
+
+
+def preparar_niveles(nivel):
+    def preparar(rng, n):
+        return [(nivel, rng)] * n
+    return preparar
+
+
+def preparar_estado_catapulta(rng, n):
+    catapulta = catapulta_construida(INVENTARIO_GRANDE, rng)
+    enemigo = Soldado(10)
+    for _ in range(20):
+        catapulta.disparar(enemigo)
+        catapulta.reparar()
+    return [catapulta] * n
+
+
+def preparar_enemigos(nivel):
+    def preparar(rng, n):
+        return [generar_oleada_enemigos(nivel, rng)] * n
+    return preparar
+
+
+# === SERVIDOR WEB ===
+
+def _cliente(hasta, rng):
+    """
+    Cliente de pruebas con su juego preparado hasta un punto: None (sin
+    catapulta), 'catapulta', 'construida' u 'oleada'
+    """
+    from catapulta.servidor_web import app
+    cliente = app.test_client()
+    cliente.get('/api/estado')
+    if hasta is None:
+        return cliente
+    cliente.post('/api/crear_catapulta', json={'nombre': 'Benchmark'})
+    if hasta == 'catapulta':
+        return cliente
+    cliente.post('/api/agregar_materiales', json={'palos': [40, 40], 'gomas': [8], 'tapones': 3,
+                                                  'corchos': 200, 'pegamento': 8})
+    while not cliente.post('/api/construir').get_json()['success']:
+        pass
+    if hasta == 'construida':
+        return cliente
+    cliente.post('/api/generar_oleada')
+    return cliente
+
+
+def _primer_vivo(cliente):
+    return next(e['id'] for e in cliente.get('/api/estado').get_json()['enemigos'] if e['vivo'])
+
+
+def ruta(metodo, url, hasta, datos=None):
+    """Caso de una petición; datos puede ser una función (cliente) -> datos"""
+    def preparar(rng, n):
+        argumentos = []
+        for _ in range(n):
+            cliente = _cliente(hasta, rng)
+            argumentos.append((cliente, datos(cliente) if callable(datos) else datos))
+        return argumentos
+
+    def operacion(argumento):
+        cliente, cuerpo = argumento
+        respuesta = cliente.open(url, method=metodo, json=cuerpo)
+        if respuesta.status_code >= 400:
+            raise RuntimeError(f"{metodo} {url}: {respuesta.status_code}")
+    return preparar, operacion
+
+
+def _version(cliente):
+    return cliente.get('/api/estado').get_json()['version']
+
+
+def preparar_estado_sin_cambios(rng, n):
+    cliente = _cliente('oleada', rng)
+    return [(cliente, _version(cliente))] * n
+
+
+def _estado_sin_cambios(argumento):
+    cliente, version = argumento
+    cliente.get(f'/api/estado?version={version}')
+
+
+CASOS = [
+    Caso('catapulta.estadisticas_inventario_grande', preparar_estadisticas, _estadisticas, 20_000),
+    Caso('catapulta.construir', preparar_construir, lambda c: c.construir(), 2_000),
+    Caso('catapulta.construir_inventario_grande', preparar_construir_grande, lambda c: c.construir(), 20),
+    Caso('catapulta.disparar_rafaga', preparar_disparar, _rafaga, 200),
+    Caso('catapulta.reparar', preparar_reparar, lambda c: c.reparar(), 20_000),
+    Caso('oleada.generar_nivel_10', preparar_niveles(10), lambda a: generar_oleada_enemigos(*a), 2_000),
+    Caso('oleada.generar_nivel_100', preparar_niveles(100), lambda a: generar_oleada_enemigos(*a), 500),
+    Caso('oleada.generar_nivel_1000', preparar_niveles(1000), lambda a: generar_oleada_enemigos(*a), 50),
+    Caso('estado.obtener_estado_catapulta', preparar_estado_catapulta, obtener_estado_catapulta, 10_000),
+    Caso('estado.obtener_enemigos_nivel_10', preparar_enemigos(10), obtener_enemigos, 5_000),
+    Caso('estado.obtener_enemigos_nivel_1000', preparar_enemigos(1000), obtener_enemigos, 100),
+    Caso('web.index', *ruta('GET', '/', None), 200),
+    Caso('web.estado', *ruta('GET', '/api/estado', 'oleada'), 200),
+    Caso('web.estado_sin_cambios', preparar_estado_sin_cambios, _estado_sin_cambios, 1_000),
+    Caso('web.crear_catapulta', *ruta('POST', '/api/crear_catapulta', None, {'nombre': 'B'}), 200),
+    Caso('web.agregar_material', *ruta('POST', '/api/agregar_material', 'catapulta',
+                                       {'tipo': 'palo', 'valor': 40}), 200),
+    Caso('web.agregar_materiales', *ruta('POST', '/api/agregar_materiales', 'catapulta',
+                                         {'palos': [40] * 20, 'gomas': [8] * 20, 'tapones': 50,
+                                          'corchos': 10_000, 'pegamento': 8}), 200),
+    Caso('web.construir', *ruta('POST', '/api/construir', 'catapulta'), 200),
+    Caso('web.generar_oleada', *ruta('POST', '/api/generar_oleada', 'construida'), 200),
+    Caso('web.disparar', *ruta('POST', '/api/disparar', 'oleada', lambda c: {'id': _primer_vivo(c)}), 200),
+    Caso('web.disparar_con_version', *ruta('POST', '/api/disparar', 'oleada',
+                                           lambda c: {'id': _primer_vivo(c), 'version': _version(c)}), 200),
+    Caso('web.disparar_area', *ruta('POST', '/api/disparar_area', 'oleada', {'distancia': 30}), 200),
+    Caso('web.reparar', *ruta('POST', '/api/reparar', 'construida'), 200),
+    Caso('web.mejorar', *ruta('POST', '/api/mejorar', 'construida', {'tipo': 'refuerzo'}), 200),
+]
+
+
+# === MEDICIÓN ===
+
+def medir(caso, escala=1.0, repeticiones=REPETICIONES):
+    """Retorna el diccionario de resultados de un caso"""
+    llamadas = max(1, int(caso.llamadas * escala))
+    operacion = caso.operacion
+
+    tiempos = []
+    for repeticion in range(repeticiones):
+        argumentos = caso.preparar(random.Random(repeticion), llamadas)
+        gc.collect()
+        inicio = time.perf_counter()
+        for argumento in argumentos:
+            operacion(argumento)
+        tiempos.append((time.perf_counter() - inicio) / llamadas)
+
+    # Memoria en una pasada aparte (tracemalloc ralentiza mucho las llamadas)
+    argumentos = caso.preparar(random.Random(repeticiones), llamadas)
+    gc.collect()
+    tracemalloc.start()
+    for argumento in argumentos:
+        operacion(argumento)
+    retenida, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'llamadas': llamadas,
+        'min_us': min(tiempos) * 1e6,
+        'mediana_us': statistics.median(tiempos) * 1e6,
+        'pico_bytes': pico,
+        'retenida_bytes_por_llamada': retenida / llamadas,
+    }
+
+
+def comparar(resultados, base, tolerancia):
+    """
+    Compara con la línea base. Retorna {caso: (razón de tiempo, razón de pico,
+    regresión)}; las razones son actual / base (None si el caso no está en la base).
+    """
+    comparacion = {}
+    for nombre, actual in resultados.items():
+        anterior = base.get(nombre)
+        if anterior is None:
+            comparacion[nombre] = (None, None, False)
+            continue
+        razon_tiempo = actual['mediana_us'] / anterior['mediana_us'] if anterior['mediana_us'] else 1.0
+        # Los picos muy pequeños varían mucho en proporción: se ignoran por debajo de 64 KiB
+        razon_pico = actual['pico_bytes'] / anterior['pico_bytes'] \
+            if anterior['pico_bytes'] > 65536 else 1.0
+        regresion = razon_tiempo > 1 + tolerancia or razon_pico > 1 + tolerancia
+        comparacion[nombre] = (razon_tiempo, razon_pico, regresion)
+    return comparacion
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de los caminos calientes del juego")
+    parser.add_argument('--casos', default='', help="ejecutar solo los casos cuyo nombre contiene esto")
+    parser.add_argument('--escala', type=float, default=1.0, help="multiplica las llamadas de cada caso")
+    parser.add_argument('--repeticiones', type=int, default=REPETICIONES)
+    parser.add_argument('--json', metavar='FICHERO', help="guardar los resultados en JSON")
+    parser.add_argument('--guardar', action='store_true', help=f"guardar como línea base ({LINEA_BASE})")
+    parser.add_argument('--comparar', nargs='?', const=LINEA_BASE, metavar='BASE',
+                        help="comparar con una línea base (por defecto la guardada)")
+    parser.add_argument('--tolerancia', type=float, default=TOLERANCIA,
+                        help="empeoramiento relativo que se admite antes de marcar regresión")
+    args = parser.parse_args()
+
+    base = {}
+    if args.comparar:
+        with open(args.comparar) as fichero:
+            base = json.load(fichero)['casos']
+
+    resultados = {}
+    print(f"{'caso':<42} {'llamadas':>8} {'min':>12} {'mediana':>12} {'pico':>10} {'retenida':>10}"
+          + (f" {'tiempo':>7} {'pico':>7}" if base else ""))
+    regresiones = []
+    for caso in CASOS:
+        if args.casos not in caso.nombre:
+            continue
+        r = resultados[caso.nombre] = medir(caso, args.escala, args.repeticiones)
+        linea = (f"{caso.nombre:<42} {r['llamadas']:>8} {r['min_us']:>9.2f} µs {r['mediana_us']:>9.2f} µs "
+                 f"{r['pico_bytes'] / 1024:>6.0f} KiB {r['retenida_bytes_por_llamada']:>8.0f} B")
+        if base:
+            razon_tiempo, razon_pico, regresion = comparar({caso.nombre: r}, base, args.tolerancia)[caso.nombre]
+            if razon_tiempo is None:
+                linea += f" {'nuevo':>7}"
+            else:
+                linea += f" {razon_tiempo:>6.2f}x {razon_pico:>6.2f}x" + ("  REGRESIÓN" if regresion else "")
+            if regresion:
+                regresiones.append(caso.nombre)
+        print(linea, flush=True)
+
+    documento = {
+        'python': platform.python_version(),
+        'implementacion': platform.python_implementation(),
+        'plataforma': platform.platform(),
+        'fecha': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'casos': resultados,
+    }
+    for destino in ([args.json] if args.json else []) + ([LINEA_BASE] if args.guardar else []):
+        with open(destino, 'w') as fichero:
+            json.dump(documento, fichero, indent=2, sort_keys=True)
+            fichero.write("\n")
+        print(f"Resultados guardados en {destino}")
+
+    if regresiones:
+        print(f"\n{len(regresiones)} regresiones (tolerancia {args.tolerancia:.0%}): {', '.join(regresiones)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
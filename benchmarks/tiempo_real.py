@@ -0,0 +1,60 @@
+"""
+Benchmark del motor de batallas en tiempo real.
+
+Juega batallas sin pausa (MotorBatalla.ejecutar) contra oleadas de distintos
+tamaños y muestra los contadores de perfil de los ticks: ticks por segundo y
+duración media y máxima de un tick.
+
+Uso:
+    python benchmarks/tiempo_real.py [--batallas 20]
+"""
+
+import argparse
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catapulta.oleada_masiva import generar_oleada_masiva
+from catapulta.simulador import Construccion
+from catapulta.tiempo_real import MotorBatalla, PerfilTicks
+
+
+ENEMIGOS = (10, 1_000, 100_000)
+CONSTRUCCION = Construccion(palos=[40, 40], gomas=[8], tapones=3, corchos=200, pegamento=8)
+
+
+def medir(num_enemigos, batallas):
+    rng = random.Random(0)
+    perfil = PerfilTicks()
+    fines = {}
+    for _ in range(batallas):
+        catapulta = CONSTRUCCION.crear_catapulta(rng=rng)
+        while not catapulta.construir():
+            pass
+        oleada = generar_oleada_masiva(5, rng, num_enemigos)
+        motor = MotorBatalla(catapulta, oleada, politica='mas_cercano', perfilar=True)
+        fin = motor.ejecutar()
+        fines[fin] = fines.get(fin, 0) + 1
+
+        perfil.ticks += motor.perfil.ticks
+        perfil.total += motor.perfil.total
+        perfil.maximo = max(perfil.maximo, motor.perfil.maximo)
+
+    print(f"{num_enemigos:>10} {perfil.ticks_por_segundo:>12.0f} {perfil.media * 1e6:>10.1f} µs "
+          f"{perfil.maximo * 1e6:>10.1f} µs  {fines}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del motor de tiempo real")
+    parser.add_argument('--batallas', type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'Enemigos':>10} {'ticks/s':>12} {'media':>13} {'máximo':>13}")
+    for num_enemigos in ENEMIGOS:
+        medir(num_enemigos, args.batallas if num_enemigos < 100_000 else max(1, args.batallas // 10))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,16 +3,21 @@ Paquete catapulta - Sistema de defensa con catapultas
 """
 
 from catapulta.catapulta import Catapulta, EstadoCatapulta
-from catapulta.materiales import Palo, Goma, Tapon, Corcho, Pegamento
-from catapulta.enemigos import Enemigo, Soldado, Caballero, Arquero, Gigante, generar_oleada_enemigos
+from catapulta.materiales import Palo, Goma, Tapon, Corcho, Pegamento, Existencias, Municion, ListaMateriales
+from catapulta.enemigos import Enemigo, Soldado, Caballero, Arquero, Gigante, Oleada, generar_oleada_enemigos
+from catapulta.oleada_masiva import OleadaMasiva, generar_oleada_masiva
+from catapulta.tiempo_real import MotorBatalla
 from catapulta.juego import Juego
 
 __all__ = [
     'Catapulta',
     'EstadoCatapulta',
     'Palo', 'Goma', 'Tapon', 'Corcho', 'Pegamento',
+    'Existencias', 'Municion', 'ListaMateriales',
     'Enemigo', 'Soldado', 'Caballero', 'Arquero', 'Gigante',
-    'generar_oleada_enemigos',
+    'Oleada', 'OleadaMasiva',
+    'generar_oleada_enemigos', 'generar_oleada_masiva',
+    'MotorBatalla',
     'Juego'
 ]
 
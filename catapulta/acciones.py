@@ -0,0 +1,337 @@
+"""
+Acciones de la API del juego, independientes del servidor.
+
+Cada acción recibe el diccionario del juego y los datos de la petición y
+retorna (respuesta, cambio): el diccionario que se envía al cliente y si el
+estado del juego cambió. Guardar el juego, subir su versión y avisar a los
+streams es cosa del servidor (servidor_web con Flask, servidor_asgi con
+asyncio), así que los dos exponen exactamente las mismas reglas.
+"""
+
+import random
+import secrets
+
+from catapulta.catapulta import Catapulta, EstadoCatapulta
+from catapulta.enemigos import Oleada, generar_oleada_enemigos
+from catapulta.oleada_masiva import generar_oleada_masiva
+from catapulta.estado_juego import obtener_inventario, obtener_estado_catapulta, obtener_enemigos
+
+
+# Límites de materiales por petición (acotan el trabajo de cada petición)
+MAX_PALOS_POR_PETICION = 20
+MAX_GOMAS_POR_PETICION = 20
+MAX_TAPONES_POR_PETICION = 50
+MAX_CORCHOS_POR_PETICION = 10000
+# Longitud máxima (cm) de un palo recibido por la API
+MAX_LONGITUD_PALO = 1000
+# Enemigos como máximo de una oleada masiva pedida por la API (cada estado
+# completo los lista todos)
+MAX_ENEMIGOS_OLEADA = 10000
+
+# Error de un material que la catapulta rechaza, por tipo
+_MATERIAL_RECHAZADO = {
+    'palo': f'La longitud debe estar entre 1 y {MAX_LONGITUD_PALO} cm',
+    'goma': 'La elasticidad debe estar entre 1 y 10',
+    'tapon': 'No se pudo agregar el tapón',
+    'corcho': 'La cantidad de corchos no puede ser negativa',
+    'pegamento': 'La calidad debe estar entre 1 y 10',
+}
+
+
+def nuevo_juego():
+    """Diccionario de un juego recién empezado"""
+    return {
+        'catapulta': None,
+        'enemigos': Oleada(),
+        'nivel': 1,
+        'puntos': 0,
+        'version': 0,
+        'semilla': secrets.randbits(64)
+    }
+
+
+def preparar_generador(juego):
+    """
+    Prepara el generador aleatorio del juego para esta petición.
+
+    Se deriva de la semilla del juego y de su versión: la partida es
+    reproducible a partir de su semilla y el estado guardado no necesita
+    incluir el estado interno del generador.
+    """
+    if juego.get('semilla') is None:
+        juego['semilla'] = secrets.randbits(64)
+    juego['rng'] = random.Random(f"{juego['semilla']}:{juego['version']}")
+    if juego['catapulta']:
+        juego['catapulta'].rng = juego['rng']
+
+
+def _error(mensaje):
+    return {'success': False, 'error': mensaje}, False
+
+
+def crear_catapulta(juego, data):
+    """Crea una nueva catapulta"""
+    nombre = data.get('nombre', 'Mi Catapulta')
+    juego['catapulta'] = Catapulta(nombre, rng=juego['rng'])
+    return {'success': True, 'mensaje': f"Catapulta '{nombre}' creada"}, True
+
+
+def agregar_material(juego, data):
+    """Agrega un material a la catapulta"""
+    tipo = data.get('tipo')
+    valor = data.get('valor')
+    catapulta = juego['catapulta']
+
+    if not catapulta:
+        return _error('Catapulta no creada')
+
+    if catapulta.construida:
+        return _error('Catapulta ya construida')
+
+    try:
+        if tipo == 'palo':
+            longitud = int(valor)
+            agregado = 1 <= longitud <= MAX_LONGITUD_PALO and catapulta.agregar_palo(longitud)
+        elif tipo == 'goma':
+            agregado = catapulta.agregar_goma(int(valor))
+        elif tipo == 'tapon':
+            agregado = catapulta.agregar_tapon()
+        elif tipo == 'corcho':
+            cantidad = int(valor)
+            if cantidad > MAX_CORCHOS_POR_PETICION:
+                return _error(f'Como máximo {MAX_CORCHOS_POR_PETICION} corchos por petición')
+            agregado = catapulta.agregar_materiales(corchos=cantidad)
+        elif tipo == 'pegamento':
+            agregado = catapulta.agregar_pegamento(int(valor))
+        else:
+            return _error('Tipo de material desconocido')
+    except Exception as e:
+        return _error(str(e))
+
+    if not agregado:
+        # La catapulta no cambió: ni éxito ni versión nueva
+        return _error(_MATERIAL_RECHAZADO[tipo])
+    return {'success': True, 'inventario': obtener_inventario(catapulta)}, True
+
+
+def agregar_materiales(juego, data):
+    """
+    Agrega una lista completa de materiales en una sola petición:
+    {"palos": [30, 40], "gomas": [8], "tapones": 2, "corchos": 20, "pegamento": 7}
+    """
+    catapulta = juego['catapulta']
+
+    if not catapulta:
+        return _error('Catapulta no creada')
+
+    if catapulta.construida:
+        return _error('Catapulta ya construida')
+
+    palos = data.get('palos') or []
+    gomas = data.get('gomas') or []
+    try:
+        tapones = int(data.get('tapones') or 0)
+        corchos = int(data.get('corchos') or 0)
+        pegamento = data.get('pegamento')
+        pegamento = int(pegamento) if pegamento is not None else None
+
+        # Comprobar los límites antes de convertir las listas
+        if len(palos) > MAX_PALOS_POR_PETICION or len(gomas) > MAX_GOMAS_POR_PETICION \
+                or tapones > MAX_TAPONES_POR_PETICION or corchos > MAX_CORCHOS_POR_PETICION:
+            return _error(
+                f'Como máximo {MAX_PALOS_POR_PETICION} palos, {MAX_GOMAS_POR_PETICION} gomas, '
+                f'{MAX_TAPONES_POR_PETICION} tapones y {MAX_CORCHOS_POR_PETICION} corchos por petición')
+
+        palos = [int(longitud) for longitud in palos]
+        gomas = [int(elasticidad) for elasticidad in gomas]
+    except (TypeError, ValueError, OverflowError):
+        return _error('Lista de materiales inválida')
+
+    # Se comprueba todo antes de agregar nada (la catapulta también lo hace)
+    if not all(1 <= longitud <= MAX_LONGITUD_PALO for longitud in palos):
+        return _error(_MATERIAL_RECHAZADO['palo'])
+
+    try:
+        agregados = catapulta.agregar_materiales(palos, gomas, tapones, corchos, pegamento)
+    except (TypeError, ValueError, OverflowError):
+        agregados = False
+    if not agregados:
+        return _error('Materiales inválidos')
+
+    return {'success': True, 'inventario': obtener_inventario(catapulta)}, True
+
+
+def construir(juego, data):
+    """Construye la catapulta"""
+    catapulta = juego['catapulta']
+
+    if not catapulta:
+        return _error('Catapulta no creada')
+
+    if catapulta.construir():
+        return {
+            'success': True,
+            'mensaje': f"¡Catapulta '{catapulta.nombre}' construida con éxito!",
+            'estado': obtener_estado_catapulta(catapulta)
+        }, True
+    # Un intento fallido también cuenta como cambio: así sube la versión y el
+    # siguiente intento usa otro generador (si no, repetiría el mismo sorteo)
+    return {'success': False, 'error': 'No se pudo construir. Verifica los materiales mínimos.'}, True
+
+
+def generar_oleada(juego, data):
+    """
+    Genera una nueva oleada de enemigos. Con {"enemigos": N} genera una
+    oleada masiva de N enemigos (ver catapulta.oleada_masiva)
+    """
+    if not juego['catapulta'] or not juego['catapulta'].construida:
+        return _error('Construye la catapulta primero')
+
+    num_enemigos = data.get('enemigos')
+    if num_enemigos is None:
+        juego['enemigos'] = generar_oleada_enemigos(juego['nivel'], juego['rng'])
+    elif isinstance(num_enemigos, int) and not isinstance(num_enemigos, bool) \
+            and 1 <= num_enemigos <= MAX_ENEMIGOS_OLEADA:
+        juego['enemigos'] = generar_oleada_masiva(juego['nivel'], juego['rng'], num_enemigos)
+    else:
+        return _error(f'La oleada debe tener entre 1 y {MAX_ENEMIGOS_OLEADA} enemigos')
+    return {
+        'success': True,
+        'nivel': juego['nivel'],
+        'enemigos': obtener_enemigos(juego['enemigos'])
+    }, True
+
+
+def disparar(juego, data):
+    """Dispara a un enemigo"""
+    catapulta = juego['catapulta']
+    oleada = juego['enemigos']
+
+    if not catapulta or not catapulta.construida:
+        return _error('Catapulta no lista')
+
+    # El cliente identifica al enemigo por su id estable ('enemigo', la
+    # posición entre los vivos, se mantiene por compatibilidad)
+    if 'id' in data:
+        enemigo = oleada.por_id(data['id'])
+    else:
+        enemigos_vivos = oleada.vivos()
+        indice_enemigo = data.get('enemigo')
+        enemigo = enemigos_vivos[indice_enemigo] \
+            if isinstance(indice_enemigo, int) and 0 <= indice_enemigo < len(enemigos_vivos) else None
+
+    if enemigo is None or not enemigo.vivo:
+        return _error('Enemigo inválido')
+
+    acierto = catapulta.disparar(enemigo)
+
+    eliminado = not enemigo.vivo
+    return _resultado_disparo(juego, 1 if eliminado else 0, acierto=acierto, eliminado=eliminado)
+
+
+def disparar_area(juego, data):
+    """
+    Disparo de área: {"distancia": 30} daña a todos los enemigos vivos a
+    Catapulta.RADIO_AREA metros o menos del punto de impacto
+    """
+    catapulta = juego['catapulta']
+    oleada = juego['enemigos']
+
+    if not catapulta or not catapulta.construida:
+        return _error('Catapulta no lista')
+
+    if oleada.superada:
+        return _error('No hay enemigos')
+
+    distancia = data.get('distancia')
+    if not isinstance(distancia, (int, float)) or isinstance(distancia, bool) or distancia < 0:
+        return _error('Distancia inválida')
+
+    resultado = catapulta.disparar_area(oleada, distancia)
+    return _resultado_disparo(juego, resultado.eliminados, acierto=resultado.acierto,
+                              afectados=resultado.afectados, eliminados=resultado.eliminados)
+
+
+def _resultado_disparo(juego, bajas, **campos):
+    """Suma los puntos de un disparo y comprueba la victoria"""
+    juego['puntos'] += 50 * bajas
+
+    victoria = bajas > 0 and juego['enemigos'].superada
+    if victoria:
+        juego['puntos'] += juego['nivel'] * 100
+        juego['nivel'] += 1
+
+    return {
+        'success': True,
+        **campos,
+        'victoria': victoria,
+        'puntos': juego['puntos'],
+        'nivel': juego['nivel'],
+        'game_over': juego['catapulta'].estado == EstadoCatapulta.DESTRUIDA
+    }, True
+
+
+def agregar_estado(respuesta, versiones, game_id, juego, version_cliente):
+    """
+    Añade a la respuesta de un disparo el estado tras el cambio: solo el
+    parche si el cliente indicó una versión conocida, si no el completo.
+    """
+    tipo, datos = versiones.respuesta(game_id, juego, version_cliente)
+    if tipo == 'parche':
+        respuesta.update(datos)
+    else:
+        estado_juego = versiones.estado_actual(game_id, juego)
+        respuesta['estado'] = estado_juego['catapulta']
+        respuesta['enemigos'] = estado_juego['enemigos']
+        respuesta['version'] = estado_juego['version']
+    return respuesta
+
+
+def reparar(juego, data):
+    """Repara la catapulta"""
+    catapulta = juego['catapulta']
+
+    if not catapulta:
+        return _error('Catapulta no creada')
+
+    if catapulta.reparar():
+        return {
+            'success': True,
+            'mensaje': 'Catapulta reparada',
+            'estado': obtener_estado_catapulta(catapulta)
+        }, True
+    return _error('No se pudo reparar (¿sin recursos?)')
+
+
+def mejorar(juego, data):
+    """Mejora la catapulta"""
+    tipo = data.get('tipo')
+    catapulta = juego['catapulta']
+
+    if not catapulta:
+        return _error('Catapulta no creada')
+
+    if catapulta.mejorar(tipo):
+        return {
+            'success': True,
+            'mensaje': f'Mejora {tipo} aplicada',
+            'estado': obtener_estado_catapulta(catapulta)
+        }, True
+    return _error('No se pudo mejorar')
+
+
+# Acciones por nombre de ruta (/api/<nombre>)
+ACCIONES = {
+    'crear_catapulta': crear_catapulta,
+    'agregar_material': agregar_material,
+    'agregar_materiales': agregar_materiales,
+    'construir': construir,
+    'generar_oleada': generar_oleada,
+    'disparar': disparar,
+    'disparar_area': disparar_area,
+    'reparar': reparar,
+    'mejorar': mejorar,
+}
+
+# Acciones cuya respuesta lleva el estado tras el cambio (agregar_estado)
+CON_ESTADO = {'disparar', 'disparar_area'}
@@ -0,0 +1,479 @@
+"""
+Almacenes de juegos para el servidor web.
+
+    - AlmacenMemoria: en el propio proceso, con expulsión LRU y por inactividad
+    - AlmacenSQLite: fuera del proceso, compartido por varios workers
+
+Ambos limitan el número de juegos y expulsan los que llevan más de `ttl`
+segundos sin usarse, y llevan métricas de aciertos, fallos y expulsiones.
+
+Un PuntoControl guarda periódicamente los juegos de un AlmacenMemoria en un
+fichero, para no perderlos al reiniciar el servidor.
+"""
+
+from collections import OrderedDict
+import os
+import sqlite3
+import struct
+import threading
+import time
+
+from catapulta.serializacion import juego_a_instantanea, juego_desde_bytes
+
+
+# Valores por defecto
+MAX_JUEGOS = 10000
+TTL_JUEGOS = 2 * 60 * 60  # segundos sin actividad antes de expulsar un juego
+INTERVALO_PUNTO_CONTROL = 30  # segundos entre dos puntos de control
+
+
+class AlmacenJuegos:
+    """
+    Interfaz común de los almacenes de juegos.
+
+    Los juegos son los diccionarios del servidor web ('catapulta', 'enemigos',
+    'nivel', 'puntos', 'version'). Tras modificar un juego hay que llamar a
+    guardar() para que el cambio sea visible en otros procesos.
+    """
+
+    # True si varios procesos ven los mismos juegos
+    compartido = False
+
+    def __init__(self, max_juegos=MAX_JUEGOS, ttl=TTL_JUEGOS, al_expulsar=None):
+        self.max_juegos = max_juegos
+        self.ttl = ttl
+        self.al_expulsar = al_expulsar
+        self._metricas = {
+            'aciertos': 0,
+            'fallos': 0,
+            'expulsiones_lru': 0,
+            'expulsiones_ttl': 0,
+        }
+
+    def obtener(self, game_id):
+        """Retorna el juego o None si no existe (o ha expirado)"""
+        raise NotImplementedError
+
+    def guardar(self, game_id, juego):
+        """Guarda (o actualiza) un juego"""
+        raise NotImplementedError
+
+    def guardar_si_version(self, game_id, juego, version):
+        """
+        Guarda el juego solo si el guardado sigue en `version` (None: solo
+        si no existe). Retorna False, sin guardar, si otro proceso lo cambió
+        desde que se leyó: hay que repetir el cambio sobre el juego actual.
+
+        En un almacén propio del proceso las acciones de un juego ya van de
+        una en una (con el lock del juego), así que basta con guardar.
+        """
+        self.guardar(game_id, juego)
+        return True
+
+    def eliminar(self, game_id):
+        """Elimina un juego"""
+        raise NotImplementedError
+
+    def version(self, game_id):
+        """Retorna la versión guardada de un juego, o None"""
+        juego = self.obtener(game_id)
+        return juego['version'] if juego else None
+
+    def purgar(self):
+        """Expulsa los juegos inactivos. Retorna cuántos se expulsaron"""
+        raise NotImplementedError
+
+    # Batallas en tiempo real: el motor corre en un solo proceso, que anota
+    # aquí que la juega durante `plazo` segundos y renueva el plazo mientras
+    # dura. En un almacén propio del proceso basta con sus motores, así que
+    # estas operaciones solo hacen algo en los compartidos.
+
+    def anotar_batalla(self, game_id, plazo):
+        """Anota (o renueva) que un proceso juega una batalla del juego"""
+
+    def terminar_batalla(self, game_id):
+        """Borra la anotación de la batalla del juego"""
+
+    def batalla_en_curso(self, game_id):
+        """True si algún proceso juega una batalla del juego (y no ha vencido su plazo)"""
+        return False
+
+    def __len__(self):
+        raise NotImplementedError
+
+    def __contains__(self, game_id):
+        return self.obtener(game_id) is not None
+
+    def metricas(self):
+        """Retorna las métricas del almacén"""
+        metricas = dict(self._metricas)
+        metricas['juegos'] = len(self)
+        return metricas
+
+    def _expulsado(self, game_id, motivo):
+        self._metricas['expulsiones_' + motivo] += 1
+        if self.al_expulsar:
+            self.al_expulsar(game_id)
+
+
+class AlmacenMemoria(AlmacenJuegos):
+    """Almacén en memoria con expulsión LRU y por inactividad (TTL)"""
+
+    def __init__(self, max_juegos=MAX_JUEGOS, ttl=TTL_JUEGOS, al_expulsar=None):
+        super().__init__(max_juegos, ttl, al_expulsar)
+        self._juegos = OrderedDict()  # game_id -> (juego, último acceso)
+        self._lock = threading.Lock()
+
+    def obtener(self, game_id):
+        ahora = time.monotonic()
+        with self._lock:
+            entrada = self._juegos.get(game_id)
+            if entrada is None:
+                self._metricas['fallos'] += 1
+                return None
+            juego, acceso = entrada
+            if ahora - acceso > self.ttl:
+                del self._juegos[game_id]
+                self._metricas['fallos'] += 1
+                expirado = True
+            else:
+                self._juegos[game_id] = (juego, ahora)
+                self._juegos.move_to_end(game_id)
+                self._metricas['aciertos'] += 1
+                expirado = False
+        if expirado:
+            self._expulsado(game_id, 'ttl')
+            return None
+        return juego
+
+    def guardar(self, game_id, juego):
+        expulsados = []
+        with self._lock:
+            self._juegos[game_id] = (juego, time.monotonic())
+            self._juegos.move_to_end(game_id)
+            while len(self._juegos) > self.max_juegos:
+                expulsados.append(self._juegos.popitem(last=False)[0])
+        for expulsado in expulsados:
+            self._expulsado(expulsado, 'lru')
+
+    def eliminar(self, game_id):
+        with self._lock:
+            self._juegos.pop(game_id, None)
+
+    def elementos(self):
+        """Lista (game_id, juego) de los juegos guardados, del menos al más reciente"""
+        with self._lock:
+            return [(game_id, juego) for game_id, (juego, _) in self._juegos.items()]
+
+    def purgar(self):
+        limite = time.monotonic() - self.ttl
+        expulsados = []
+        with self._lock:
+            # El OrderedDict está ordenado por último acceso
+            for game_id, (_, acceso) in self._juegos.items():
+                if acceso >= limite:
+                    break
+                expulsados.append(game_id)
+            for game_id in expulsados:
+                del self._juegos[game_id]
+        for game_id in expulsados:
+            self._expulsado(game_id, 'ttl')
+        return len(expulsados)
+
+    def __len__(self):
+        return len(self._juegos)
+
+
+class AlmacenSQLite(AlmacenJuegos):
+    """
+    Almacén en un fichero SQLite compartido entre procesos.
+
+    Los juegos se guardan como instantáneas binarias (ver
+    catapulta.serializacion; las filas antiguas en JSON se siguen leyendo),
+    así que obtener() retorna una copia: hay que llamar a guardar() tras cada
+    cambio.
+    """
+
+    compartido = True
+
+    # Cada cuántas escrituras se purgan juegos inactivos y sobrantes
+    PURGAR_CADA = 100
+
+    def __init__(self, ruta, max_juegos=MAX_JUEGOS, ttl=TTL_JUEGOS, al_expulsar=None):
+        super().__init__(max_juegos, ttl, al_expulsar)
+        self.ruta = ruta
+        self._local = threading.local()
+        self._escrituras = 0
+        with self._conexion() as conexion:
+            conexion.execute(
+                "CREATE TABLE IF NOT EXISTS juegos ("
+                " game_id TEXT PRIMARY KEY,"
+                " version INTEGER NOT NULL,"
+                " acceso REAL NOT NULL,"
+                " datos BLOB NOT NULL)"
+            )
+            conexion.execute("CREATE INDEX IF NOT EXISTS juegos_acceso ON juegos (acceso)")
+            conexion.execute(
+                "CREATE TABLE IF NOT EXISTS batallas ("
+                " game_id TEXT PRIMARY KEY,"
+                " hasta REAL NOT NULL)"
+            )
+
+    def _conexion(self):
+        """Una conexión por hilo (sqlite3 no comparte conexiones entre hilos)"""
+        conexion = getattr(self._local, 'conexion', None)
+        if conexion is None:
+            conexion = sqlite3.connect(self.ruta, timeout=30)
+            conexion.execute("PRAGMA journal_mode=WAL")
+            conexion.execute("PRAGMA synchronous=NORMAL")
+            self._local.conexion = conexion
+        return conexion
+
+    def obtener(self, game_id):
+        ahora = time.time()
+        with self._conexion() as conexion:
+            fila = conexion.execute(
+                "SELECT datos, acceso FROM juegos WHERE game_id = ?", (game_id,)
+            ).fetchone()
+            if fila is None:
+                self._metricas['fallos'] += 1
+                return None
+            datos, acceso = fila
+            if ahora - acceso > self.ttl:
+                conexion.execute("DELETE FROM juegos WHERE game_id = ?", (game_id,))
+                expirado = True
+            else:
+                conexion.execute("UPDATE juegos SET acceso = ? WHERE game_id = ?", (ahora, game_id))
+                expirado = False
+        if expirado:
+            self._metricas['fallos'] += 1
+            self._expulsado(game_id, 'ttl')
+            return None
+        self._metricas['aciertos'] += 1
+        return juego_desde_bytes(datos)
+
+    def guardar(self, game_id, juego):
+        with self._conexion() as conexion:
+            conexion.execute(
+                "INSERT OR REPLACE INTO juegos (game_id, version, acceso, datos) VALUES (?, ?, ?, ?)",
+                (game_id, juego['version'], time.time(), juego_a_instantanea(juego))
+            )
+        self._escrito()
+
+    def guardar_si_version(self, game_id, juego, version):
+        datos = juego_a_instantanea(juego)
+        with self._conexion() as conexion:
+            if version is None:
+                cursor = conexion.execute(
+                    "INSERT OR IGNORE INTO juegos (game_id, version, acceso, datos) VALUES (?, ?, ?, ?)",
+                    (game_id, juego['version'], time.time(), datos)
+                )
+            else:
+                cursor = conexion.execute(
+                    "UPDATE juegos SET version = ?, acceso = ?, datos = ? WHERE game_id = ? AND version = ?",
+                    (juego['version'], time.time(), datos, game_id, version)
+                )
+        if cursor.rowcount != 1:
+            return False
+        self._escrito()
+        return True
+
+    def _escrito(self):
+        self._escrituras += 1
+        if self._escrituras % self.PURGAR_CADA == 0:
+            self.purgar()
+
+    def eliminar(self, game_id):
+        with self._conexion() as conexion:
+            conexion.execute("DELETE FROM juegos WHERE game_id = ?", (game_id,))
+
+    def version(self, game_id):
+        fila = self._conexion().execute(
+            "SELECT version FROM juegos WHERE game_id = ?", (game_id,)
+        ).fetchone()
+        return fila[0] if fila else None
+
+    def anotar_batalla(self, game_id, plazo):
+        with self._conexion() as conexion:
+            conexion.execute("INSERT OR REPLACE INTO batallas (game_id, hasta) VALUES (?, ?)",
+                             (game_id, time.time() + plazo))
+
+    def terminar_batalla(self, game_id):
+        with self._conexion() as conexion:
+            conexion.execute("DELETE FROM batallas WHERE game_id = ?", (game_id,))
+
+    def batalla_en_curso(self, game_id):
+        fila = self._conexion().execute(
+            "SELECT hasta FROM batallas WHERE game_id = ?", (game_id,)
+        ).fetchone()
+        return fila is not None and fila[0] > time.time()
+
+    def purgar(self):
+        limite = time.time() - self.ttl
+        with self._conexion() as conexion:
+            # Batallas de procesos que cayeron sin terminarlas
+            conexion.execute("DELETE FROM batallas WHERE hasta < ?", (time.time(),))
+            expirados = [fila[0] for fila in conexion.execute(
+                "SELECT game_id FROM juegos WHERE acceso < ?", (limite,))]
+            conexion.execute("DELETE FROM juegos WHERE acceso < ?", (limite,))
+
+            sobrantes = conexion.execute("SELECT COUNT(*) FROM juegos").fetchone()[0] - self.max_juegos
+            lru = []
+            if sobrantes > 0:
+                lru = [fila[0] for fila in conexion.execute(
+                    "SELECT game_id FROM juegos ORDER BY acceso LIMIT ?", (sobrantes,))]
+                conexion.executemany("DELETE FROM juegos WHERE game_id = ?", [(g,) for g in lru])
+
+        for game_id in expirados:
+            self._expulsado(game_id, 'ttl')
+        for game_id in lru:
+            self._expulsado(game_id, 'lru')
+        return len(expirados) + len(lru)
+
+    def __len__(self):
+        return self._conexion().execute("SELECT COUNT(*) FROM juegos").fetchone()[0]
+
+
+# === PUNTOS DE CONTROL ===
+#
+# Fichero: magia 'CATP', número de juegos (I) y, por juego, largo del
+# game_id (H), largo de su instantánea (I), el game_id en UTF-8 y la
+# instantánea (catapulta.serializacion.juego_a_instantanea).
+
+MAGIA_PUNTO_CONTROL = b'CATP'
+_NUM_JUEGOS = struct.Struct('<I')
+_ENTRADA = struct.Struct('<HI')
+
+
+class PuntoControl:
+    """
+    Guarda en un fichero, cada `intervalo` segundos y desde un hilo, los
+    juegos de un AlmacenMemoria, para recuperarlos (cargar) tras reiniciar
+    el servidor.
+
+    Solo se codifican los juegos cuya versión cambió desde el punto
+    anterior. El fichero se escribe en uno temporal que luego se renombra:
+    un corte a mitad deja intacto el punto anterior.
+    """
+
+    def __init__(self, almacen, ruta, intervalo=INTERVALO_PUNTO_CONTROL):
+        self.almacen = almacen
+        self.ruta = ruta
+        self.intervalo = intervalo
+        self.ultimo = None  # (juegos, bytes, segundos) del último punto guardado
+        self._instantaneas = {}  # game_id -> (versión, instantánea)
+        self._lock = threading.Lock()
+        self._detener = threading.Event()
+        self._hilo = None
+
+    @property
+    def activo(self):
+        return self._hilo is not None
+
+    def guardar(self):
+        """Escribe un punto de control con los juegos actuales. Retorna cuántos"""
+        with self._lock:
+            inicio = time.perf_counter()
+            instantaneas = {}
+            for game_id, juego in self.almacen.elementos():
+                anterior = self._instantaneas.get(game_id)
+                if anterior is not None and anterior[0] == juego['version']:
+                    instantaneas[game_id] = anterior
+                    continue
+                try:
+                    instantaneas[game_id] = (juego['version'], juego_a_instantanea(juego))
+                except (RuntimeError, ValueError, struct.error):
+                    # Una petición lo estaba cambiando: queda el del punto anterior
+                    if anterior is not None:
+                        instantaneas[game_id] = anterior
+            self._instantaneas = instantaneas
+
+            temporal = self.ruta + '.tmp'
+            total = 0
+            with open(temporal, 'wb') as fichero:
+                fichero.write(MAGIA_PUNTO_CONTROL + _NUM_JUEGOS.pack(len(instantaneas)))
+                for game_id, (_, datos) in instantaneas.items():
+                    clave = game_id.encode('utf-8')
+                    fichero.write(_ENTRADA.pack(len(clave), len(datos)) + clave)
+                    fichero.write(datos)
+                    total += len(datos)
+                fichero.flush()
+                os.fsync(fichero.fileno())
+            os.replace(temporal, self.ruta)
+            self.ultimo = (len(instantaneas), total, time.perf_counter() - inicio)
+            return len(instantaneas)
+
+    def cargar(self):
+        """Guarda en el almacén los juegos del último punto de control. Retorna cuántos"""
+        try:
+            with open(self.ruta, 'rb') as fichero:
+                datos = fichero.read()
+        except FileNotFoundError:
+            return 0
+        if datos[:len(MAGIA_PUNTO_CONTROL)] != MAGIA_PUNTO_CONTROL:
+            raise ValueError(f"{self.ruta} no es un punto de control de juegos")
+
+        datos = memoryview(datos)
+        pos = len(MAGIA_PUNTO_CONTROL)
+        (num_juegos,) = _NUM_JUEGOS.unpack_from(datos, pos)
+        pos += _NUM_JUEGOS.size
+        with self._lock:
+            for _ in range(num_juegos):
+                largo_clave, largo_datos = _ENTRADA.unpack_from(datos, pos)
+                pos += _ENTRADA.size
+                game_id = bytes(datos[pos:pos + largo_clave]).decode('utf-8')
+                pos += largo_clave
+                instantanea = bytes(datos[pos:pos + largo_datos])
+                pos += largo_datos
+                juego = juego_desde_bytes(instantanea)
+                self.almacen.guardar(game_id, juego)
+                self._instantaneas[game_id] = (juego['version'], instantanea)
+        return num_juegos
+
+    def iniciar(self):
+        """Lanza el hilo que guarda un punto de control cada `intervalo` segundos"""
+        with self._lock:
+            if self._hilo is not None:
+                return
+            self._detener.clear()
+            self._hilo = threading.Thread(target=self._bucle, daemon=True)
+            self._hilo.start()
+
+    def _bucle(self):
+        while not self._detener.wait(self.intervalo):
+            try:
+                self.guardar()
+            except OSError:
+                pass  # disco lleno o sin permisos: se reintenta en el siguiente
+
+    def detener(self, guardar=True):
+        """Para el hilo y, si `guardar`, escribe un último punto de control"""
+        hilo = self._hilo
+        if hilo is None:
+            return
+        self._detener.set()
+        hilo.join()
+        self._hilo = None
+        if guardar:
+            self.guardar()
+
+
+def crear_almacen(url=None, max_juegos=None, ttl=None, al_expulsar=None):
+    """
+    Crea un almacén a partir de una URL:
+        - 'memoria' (por defecto)
+        - 'sqlite:///ruta/al/fichero.db'
+
+    Si no se indican, la URL, el máximo de juegos y el TTL se leen de las
+    variables de entorno CATAPULTA_ALMACEN, CATAPULTA_MAX_JUEGOS y
+    CATAPULTA_TTL_JUEGOS.
+    """
+    url = url or os.environ.get('CATAPULTA_ALMACEN', 'memoria')
+    max_juegos = max_juegos or int(os.environ.get('CATAPULTA_MAX_JUEGOS', MAX_JUEGOS))
+    ttl = ttl or float(os.environ.get('CATAPULTA_TTL_JUEGOS', TTL_JUEGOS))
+
+    if url == 'memoria':
+        return AlmacenMemoria(max_juegos, ttl, al_expulsar)
+    if url.startswith('sqlite:///'):
+        return AlmacenSQLite(url[len('sqlite:///'):], max_juegos, ttl, al_expulsar)
+    raise ValueError(f"Almacén no reconocido: {url}")
@@ -0,0 +1,165 @@
+"""
+Barrido de parámetros de construcción en paralelo.
+
+Recorre una rejilla de construcciones (longitud de los palos, elasticidad de
+las gomas, número de tapones, calidad del pegamento y número de corchos),
+reparte la rejilla en bloques entre un ProcessPoolExecutor y va entregando,
+según terminan, la tasa de victoria y la oleada esperada de cada construcción.
+Los resultados se pueden guardar en un fichero por columnas.
+
+Ejemplo:
+    python -m catapulta.barrido --partidas 500 --salida barrido.npz
+"""
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+import itertools
+import os
+
+import numpy as np
+
+from catapulta.simulador import Construccion, Simulador
+
+
+# Rejilla por defecto
+LONGITUDES = range(10, 51, 10)
+ELASTICIDADES = range(1, 11)
+TAPONES = range(0, 5)
+CALIDADES = range(1, 11, 3)
+CORCHOS = (10, 20, 40)
+
+# Oleadas superadas para contar una partida como victoria
+OLEADA_OBJETIVO = 3
+
+COLUMNAS = [
+    'longitud_palo', 'elasticidad_goma', 'tapones', 'calidad_pegamento', 'corchos',
+    'partidas', 'tasa_victoria', 'oleada_esperada', 'disparos_por_baja', 'tasa_acierto',
+]
+
+
+def generar_construcciones(longitudes=LONGITUDES, elasticidades=ELASTICIDADES, tapones=TAPONES,
+                           calidades=CALIDADES, corchos=CORCHOS, n_palos=2, n_gomas=1):
+    """Genera las construcciones de la rejilla (todas las combinaciones)"""
+    for longitud, elasticidad, n_tapones, calidad, n_corchos in itertools.product(
+            longitudes, elasticidades, tapones, calidades, corchos):
+        yield Construccion(palos=[longitud] * n_palos, gomas=[elasticidad] * n_gomas,
+                           tapones=n_tapones, corchos=n_corchos, pegamento=calidad)
+
+
+def resultado_construccion(construccion, estadisticas, oleada_objetivo=OLEADA_OBJETIVO):
+    """Fila de resultados (diccionario con COLUMNAS) de una construcción"""
+    victorias = sum(n for oleadas, n in estadisticas.distribucion_oleadas.items()
+                    if oleadas >= oleada_objetivo)
+    return {
+        'longitud_palo': construccion.palos[0],
+        'elasticidad_goma': construccion.gomas[0],
+        'tapones': construccion.tapones,
+        'calidad_pegamento': construccion.pegamento,
+        'corchos': construccion.corchos,
+        'partidas': estadisticas.partidas,
+        'tasa_victoria': victorias / estadisticas.partidas if estadisticas.partidas else 0,
+        # Se pierde en la oleada siguiente a la última superada
+        'oleada_esperada': estadisticas.media_oleadas_superadas + 1,
+        'disparos_por_baja': estadisticas.disparos_por_baja,
+        'tasa_acierto': estadisticas.tasa_acierto,
+    }
+
+
+def _evaluar_bloque(bloque, n_partidas, politica, motor, semilla, opciones):
+    """Evalúa un bloque de construcciones en un proceso del pool"""
+    if motor == 'vectorial':
+        from catapulta.kernel_vectorial import simular_lote
+        lista = simular_lote(bloque, n_partidas, politica, semilla=semilla, **opciones)
+    else:
+        simulador = Simulador(politica, semilla=semilla, **opciones)
+        lista = [simulador.simular(construccion, n_partidas) for construccion in bloque]
+    return [(construccion, estadisticas) for construccion, estadisticas in zip(bloque, lista)]
+
+
+def barrer(construcciones, n_partidas=200, politica='mas_cercano', motor='vectorial',
+           trabajadores=None, tamano_bloque=64, semilla=None, **opciones):
+    """
+    Evalúa las construcciones en paralelo y entrega (construccion, estadisticas)
+    según terminan los bloques (no en el orden de entrada).
+
+    Parámetros:
+        motor: 'vectorial' (kernel_vectorial, un lote por bloque) u 'objetos' (Simulador)
+        trabajadores: procesos del pool (por defecto, uno por núcleo)
+        tamano_bloque: construcciones por unidad de trabajo
+        semilla: semilla base; cada bloque recibe una semilla independiente
+        opciones: se pasan al simulador (reparar, max_oleadas, ...)
+    """
+    trabajadores = trabajadores or os.cpu_count() or 1
+    semillas = np.random.SeedSequence(semilla)
+    bloques = _en_bloques(construcciones, tamano_bloque)
+
+    with ProcessPoolExecutor(max_workers=trabajadores) as pool:
+        pendientes = set()
+        # Como mucho dos bloques por proceso en vuelo, para no materializar la rejilla entera
+        for bloque in itertools.islice(bloques, 2 * trabajadores):
+            pendientes.add(_enviar(pool, bloque, n_partidas, politica, motor, semillas, opciones))
+
+        while pendientes:
+            terminados, pendientes = wait(pendientes, return_when=FIRST_COMPLETED)
+            for futuro in terminados:
+                siguiente = next(bloques, None)
+                if siguiente is not None:
+                    pendientes.add(_enviar(pool, siguiente, n_partidas, politica, motor, semillas, opciones))
+                yield from futuro.result()
+
+
+def _enviar(pool, bloque, n_partidas, politica, motor, semillas, opciones):
+    semilla_bloque = int(semillas.spawn(1)[0].generate_state(1)[0])
+    return pool.submit(_evaluar_bloque, bloque, n_partidas, politica, motor, semilla_bloque, opciones)
+
+
+def _en_bloques(iterable, tamano):
+    iterador = iter(iterable)
+    while True:
+        bloque = list(itertools.islice(iterador, tamano))
+        if not bloque:
+            return
+        yield bloque
+
+
+def guardar_columnas(filas, ruta):
+    """
+    Guarda filas de resultado_construccion() en un fichero por columnas:
+    Parquet si la ruta termina en .parquet (requiere pyarrow), o .npz de NumPy.
+    """
+    columnas = {nombre: [fila[nombre] for fila in filas] for nombre in COLUMNAS}
+    if ruta.endswith('.parquet'):
+        import pyarrow
+        import pyarrow.parquet
+        pyarrow.parquet.write_table(pyarrow.table(columnas), ruta)
+    else:
+        np.savez_compressed(ruta, **{nombre: np.asarray(valores) for nombre, valores in columnas.items()})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Barrido de construcciones de catapulta")
+    parser.add_argument('--partidas', type=int, default=200, help="Partidas por construcción")
+    parser.add_argument('--politica', default='mas_cercano')
+    parser.add_argument('--motor', choices=('vectorial', 'objetos'), default='vectorial')
+    parser.add_argument('--trabajadores', type=int, default=None)
+    parser.add_argument('--bloque', type=int, default=64, help="Construcciones por unidad de trabajo")
+    parser.add_argument('--objetivo', type=int, default=OLEADA_OBJETIVO,
+                        help="Oleadas superadas para contar una victoria")
+    parser.add_argument('--semilla', type=int, default=None)
+    parser.add_argument('--salida', default='barrido.npz', help="Fichero .npz o .parquet")
+    args = parser.parse_args()
+
+    filas = []
+    for construccion, estadisticas in barrer(generar_construcciones(), args.partidas, args.politica,
+                                             args.motor, args.trabajadores, args.bloque, args.semilla):
+        fila = resultado_construccion(construccion, estadisticas, args.objetivo)
+        filas.append(fila)
+        print(f"{construccion}: victoria {fila['tasa_victoria']:.1%}, "
+              f"oleada esperada {fila['oleada_esperada']:.2f}")
+
+    guardar_columnas(filas, args.salida)
+    print(f"\n✅ {len(filas)} construcciones guardadas en {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
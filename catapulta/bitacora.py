@@ -0,0 +1,444 @@
+"""
+Bitácora de acciones por juego y reproducción determinista.
+
+Cada acción que cambia un juego (las de catapulta.acciones) se añade a la
+bitácora del juego con sus datos y las tiradas de su generador aleatorio.
+Para rehacer el juego basta con partir de su última instantánea
+(serializacion.juego_a_instantanea), que se escribe cada `instantanea_cada`
+acciones, y volver a aplicar las acciones posteriores dando a cada una sus
+tiradas grabadas: no hace falta la semilla, y si el código ya no pide las
+mismas tiradas (o una acción se salta), la reproducción lo detecta.
+
+Sirve para recuperar los juegos tras una caída del servidor y para
+reproducir fuera de línea, paso a paso, la partida de un jugador:
+
+    for entrada, juego in pasos('bitacoras/0123abcd.bitacora'):
+        print(entrada['v'], entrada['a'], juego['catapulta'])
+
+Formato del fichero (solo se añade al final): registros con una cabecera
+tipo (B), largo (I) y versión del juego tras el registro (q), y después:
+
+    - ACCION: JSON {"a": acción, "d": datos, "r": tiradas}
+    - INSTANTANEA: una instantánea binaria del juego
+
+Si el proceso cae a mitad de una escritura, el último registro queda
+incompleto y la lectura se detiene en él.
+"""
+
+import atexit
+import json
+import logging
+import os
+import re
+import struct
+import threading
+import time
+
+from catapulta import acciones
+from catapulta.serializacion import juego_a_instantanea, juego_desde_instantanea
+
+
+ACCION = 1
+INSTANTANEA = 2
+
+_CABECERA = struct.Struct('<BIq')
+
+# Valores por defecto
+INSTANTANEA_CADA = 100  # acciones entre dos instantáneas de un juego
+TAMANO_LOTE = 256  # registros pendientes (de todos los juegos) que fuerzan una escritura
+MAX_ESPERA = 1.0  # segundos como máximo que un registro espera en memoria
+
+_GAME_ID_VALIDO = re.compile(r'^[0-9A-Za-z_-]{1,64}$')
+
+# Errores de una bitácora dañada o que el código ya no reproduce igual
+_ERRORES_REPRODUCCION = (ValueError, KeyError, struct.error)
+
+_log = logging.getLogger(__name__)
+
+
+# === GENERADORES ===
+
+class GeneradorGrabador:
+    """
+    Envuelve el random.Random de un juego y anota cada tirada: el valor de
+    randint y random, el índice elegido por choice y la lista de índices
+    elegidos por choices.
+    """
+
+    def __init__(self, rng):
+        self.rng = rng
+        self.tiradas = []
+
+    def randint(self, a, b):
+        valor = self.rng.randint(a, b)
+        self.tiradas.append(valor)
+        return valor
+
+    def choice(self, secuencia):
+        # choice(range(n)) consume el generador igual que choice(secuencia)
+        indice = self.rng.choice(range(len(secuencia)))
+        self.tiradas.append(indice)
+        return secuencia[indice]
+
+    def choices(self, secuencia, k=1):
+        indices = self.rng.choices(range(len(secuencia)), k=k)
+        self.tiradas.append(indices)
+        return [secuencia[indice] for indice in indices]
+
+    def random(self):
+        valor = self.rng.random()
+        self.tiradas.append(valor)
+        return valor
+
+    def soltar(self, juego):
+        """Devuelve al juego su generador original"""
+        _usar_generador(juego, self.rng)
+
+
+class GeneradorReproductor:
+    """Devuelve, en orden, las tiradas grabadas por un GeneradorGrabador"""
+
+    def __init__(self, tiradas):
+        self.tiradas = tiradas
+        self.posicion = 0
+
+    def _siguiente(self):
+        if self.posicion >= len(self.tiradas):
+            raise ValueError("La reproducción pide más tiradas de las grabadas")
+        valor = self.tiradas[self.posicion]
+        self.posicion += 1
+        return valor
+
+    @property
+    def pendientes(self):
+        return len(self.tiradas) - self.posicion
+
+    def randint(self, a, b):
+        valor = self._siguiente()
+        if not a <= valor <= b:
+            raise ValueError(f"Tirada grabada {valor} fuera de randint({a}, {b})")
+        return valor
+
+    def choice(self, secuencia):
+        indice = self._siguiente()
+        if not 0 <= indice < len(secuencia):
+            raise ValueError(f"Tirada grabada {indice} fuera de choice() de {len(secuencia)} elementos")
+        return secuencia[indice]
+
+    def choices(self, secuencia, k=1):
+        indices = self._siguiente()
+        if not isinstance(indices, list) or len(indices) != k \
+                or not all(0 <= indice < len(secuencia) for indice in indices):
+            raise ValueError(f"Tiradas grabadas incompatibles con choices() de {k} entre {len(secuencia)} elementos")
+        return [secuencia[indice] for indice in indices]
+
+    def random(self):
+        return self._siguiente()
+
+
+def _usar_generador(juego, rng):
+    juego['rng'] = rng
+    if juego['catapulta']:
+        juego['catapulta'].rng = rng
+
+
+# === ESCRITURA ===
+
+class BitacoraJuegos:
+    """
+    Bitácoras de los juegos de un servidor, un fichero por juego en
+    `directorio`.
+
+    Los registros se acumulan en memoria y se escriben en lote: cuando hay
+    `tamano_lote` pendientes, cuando el más antiguo lleva `max_espera`
+    segundos (lo comprueba el hilo de iniciar() o el siguiente registro), al
+    llamar a vaciar() y al terminar el programa.
+
+    Uso con una acción:
+        grabador = bitacora.preparar(game_id, juego)
+        respuesta, cambio = acciones.ACCIONES[nombre](juego, datos)
+        grabador.soltar(juego)
+        if cambio:
+            juego['version'] += 1
+            bitacora.registrar(game_id, nombre, datos, juego, grabador.tiradas)
+    """
+
+    def __init__(self, directorio, instantanea_cada=INSTANTANEA_CADA, tamano_lote=TAMANO_LOTE,
+                 max_espera=MAX_ESPERA):
+        self.directorio = directorio
+        self.instantanea_cada = instantanea_cada
+        self.tamano_lote = tamano_lote
+        self.max_espera = max_espera
+        os.makedirs(directorio, exist_ok=True)
+
+        self._desde_instantanea = {}  # game_id -> acciones desde su última instantánea
+        self._pendientes = {}  # game_id -> registros sin escribir
+        self._num_pendientes = 0
+        self._primera_pendiente = None  # instante del registro pendiente más antiguo
+        self._lock = threading.Lock()
+        self._detener = threading.Event()
+        self._hilo = None
+        atexit.register(self.cerrar)
+
+    def ruta(self, game_id):
+        if not _GAME_ID_VALIDO.match(game_id):
+            raise ValueError(f"Identificador de juego inválido: {game_id!r}")
+        return os.path.join(self.directorio, game_id + '.bitacora')
+
+    def preparar(self, game_id, juego):
+        """
+        Antes de una acción: si el juego aún no tiene bitácora en este
+        proceso, la empieza con una instantánea de su estado actual. Envuelve
+        su generador para grabar las tiradas y retorna el grabador.
+        """
+        if game_id not in self._desde_instantanea:
+            self.instantanea(game_id, juego)
+        grabador = GeneradorGrabador(juego['rng'])
+        _usar_generador(juego, grabador)
+        return grabador
+
+    def registrar(self, game_id, nombre, datos, juego, tiradas):
+        """Añade una acción ya aplicada (el juego ya tiene su versión nueva)"""
+        if game_id not in self._desde_instantanea:
+            return  # el juego se expulsó (olvidar) durante la acción
+        carga = json.dumps({'a': nombre, 'd': datos, 'r': tiradas},
+                           separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+        self._anadir(game_id, ACCION, juego['version'], carga)
+        self._desde_instantanea[game_id] += 1
+        if self._desde_instantanea[game_id] >= self.instantanea_cada:
+            self.instantanea(game_id, juego)
+
+    def instantanea(self, game_id, juego):
+        """Añade una instantánea del juego (la reproducción empieza en la última)"""
+        self._anadir(game_id, INSTANTANEA, juego['version'], juego_a_instantanea(juego))
+        self._desde_instantanea[game_id] = 0
+
+    def _anadir(self, game_id, tipo, version, carga):
+        registro = _CABECERA.pack(tipo, len(carga), version) + carga
+        with self._lock:
+            self._pendientes.setdefault(game_id, []).append(registro)
+            self._num_pendientes += 1
+            if self._primera_pendiente is None:
+                self._primera_pendiente = time.monotonic()
+            if self._num_pendientes >= self.tamano_lote \
+                    or time.monotonic() - self._primera_pendiente >= self.max_espera:
+                self._volcar()
+
+    def vaciar(self):
+        """Escribe todos los registros pendientes"""
+        with self._lock:
+            self._volcar()
+
+    def _volcar(self):
+        # Cada juego sale de los pendientes en cuanto se escribe: si falla
+        # otro (OSError), sus registros se reintentan y los escritos no se
+        # repiten. Un fichero con una escritura a medias vuelve a su tamaño.
+        error = None
+        for game_id in list(self._pendientes):
+            registros = self._pendientes[game_id]
+            try:
+                with open(self.ruta(game_id), 'ab') as fichero:
+                    inicio = fichero.tell()
+                    try:
+                        fichero.write(b''.join(registros))
+                        fichero.flush()
+                    except OSError:
+                        fichero.truncate(inicio)
+                        raise
+            except OSError as e:
+                error = error or e
+                continue
+            del self._pendientes[game_id]
+            self._num_pendientes -= len(registros)
+        if not self._pendientes:
+            self._primera_pendiente = None
+        if error is not None:
+            raise error
+
+    def olvidar(self, game_id):
+        """
+        Borra la bitácora de un juego que ya no existe (expulsado del
+        almacén): sus registros pendientes, su fichero y su cuenta de
+        acciones. Así solo se recuperan los juegos perdidos en una caída.
+        """
+        with self._lock:
+            registros = self._pendientes.pop(game_id, ())
+            self._num_pendientes -= len(registros)
+            if not self._pendientes:
+                self._primera_pendiente = None
+            self._desde_instantanea.pop(game_id, None)
+            try:
+                os.remove(self.ruta(game_id))
+            except FileNotFoundError:
+                pass
+
+    def recuperar(self, game_id):
+        """
+        Rehace el juego a partir de su bitácora; None si no tiene. Si está
+        dañada (o el código ya no la reproduce igual), lo rehace hasta la
+        última acción que se reproduce bien; si ni la instantánea sirve,
+        aparta el fichero (.danada) y retorna None, y el juego empieza de nuevo.
+        """
+        self.vaciar()
+        ruta = self.ruta(game_id)
+        try:
+            juego = reproducir(ruta)
+        except FileNotFoundError:
+            return None
+        except _ERRORES_REPRODUCCION as error:
+            _log.warning("La bitácora de %s no se reproduce entera: %s", game_id, error)
+            juego = _ultimo_estado_valido(ruta)
+            if juego is None:
+                _log.warning("La bitácora de %s no tiene ningún estado válido; empieza un juego nuevo", game_id)
+                os.replace(ruta, ruta + '.danada')
+            else:
+                _log.warning("Juego %s recuperado hasta la versión %d", game_id, juego['version'])
+        # Lo siguiente que se añada empieza desde una instantánea nueva
+        self._desde_instantanea.pop(game_id, None)
+        return juego
+
+    def iniciar(self):
+        """Lanza el hilo que escribe los registros que llevan `max_espera` segundos"""
+        with self._lock:
+            if self._hilo is not None:
+                return
+            self._detener.clear()
+            self._hilo = threading.Thread(target=self._bucle, daemon=True)
+            self._hilo.start()
+
+    @property
+    def activo(self):
+        return self._hilo is not None
+
+    def _bucle(self):
+        while not self._detener.wait(self.max_espera):
+            try:
+                self.vaciar()
+            except OSError:
+                pass  # se reintenta en la siguiente vuelta (los registros siguen pendientes)
+
+    def cerrar(self):
+        """Para el hilo y escribe los registros pendientes"""
+        hilo = self._hilo
+        if hilo is not None:
+            self._detener.set()
+            hilo.join()
+            self._hilo = None
+        self.vaciar()
+
+
+# === LECTURA Y REPRODUCCIÓN ===
+
+def leer_registros(ruta):
+    """
+    Recorre los registros de una bitácora: (tipo, versión, carga). Se
+    detiene en un registro incompleto (escritura cortada por una caída).
+    """
+    with open(ruta, 'rb') as fichero:
+        while True:
+            cabecera = fichero.read(_CABECERA.size)
+            if len(cabecera) < _CABECERA.size:
+                return
+            tipo, largo, version = _CABECERA.unpack(cabecera)
+            carga = fichero.read(largo)
+            if len(carga) < largo:
+                return
+            yield tipo, version, carga
+
+
+def _ultima_instantanea(ruta, hasta_version):
+    """Posición de la última instantánea con versión <= hasta_version (sin leer las cargas)"""
+    posicion = None
+    with open(ruta, 'rb') as fichero:
+        while True:
+            inicio = fichero.tell()
+            cabecera = fichero.read(_CABECERA.size)
+            if len(cabecera) < _CABECERA.size:
+                break
+            tipo, largo, version = _CABECERA.unpack(cabecera)
+            if fichero.seek(largo, os.SEEK_CUR) > os.fstat(fichero.fileno()).st_size:
+                break
+            if tipo == INSTANTANEA and (hasta_version is None or version <= hasta_version):
+                posicion = inicio
+    return posicion
+
+
+def aplicar(juego, entrada, version):
+    """Vuelve a aplicar una acción de la bitácora con sus tiradas grabadas"""
+    if version != juego['version'] + 1:
+        raise ValueError(f"La bitácora salta de la versión {juego['version']} a la {version}")
+    rng = GeneradorReproductor(entrada['r'])
+    _usar_generador(juego, rng)
+    acciones.ACCIONES[entrada['a']](juego, entrada['d'])
+    juego['version'] = version
+    if rng.pendientes:
+        raise ValueError(f"La acción '{entrada['a']}' (versión {version}) usó menos tiradas de las grabadas")
+
+
+def pasos(ruta, hasta_version=None):
+    """
+    Reproduce una bitácora desde su última instantánea (con versión <=
+    hasta_version) y retorna, tras cada acción, (entrada, juego); el juego
+    es el mismo diccionario, modificado en cada paso.
+    """
+    posicion = _ultima_instantanea(ruta, hasta_version)
+    if posicion is None:
+        raise ValueError(f"{ruta} no tiene ninguna instantánea de la que partir")
+
+    with open(ruta, 'rb') as fichero:
+        fichero.seek(posicion)
+        tipo, largo, version = _CABECERA.unpack(fichero.read(_CABECERA.size))
+        juego = juego_desde_instantanea(fichero.read(largo))
+        while True:
+            cabecera = fichero.read(_CABECERA.size)
+            if len(cabecera) < _CABECERA.size:
+                return
+            tipo, largo, version = _CABECERA.unpack(cabecera)
+            carga = fichero.read(largo)
+            if len(carga) < largo or (hasta_version is not None and version > hasta_version):
+                return
+            if tipo == INSTANTANEA:
+                # Solo puede ser una posterior a la elegida: el juego se
+                # retomó tras una caída a partir de un estado sin bitácora
+                juego = juego_desde_instantanea(carga)
+                continue
+            entrada = json.loads(carga)
+            aplicar(juego, entrada, version)
+            yield entrada, juego
+
+
+def _ultimo_estado_valido(ruta):
+    """Rehace el juego hasta la última versión que se reproduce sin error; None si ninguna"""
+    version = None
+    try:
+        posicion = _ultima_instantanea(ruta, None)
+        if posicion is None:
+            return None
+        with open(ruta, 'rb') as fichero:
+            fichero.seek(posicion)
+            _, _, version = _CABECERA.unpack(fichero.read(_CABECERA.size))
+        for _, juego in pasos(ruta):
+            version = juego['version']
+    except _ERRORES_REPRODUCCION:
+        pass
+    try:
+        return reproducir(ruta, version)
+    except _ERRORES_REPRODUCCION:
+        return None
+
+
+def reproducir(ruta, hasta_version=None):
+    """Rehace el juego de una bitácora (hasta la versión indicada, o el último estado)"""
+    posicion = _ultima_instantanea(ruta, hasta_version)
+    if posicion is None:
+        raise ValueError(f"{ruta} no tiene ninguna instantánea de la que partir")
+    juego = None
+    for _, juego in pasos(ruta, hasta_version):
+        pass
+    if juego is None:
+        # Ninguna acción tras la instantánea
+        with open(ruta, 'rb') as fichero:
+            fichero.seek(posicion)
+            _, largo, _ = _CABECERA.unpack(fichero.read(_CABECERA.size))
+            juego = juego_desde_instantanea(fichero.read(largo))
+    return juego
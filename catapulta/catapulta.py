@@ -2,9 +2,13 @@
 Módulo principal de la catapulta
 """
 
+from collections import namedtuple
+import numbers
 import random
 from enum import Enum
-from catapulta.materiales import Palo, Goma, Tapon, Corcho, Pegamento
+from catapulta.materiales import Palo, Goma, Tapon, Corcho, Pegamento, Existencias, ListaMateriales, Municion
+from catapulta import eventos
+from catapulta.historial import HistorialDisparos
 
 
 class EstadoCatapulta(Enum):
@@ -16,6 +20,10 @@ class EstadoCatapulta(Enum):
     EN_MANTENIMIENTO = "En mantenimiento"
 
 
+# Resultado de Catapulta.disparar_area()
+ResultadoArea = namedtuple('ResultadoArea', ['acierto', 'afectados', 'eliminados'])
+
+
 class Catapulta:
     """
     Clase que representa una catapulta construida por el usuario.
@@ -44,19 +52,39 @@ class Catapulta:
     # Constantes de clase
     DURABILIDAD_MAXIMA = 100
     DESGASTE_POR_DISPARO = 5
+    CAPACIDAD_HISTORIAL = 1000
+    RADIO_AREA = 3  # Metros alrededor del impacto de un disparo de área
+    
+    # Si es True, cada lectura de una característica recalcula los agregados
+    # desde cero y comprueba que coinciden con los acumulados (para pruebas)
+    MODO_VERIFICACION = False
     
-    def __init__(self, nombre="Mi Catapulta"):
+    def __init__(self, nombre="Mi Catapulta", sumidero=None, rng=None):
         # === ESTADO DE LA CATAPULTA ===
         self.nombre = nombre
+        
+        # Sumidero de eventos (None = el sumidero por defecto de catapulta.eventos)
+        self.sumidero = sumidero
+        
+        # Generador aleatorio del juego (random.Random); None = módulo random global
+        self.rng = rng if rng is not None else random
         self._estado = EstadoCatapulta.EN_CONSTRUCCION
         
-        # Componentes (materiales)
-        self.palos = []
-        self.gomas = []
-        self.tapones = []
-        self.corchos = []
+        # Componentes (materiales): palos y gomas como arrays de su parámetro,
+        # tapones y corchos (todos iguales) como contadores
+        self.palos = ListaMateriales(Palo)
+        self.gomas = ListaMateriales(Goma)
+        self.tapones = Existencias(Tapon())
+        self.corchos = Municion(Corcho())
         self.pegamento = None
         
+        # Agregados acumulados de los componentes (lecturas en O(1))
+        self._suma_longitud = 0
+        self._suma_potencia_base = 0
+        self._suma_elasticidad = 0
+        self._suma_impulso = 0
+        self._suma_estabilidad_tapones = 0
+        
         # Estado interno
         self._durabilidad = 0
         self._durabilidad_maxima = self.DURABILIDAD_MAXIMA
@@ -64,8 +92,9 @@ class Catapulta:
         self.nivel_desgaste = 0
         self.construida = False
         
-        # Historial
-        self.historial_disparos = []
+        # Historial (últimos CAPACIDAD_HISTORIAL disparos; se puede sustituir
+        # por un HistorialDisparos con registro en disco)
+        self.historial_disparos = HistorialDisparos(self.CAPACIDAD_HISTORIAL)
         self.enemigos_eliminados = 0
     
     # === PROPIEDADES (CARACTERÍSTICAS) ===
@@ -90,9 +119,11 @@ class Catapulta:
         """Calcula la potencia total de la catapulta"""
         if not self.construida:
             return 0
+        if self.MODO_VERIFICACION:
+            self.verificar_agregados()
         
-        potencia_base = sum(palo.potencia_base for palo in self.palos)
-        impulso = sum(goma.impulso for goma in self.gomas)
+        potencia_base = self._suma_potencia_base
+        impulso = self._suma_impulso
         bonus_pegamento = self.pegamento.calidad * 2 if self.pegamento else 0
         
         # La durabilidad afecta la potencia
@@ -105,9 +136,11 @@ class Catapulta:
         """Calcula el alcance máximo en metros"""
         if not self.construida:
             return 0
+        if self.MODO_VERIFICACION:
+            self.verificar_agregados()
         
-        longitud_total = sum(palo.longitud for palo in self.palos)
-        elasticidad_total = sum(goma.elasticidad for goma in self.gomas)
+        longitud_total = self._suma_longitud
+        elasticidad_total = self._suma_elasticidad
         
         alcance_base = (longitud_total * 0.5) + (elasticidad_total * 3)
         factor_durabilidad = self.durabilidad_porcentaje / 100
@@ -132,70 +165,174 @@ class Catapulta:
         """Calcula la estabilidad estructural"""
         if not self.construida:
             return 0
+        if self.MODO_VERIFICACION:
+            self.verificar_agregados()
         
-        estabilidad_base = sum(tapon.estabilidad for tapon in self.tapones)
+        estabilidad_base = self._suma_estabilidad_tapones
         calidad_union = self.pegamento.union if self.pegamento else 0
         
         return estabilidad_base + calidad_union
     
+    # === AGREGADOS DE COMPONENTES ===
+    
+    def recalcular_agregados(self):
+        """Calcula desde cero los agregados de los componentes"""
+        return {
+            '_suma_longitud': sum(palo.longitud for palo in self.palos),
+            '_suma_potencia_base': sum(palo.potencia_base for palo in self.palos),
+            '_suma_elasticidad': sum(goma.elasticidad for goma in self.gomas),
+            '_suma_impulso': sum(goma.impulso for goma in self.gomas),
+            # Los tapones son todos iguales (Existencias): no hace falta recorrerlos
+            '_suma_estabilidad_tapones': len(self.tapones) * self.tapones.ejemplar.estabilidad,
+        }
+    
+    def verificar_agregados(self):
+        """
+        Comprueba que los agregados acumulados coinciden con los recalculados.
+        Lanza AssertionError indicando las diferencias si no coinciden.
+        """
+        esperados = self.recalcular_agregados()
+        diferencias = {
+            nombre: (getattr(self, nombre), valor)
+            for nombre, valor in esperados.items()
+            if getattr(self, nombre) != valor
+        }
+        if diferencias:
+            raise AssertionError(f"Agregados inconsistentes en '{self.nombre}': {diferencias}")
+        return True
+    
+    # === EVENTOS ===
+    
+    def _escuchando(self):
+        """El sumidero de la catapulta (o el por defecto) si está activo; None si no"""
+        sumidero = self.sumidero or eventos.obtener_sumidero()
+        return sumidero if sumidero.activo else None
+    
+    def _emitir(self, tipo, **campos):
+        """Emite un evento al sumidero de la catapulta (o al sumidero por defecto)"""
+        sumidero = self._escuchando()
+        if sumidero is not None:
+            sumidero.emitir(tipo, **campos)
+    
     # === COMPORTAMIENTO (MÉTODOS DE CONSTRUCCIÓN) ===
     
     def agregar_palo(self, longitud):
         """Agrega un palo a la catapulta"""
         if self._estado != EstadoCatapulta.EN_CONSTRUCCION:
-            print(f"⚠ No se pueden agregar componentes. Estado: {self._estado.value}")
+            self._emitir('componente_rechazado', estado=self._estado.value)
+            return False
+        
+        if not ListaMateriales.admite(longitud):
+            self._emitir('longitud_invalida', longitud=longitud)
             return False
         
         palo = Palo(longitud)
         self.palos.append(palo)
-        print(f"✓ Palo agregado: {palo}")
+        self._suma_longitud += palo.longitud
+        self._suma_potencia_base += palo.potencia_base
+        self._emitir('palo_agregado', longitud=longitud, material=palo)
         return True
     
     def agregar_goma(self, elasticidad):
         """Agrega una goma elástica"""
         if self._estado != EstadoCatapulta.EN_CONSTRUCCION:
-            print(f"⚠ No se pueden agregar componentes. Estado: {self._estado.value}")
+            self._emitir('componente_rechazado', estado=self._estado.value)
             return False
         
-        if elasticidad < 1 or elasticidad > 10:
-            print("⚠ La elasticidad debe estar entre 1 y 10")
+        if not ListaMateriales.admite(elasticidad) or elasticidad < 1 or elasticidad > 10:
+            self._emitir('elasticidad_invalida', elasticidad=elasticidad)
             return False
         
         goma = Goma(elasticidad)
         self.gomas.append(goma)
-        print(f"✓ Goma agregada: {goma}")
+        self._suma_elasticidad += goma.elasticidad
+        self._suma_impulso += goma.impulso
+        self._emitir('goma_agregada', elasticidad=elasticidad, material=goma)
         return True
     
     def agregar_tapon(self):
         """Agrega un tapón para estabilidad"""
         if self._estado != EstadoCatapulta.EN_CONSTRUCCION:
-            print(f"⚠ No se pueden agregar componentes. Estado: {self._estado.value}")
+            self._emitir('componente_rechazado', estado=self._estado.value)
             return False
         
-        tapon = Tapon()
+        tapon = self.tapones.ejemplar
         self.tapones.append(tapon)
-        print(f"✓ Tapón agregado: {tapon}")
+        self._suma_estabilidad_tapones += tapon.estabilidad
+        self._emitir('tapon_agregado', material=tapon)
         return True
     
     def agregar_corcho(self):
         """Agrega munición (corcho)"""
-        corcho = Corcho()
+        corcho = self.corchos.ejemplar
         self.corchos.append(corcho)
-        print(f"✓ Corcho agregado: {corcho}")
+        self._emitir('corcho_agregado', material=corcho)
         return True
     
     def agregar_pegamento(self, calidad):
         """Agrega pegamento para unir las piezas"""
         if self._estado != EstadoCatapulta.EN_CONSTRUCCION:
-            print(f"⚠ No se pueden agregar componentes. Estado: {self._estado.value}")
+            self._emitir('componente_rechazado', estado=self._estado.value)
             return False
         
         if calidad < 1 or calidad > 10:
-            print("⚠ La calidad debe estar entre 1 y 10")
+            self._emitir('calidad_invalida', calidad=calidad)
             return False
         
         self.pegamento = Pegamento(calidad)
-        print(f"✓ Pegamento agregado: {self.pegamento}")
+        self._emitir('pegamento_agregado', calidad=calidad, material=self.pegamento)
+        return True
+    
+    def agregar_materiales(self, palos=(), gomas=(), tapones=0, corchos=0, pegamento=None):
+        """
+        Agrega de una vez una lista de materiales: longitudes de los palos,
+        elasticidades de las gomas, número de tapones y de corchos, y calidad
+        del pegamento. Se valida todo (tipos incluidos) antes de agregar nada,
+        así que o se agregan todos o ninguno, y se emite un único evento.
+        Retorna True si se agregaron.
+        """
+        palos = list(palos)
+        gomas = list(gomas)
+        
+        # Los corchos (munición) se pueden agregar en cualquier estado
+        if (palos or gomas or tapones or pegamento is not None) and \
+                self._estado != EstadoCatapulta.EN_CONSTRUCCION:
+            self._emitir('componente_rechazado', estado=self._estado.value)
+            return False
+        
+        errores = []
+        if not all(ListaMateriales.admite(longitud) for longitud in palos):
+            errores.append("Las longitudes de los palos deben ser números")
+        if not all(ListaMateriales.admite(elasticidad) and 1 <= elasticidad <= 10 for elasticidad in gomas):
+            errores.append("La elasticidad debe estar entre 1 y 10")
+        if pegamento is not None and not (ListaMateriales.admite(pegamento) and 1 <= pegamento <= 10):
+            errores.append("La calidad debe estar entre 1 y 10")
+        if not isinstance(tapones, numbers.Integral) or not isinstance(corchos, numbers.Integral):
+            errores.append("Las cantidades deben ser números enteros")
+        elif tapones < 0 or corchos < 0:
+            errores.append("Las cantidades no pueden ser negativas")
+        if errores:
+            self._emitir('materiales_invalidos', errores=errores)
+            return False
+        
+        for longitud in palos:
+            palo = Palo(longitud)
+            self.palos.append(palo)
+            self._suma_longitud += palo.longitud
+            self._suma_potencia_base += palo.potencia_base
+        for elasticidad in gomas:
+            goma = Goma(elasticidad)
+            self.gomas.append(goma)
+            self._suma_elasticidad += goma.elasticidad
+            self._suma_impulso += goma.impulso
+        self.tapones.agregar(tapones)
+        self._suma_estabilidad_tapones += tapones * self.tapones.ejemplar.estabilidad
+        self.corchos.agregar(corchos)
+        if pegamento is not None:
+            self.pegamento = Pegamento(pegamento)
+        
+        self._emitir('materiales_agregados', palos=len(palos), gomas=len(gomas),
+                     tapones=tapones, corchos=corchos, pegamento=pegamento)
         return True
     
     # === COMPORTAMIENTO (MÉTODOS PRINCIPALES) ===
@@ -205,10 +342,10 @@ class Catapulta:
         Intenta construir la catapulta con los materiales disponibles.
         Cambia el estado de EN_CONSTRUCCION a LISTA si tiene éxito.
         """
-        print("\n🔨 Intentando construir la catapulta...")
+        self._emitir('construccion_iniciada')
         
         if self._estado != EstadoCatapulta.EN_CONSTRUCCION:
-            print(f"⚠ La catapulta ya está en estado: {self._estado.value}")
+            self._emitir('construccion_repetida', estado=self._estado.value)
             return False
         
         # Validar requisitos mínimos
@@ -223,9 +360,7 @@ class Catapulta:
             errores.append("Se necesita al menos 1 corcho como munición")
         
         if errores:
-            print("❌ No se puede construir la catapulta:")
-            for error in errores:
-                print(f"   - {error}")
+            self._emitir('construccion_invalida', errores=errores)
             return False
         
         # Calcular probabilidad de éxito basada en materiales
@@ -234,7 +369,7 @@ class Catapulta:
         probabilidad += self.pegamento.calidad * 3  # Pegamento de calidad ayuda
         probabilidad = min(95, probabilidad)  # Máximo 95%
         
-        if random.randint(1, 100) <= probabilidad:
+        if self.rng.randint(1, 100) <= probabilidad:
             self.construida = True
             self._estado = EstadoCatapulta.LISTA
             
@@ -246,12 +381,10 @@ class Catapulta:
             self._durabilidad = min(self.DURABILIDAD_MAXIMA, resistencia_materiales + (len(self.tapones) * 10))
             self._durabilidad_maxima = self._durabilidad
             
-            print(f"✅ ¡Catapulta '{self.nombre}' construida con éxito!")
-            self.mostrar_estadisticas()
+            self._emitir('construccion_exitosa', nombre=self.nombre, catapulta=self)
             return True
         else:
-            print(f"❌ La construcción falló. Probabilidad de éxito: {probabilidad}%")
-            print("   Intenta agregar más tapones o mejor pegamento.")
+            self._emitir('construccion_fallida', probabilidad=probabilidad)
             return False
     
     def disparar(self, enemigo):
@@ -259,97 +392,150 @@ class Catapulta:
         Dispara un proyectil hacia un enemigo.
         Modifica el estado de durabilidad y desgaste.
         """
-        if self._estado == EstadoCatapulta.DESTRUIDA:
-            print("❌ La catapulta está destruida. Necesita reparación completa.")
-            return False
-        
-        if self._estado == EstadoCatapulta.EN_CONSTRUCCION:
-            print("❌ La catapulta aún no está construida.")
+        if not self._puede_disparar():
             return False
         
-        if len(self.corchos) == 0:
-            print("❌ No hay munición disponible.")
-            return False
-        
-        print(f"\n🎯 Preparando disparo contra {enemigo.nombre}...")
+        # En los disparos los campos de los eventos solo se preparan si
+        # alguien escucha (en simulaciones y en el servidor, nadie)
+        sumidero = self._escuchando()
+        if sumidero is not None:
+            sumidero.emitir('disparo_preparado', enemigo=enemigo.nombre)
         
         # Verificar si la catapulta puede alcanzar al enemigo
-        if enemigo.distancia > self.alcance:
-            print(f"❌ Enemigo fuera de alcance. Distancia: {enemigo.distancia}m, Alcance: {self.alcance}m")
+        alcance = self.alcance
+        if enemigo.distancia > alcance:
+            if sumidero is not None:
+                sumidero.emitir('fuera_de_alcance', enemigo=enemigo.nombre, distancia=enemigo.distancia,
+                                alcance=alcance)
             self._aplicar_desgaste()
             return False
         
         # Calcular si el disparo acierta
-        acierto = random.randint(1, 100) <= self.precision
+        precision = self.precision
+        acierto = self.rng.randint(1, 100) <= precision
         
         if acierto:
             # Usar un corcho como munición
-            corcho = self.corchos.pop(0)
+            corcho = self.corchos.sacar()
             danio = corcho.danio + (self.potencia // 10)
             
-            print(f"✅ ¡Disparo acertado! Daño: {danio}")
+            if sumidero is not None:
+                sumidero.emitir('disparo_acertado', enemigo=enemigo.nombre, danio=danio)
             eliminado = enemigo.recibir_danio(danio)
             
             if eliminado:
                 self.enemigos_eliminados += 1
-                print(f"💀 ¡{enemigo.nombre} eliminado!")
+                if sumidero is not None:
+                    sumidero.emitir('enemigo_eliminado', enemigo=enemigo.nombre)
             
-            self.historial_disparos.append({
-                'enemigo': enemigo.nombre,
-                'acierto': True,
-                'danio': danio,
-                'eliminado': eliminado
-            })
+            self.historial_disparos.registrar(enemigo.nombre, True, danio, eliminado)
         else:
-            print(f"❌ ¡Disparo fallado! Precisión: {self.precision}%")
-            self.historial_disparos.append({
-                'enemigo': enemigo.nombre,
-                'acierto': False,
-                'danio': 0,
-                'eliminado': False
-            })
+            if sumidero is not None:
+                sumidero.emitir('disparo_fallado', enemigo=enemigo.nombre, precision=precision)
+            self.historial_disparos.registrar(enemigo.nombre, False, 0, False)
         
         self.disparos_realizados += 1
         self._aplicar_desgaste()
         
         return acierto
     
+    def disparar_area(self, oleada, distancia, radio=None):
+        """
+        Dispara un corcho que cae a `distancia` metros y daña a todos los
+        enemigos vivos de la oleada a `radio` metros o menos del impacto,
+        a cada uno menos su armadura. Retorna un ResultadoArea.
+        """
+        radio = self.RADIO_AREA if radio is None else radio
+        if not self._puede_disparar():
+            return ResultadoArea(False, 0, 0)
+        
+        objetivo = f"Área {distancia}m"
+        sumidero = self._escuchando()
+        if sumidero is not None:
+            sumidero.emitir('disparo_area_preparado', distancia=distancia, radio=radio)
+        
+        alcance = self.alcance
+        if distancia > alcance:
+            if sumidero is not None:
+                sumidero.emitir('fuera_de_alcance', enemigo=objetivo, distancia=distancia, alcance=alcance)
+            self._aplicar_desgaste()
+            return ResultadoArea(False, 0, 0)
+        
+        precision = self.precision
+        acierto = self.rng.randint(1, 100) <= precision
+        danio = afectados = eliminados = 0
+        
+        if acierto:
+            corcho = self.corchos.sacar()
+            danio = corcho.danio + (self.potencia // 10)
+            # La oleada resuelve el área en una pasada sobre su índice por distancia
+            afectados, eliminados = oleada.danar_area(distancia, radio, danio)
+            self.enemigos_eliminados += eliminados
+            if sumidero is not None:
+                sumidero.emitir('disparo_area_acertado', distancia=distancia, danio=danio,
+                                afectados=afectados, eliminados=eliminados)
+        elif sumidero is not None:
+            sumidero.emitir('disparo_fallado', enemigo=objetivo, precision=precision)
+        
+        self.historial_disparos.registrar(objetivo, acierto, danio, eliminados > 0)
+        self.disparos_realizados += 1
+        self._aplicar_desgaste()
+        
+        return ResultadoArea(acierto, afectados, eliminados)
+    
+    def _puede_disparar(self):
+        """Comprueba (y avisa si no) que la catapulta puede disparar"""
+        if self._estado == EstadoCatapulta.DESTRUIDA:
+            self._emitir('disparo_imposible', motivo='destruida')
+            return False
+        
+        if self._estado == EstadoCatapulta.EN_CONSTRUCCION:
+            self._emitir('disparo_imposible', motivo='no_construida')
+            return False
+        
+        if len(self.corchos) == 0:
+            self._emitir('disparo_imposible', motivo='sin_municion')
+            return False
+        
+        return True
+    
     def _aplicar_desgaste(self):
         """Aplica desgaste a la catapulta después de cada disparo"""
         self._durabilidad -= self.DESGASTE_POR_DISPARO
         self.nivel_desgaste += 1
         
         # Actualizar estado según durabilidad
+        aviso = None
         if self._durabilidad <= 0:
             self._durabilidad = 0
             self._estado = EstadoCatapulta.DESTRUIDA
-            print("💔 ¡La catapulta se ha destruido!")
+            aviso = 'destruida'
         elif self._durabilidad < self._durabilidad_maxima * 0.3:
             self._estado = EstadoCatapulta.DANADA
-            print("⚠️  La catapulta está muy dañada. Considera repararla.")
+            aviso = 'danada'
         
-        print(f"   Durabilidad: {self._durabilidad}/{self._durabilidad_maxima} ({self.durabilidad_porcentaje:.1f}%)")
+        sumidero = self._escuchando()
+        if sumidero is not None:
+            sumidero.emitir('desgaste', aviso=aviso, durabilidad=self._durabilidad,
+                            durabilidad_maxima=self._durabilidad_maxima,
+                            porcentaje=self.durabilidad_porcentaje)
     
     def reparar(self):
         """Repara la catapulta restaurando su durabilidad"""
         if self._estado == EstadoCatapulta.EN_CONSTRUCCION:
-            print("⚠ La catapulta no está construida aún.")
+            self._emitir('reparacion_imposible')
             return False
         
-        if self._estado == EstadoCatapulta.DESTRUIDA:
-            print("🔧 Reparación completa necesaria...")
-            costo = 3
-        else:
-            print("🔧 Reparando catapulta...")
-            costo = 1
+        completa = self._estado == EstadoCatapulta.DESTRUIDA
+        costo = 3 if completa else 1
+        self._emitir('reparacion_iniciada', completa=completa)
         
         if len(self.corchos) < costo:
-            print(f"❌ Se necesitan {costo} corchos para la reparación.")
+            self._emitir('reparacion_sin_corchos', costo=costo)
             return False
         
         # Usar corchos como material de reparación
-        for _ in range(costo):
-            self.corchos.pop()
+        self.corchos.consumir(costo)
         
         restauracion = self._durabilidad_maxima * 0.5
         self._durabilidad = min(self._durabilidad_maxima, self._durabilidad + restauracion)
@@ -361,7 +547,8 @@ class Catapulta:
             if self.durabilidad_porcentaje > 50:
                 self._estado = EstadoCatapulta.LISTA
         
-        print(f"✅ Reparación completada. Durabilidad: {self._durabilidad}/{self._durabilidad_maxima}")
+        self._emitir('reparacion_completada', durabilidad=self._durabilidad,
+                     durabilidad_maxima=self._durabilidad_maxima)
         return True
     
     def mejorar(self, tipo_mejora):
@@ -370,21 +557,21 @@ class Catapulta:
         Requiere que la catapulta esté en mantenimiento.
         """
         if self._estado == EstadoCatapulta.DESTRUIDA:
-            print("❌ No se puede mejorar una catapulta destruida. Repárala primero.")
+            self._emitir('mejora_imposible')
             return False
         
-        print(f"⚡ Mejorando catapulta: {tipo_mejora}...")
+        self._emitir('mejora_iniciada', mejora=tipo_mejora)
         
         if tipo_mejora == "refuerzo":
             self.agregar_tapon()
             self._durabilidad_maxima += 10
-            print("✅ Catapulta reforzada. Durabilidad máxima aumentada.")
+            self._emitir('mejora_refuerzo', durabilidad_maxima=self._durabilidad_maxima)
         elif tipo_mejora == "potencia":
-            if not self.agregar_goma(random.randint(7, 10)):
+            if not self.agregar_goma(self.rng.randint(7, 10)):
                 return False
-            print("✅ Potencia mejorada.")
+            self._emitir('mejora_potencia')
         else:
-            print("⚠ Tipo de mejora no reconocido.")
+            self._emitir('mejora_desconocida', mejora=tipo_mejora)
             return False
         
         return True
@@ -403,38 +590,44 @@ class Catapulta:
     
     # === MÉTODOS DE VISUALIZACIÓN ===
     
-    def mostrar_estadisticas(self):
-        """Muestra las estadísticas completas de la catapulta"""
-        print(f"\n{'='*60}")
-        print(f"📊 ESTADÍSTICAS DE '{self.nombre}'")
-        print(f"{'='*60}")
+    def texto_estadisticas(self):
+        """Retorna el texto con las estadísticas completas de la catapulta"""
+        lineas = []
+        lineas.append(f"\n{'='*60}")
+        lineas.append(f"📊 ESTADÍSTICAS DE '{self.nombre}'")
+        lineas.append(f"{'='*60}")
         
         # Estado
-        print(f"\n🔸 ESTADO: {self._estado.value}")
-        print(f"   Durabilidad: {self._durabilidad}/{self._durabilidad_maxima} ({self.durabilidad_porcentaje:.1f}%)")
-        print(f"   Disparos realizados: {self.disparos_realizados}")
-        print(f"   Nivel de desgaste: {self.nivel_desgaste}")
-        print(f"   Enemigos eliminados: {self.enemigos_eliminados}")
+        lineas.append(f"\n🔸 ESTADO: {self._estado.value}")
+        lineas.append(f"   Durabilidad: {self._durabilidad}/{self._durabilidad_maxima} ({self.durabilidad_porcentaje:.1f}%)")
+        lineas.append(f"   Disparos realizados: {self.disparos_realizados}")
+        lineas.append(f"   Nivel de desgaste: {self.nivel_desgaste}")
+        lineas.append(f"   Enemigos eliminados: {self.enemigos_eliminados}")
         
         # Características
-        print(f"\n🔸 CARACTERÍSTICAS:")
-        print(f"   Potencia: {self.potencia}")
-        print(f"   Alcance: {self.alcance}m")
-        print(f"   Precisión: {self.precision}%")
-        print(f"   Estabilidad: {self.estabilidad:.1f}")
+        lineas.append(f"\n🔸 CARACTERÍSTICAS:")
+        lineas.append(f"   Potencia: {self.potencia}")
+        lineas.append(f"   Alcance: {self.alcance}m")
+        lineas.append(f"   Precisión: {self.precision}%")
+        lineas.append(f"   Estabilidad: {self.estabilidad:.1f}")
         
         # Componentes
-        print(f"\n� COMPONENTES:")
-        print(f"   Palos: {len(self.palos)}")
-        print(f"   Gomas: {len(self.gomas)}")
-        print(f"   Tapones: {len(self.tapones)}")
-        print(f"   Pegamento: {'Calidad ' + str(self.pegamento.calidad) if self.pegamento else 'No'}")
+        lineas.append(f"\n� COMPONENTES:")
+        lineas.append(f"   Palos: {len(self.palos)}")
+        lineas.append(f"   Gomas: {len(self.gomas)}")
+        lineas.append(f"   Tapones: {len(self.tapones)}")
+        lineas.append(f"   Pegamento: {'Calidad ' + str(self.pegamento.calidad) if self.pegamento else 'No'}")
         
         # Munición
-        print(f"\n🔸 MUNICIÓN:")
-        print(f"   Corchos disponibles: {len(self.corchos)}")
+        lineas.append(f"\n🔸 MUNICIÓN:")
+        lineas.append(f"   Corchos disponibles: {len(self.corchos)}")
         
-        print(f"{'='*60}\n")
+        lineas.append(f"{'='*60}\n")
+        return "\n".join(lineas)
+    
+    def mostrar_estadisticas(self):
+        """Muestra las estadísticas completas de la catapulta"""
+        print(self.texto_estadisticas())
     
     def mostrar_inventario(self):
         """Muestra el inventario de materiales"""
@@ -452,11 +645,11 @@ class Catapulta:
             print("\n📜 No hay historial de disparos.")
             return
         
-        print(f"\n📜 Historial de disparos ({len(self.historial_disparos)} disparos):")
-        for i, disparo in enumerate(self.historial_disparos[-10:], 1):  # Últimos 10
-            estado = "✅ ACERTÓ" if disparo['acierto'] else "❌ FALLÓ"
-            eliminado = " - ☠️ ELIMINADO" if disparo.get('eliminado') else ""
-            print(f"   {i}. vs {disparo['enemigo']}: {estado} (Daño: {disparo['danio']}){eliminado}")
+        print(f"\n📜 Historial de disparos ({self.historial_disparos.total} disparos):")
+        for i, disparo in enumerate(self.historial_disparos.ultimos(10), 1):
+            estado = "✅ ACERTÓ" if disparo.acierto else "❌ FALLÓ"
+            eliminado = " - ☠️ ELIMINADO" if disparo.eliminado else ""
+            print(f"   {i}. vs {disparo.enemigo}: {estado} (Daño: {disparo.danio}){eliminado}")
     
     def __str__(self):
         """Representación en string de la catapulta"""
@@ -2,9 +2,15 @@
 Módulo que define los enemigos
 """
 
+from bisect import bisect_left, bisect_right
 import random
 
 
+# Distancias (en metros) a las que aparecen los enemigos
+DISTANCIA_MINIMA = 10
+DISTANCIA_MAXIMA = 50
+
+
 class Enemigo:
     """Clase base para enemigos"""
     def __init__(self, nombre, vida, distancia, armadura=0):
@@ -14,6 +20,9 @@ class Enemigo:
         self.distancia = distancia
         self.armadura = armadura
         self.vivo = True
+        # Oleada a la que pertenece y posición en ella (los asigna Oleada)
+        self.oleada = None
+        self.id = None
     
     def recibir_danio(self, danio):
         """Recibe daño reducido por la armadura"""
@@ -22,6 +31,8 @@ class Enemigo:
         if self.vida <= 0:
             self.vida = 0
             self.vivo = False
+            if self.oleada is not None:
+                self.oleada._al_eliminar(self)
             return True  # Enemigo eliminado
         return False
     
@@ -54,8 +65,158 @@ class Gigante(Enemigo):
         super().__init__("Gigante", vida=50, distancia=distancia, armadura=8)
 
 
-def generar_oleada_enemigos(nivel=1):
-    """Genera una oleada de enemigos según el nivel"""
+class Oleada:
+    """
+    Enemigos de una oleada.
+
+    Se usa como la lista de todos sus enemigos (en el orden en que se
+    generaron), y además mantiene los vivos ordenados por distancia para
+    responder sin recorrer la oleada entera: cuántos quedan, cuáles están al
+    alcance y cuál es el más cercano. Los enemigos avisan a su oleada al
+    morir (Enemigo.recibir_danio), así que el índice se actualiza solo.
+    
+    Cada enemigo recibe un id estable (su posición en la oleada), y la
+    oleada avisa a sus oyentes de cada baja y de cuando queda superada.
+    """
+    
+    def __init__(self, enemigos=()):
+        self.enemigos = list(enemigos)
+        self._claves = []  # (distancia, id) de los vivos, ordenadas
+        self._por_distancia = []  # vivos en el mismo orden que _claves
+        self._vivos = {}  # id -> enemigo vivo, en orden de generación
+        self._oyentes = []
+        self._en_lote = False  # True mientras danar_area aplica el daño
+        
+        for i, enemigo in enumerate(self.enemigos):
+            enemigo.oleada = self
+            enemigo.id = i
+            if enemigo.vivo:
+                self._vivos[i] = enemigo
+        self._por_distancia = sorted(self._vivos.values(), key=lambda e: (e.distancia, e.id))
+        self._claves = [(e.distancia, e.id) for e in self._por_distancia]
+    
+    def _al_eliminar(self, enemigo):
+        """Quita del índice a un enemigo que acaba de morir"""
+        if self._vivos.pop(enemigo.id, None) is None or self._en_lote:
+            return
+        i = bisect_left(self._claves, (enemigo.distancia, enemigo.id))
+        del self._claves[i]
+        del self._por_distancia[i]
+        
+        self._avisar('eliminado', enemigo)
+        if not self._vivos:
+            self._avisar('superada', None)
+    
+    def danar_area(self, centro, radio, danio):
+        """
+        Aplica `danio` (menos la armadura de cada uno) a todos los vivos a
+        `radio` metros o menos de la distancia `centro`, en una sola pasada
+        sobre el tramo del índice que cubre el área.
+        Retorna (número de afectados, número de eliminados).
+        """
+        inicio = bisect_left(self._claves, (centro - radio, -1))
+        fin = bisect_right(self._claves, (centro + radio, len(self.enemigos)))
+        afectados = self._por_distancia[inicio:fin]
+        eliminados = []
+        
+        self._en_lote = True
+        try:
+            for enemigo in afectados:
+                if enemigo.recibir_danio(danio):
+                    eliminados.append(enemigo)
+        finally:
+            self._en_lote = False
+        
+        if eliminados:
+            # Quitar las bajas del índice de una vez
+            vivos = [e for e in afectados if e.vivo]
+            self._por_distancia[inicio:fin] = vivos
+            self._claves[inicio:fin] = [(e.distancia, e.id) for e in vivos]
+            for enemigo in eliminados:
+                self._avisar('eliminado', enemigo)
+            if not self._vivos:
+                self._avisar('superada', None)
+        return len(afectados), len(eliminados)
+    
+    def avanzar(self, metros):
+        """
+        Acerca `metros` a todos los vivos. Como avanzan todos a la vez, el
+        orden del índice no cambia: solo se desplazan sus claves.
+        """
+        for enemigo in self._por_distancia:
+            enemigo.distancia -= metros
+        self._claves = [(distancia - metros, i) for distancia, i in self._claves]
+    
+    # === AVISOS ===
+    
+    def suscribir(self, oyente):
+        """
+        Registra un oyente de la oleada: oyente(tipo, oleada, enemigo), con
+        tipo 'eliminado' (y el enemigo) o 'superada' (y None).
+        """
+        self._oyentes.append(oyente)
+    
+    def cancelar(self, oyente):
+        """Quita un oyente registrado con suscribir()"""
+        self._oyentes.remove(oyente)
+    
+    def _avisar(self, tipo, enemigo):
+        for oyente in list(self._oyentes):
+            oyente(tipo, self, enemigo)
+    
+    # === CONSULTAS ===
+    
+    @property
+    def num_vivos(self):
+        """Número de enemigos vivos"""
+        return len(self._vivos)
+    
+    @property
+    def superada(self):
+        """True si no queda ningún enemigo vivo"""
+        return not self._vivos
+    
+    def por_id(self, id_enemigo):
+        """Enemigo con ese id, o None si no existe"""
+        if isinstance(id_enemigo, int) and 0 <= id_enemigo < len(self.enemigos):
+            return self.enemigos[id_enemigo]
+        return None
+    
+    def vivos(self):
+        """Enemigos vivos, en orden de generación"""
+        return list(self._vivos.values())
+    
+    def en_alcance(self, alcance):
+        """Enemigos vivos a `alcance` metros o menos, del más cercano al más lejano"""
+        return self._por_distancia[:bisect_right(self._claves, (alcance, len(self.enemigos)))]
+    
+    def mas_cercano(self, alcance=None):
+        """Enemigo vivo más cercano (a `alcance` metros o menos, si se indica), o None"""
+        if not self._por_distancia:
+            return None
+        enemigo = self._por_distancia[0]
+        if alcance is not None and enemigo.distancia > alcance:
+            return None
+        return enemigo
+    
+    # === COMO LISTA ===
+    
+    def __len__(self):
+        return len(self.enemigos)
+    
+    def __iter__(self):
+        return iter(self.enemigos)
+    
+    def __getitem__(self, indice):
+        return self.enemigos[indice]
+
+
+def generar_oleada_enemigos(nivel=1, rng=None):
+    """
+    Genera una Oleada de enemigos según el nivel.
+    `rng` es el random.Random del juego (por defecto, el módulo random global).
+    """
+    rng = rng if rng is not None else random
     enemigos = []
     num_enemigos = 3 + nivel
     
@@ -64,8 +225,8 @@ def generar_oleada_enemigos(nivel=1):
         tipos.append(Gigante)
     
     for i in range(num_enemigos):
-        tipo = random.choice(tipos)
-        distancia = random.randint(10, 50)
+        tipo = rng.choice(tipos)
+        distancia = rng.randint(DISTANCIA_MINIMA, DISTANCIA_MAXIMA)
         enemigos.append(tipo(distancia))
     
-    return enemigos
+    return Oleada(enemigos)
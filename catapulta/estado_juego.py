@@ -0,0 +1,268 @@
+"""
+Módulo de serialización del estado del juego y de parches entre versiones.
+
+Cada juego lleva un número de versión que crece con cada cambio. Los clientes
+indican la última versión que conocen y reciben solo los campos que han
+cambiado desde entonces (o nada si no hay cambios).
+"""
+
+from collections import OrderedDict, deque
+from contextlib import nullcontext
+import threading
+
+from catapulta.oleada_masiva import OleadaMasiva, TIPOS
+
+
+# Versiones recientes que se guardan por juego para poder calcular parches
+VERSIONES_POR_JUEGO = 8
+
+# Juegos cuyo historial de versiones se mantiene a la vez
+MAX_JUEGOS_CACHEADOS = 1024
+
+# (nombre, vida máxima, armadura) de cada código de tipo de OleadaMasiva
+_DATOS_TIPO = [(prototipo.nombre, prototipo.vida_maxima, prototipo.armadura)
+               for prototipo in (tipo(0) for tipo in TIPOS)]
+
+
+def obtener_inventario(catapulta):
+    """Retorna el inventario de la catapulta"""
+    return {
+        'palos': len(catapulta.palos),
+        'gomas': len(catapulta.gomas),
+        'tapones': len(catapulta.tapones),
+        'corchos': len(catapulta.corchos),
+        'pegamento': catapulta.pegamento is not None
+    }
+
+
+def obtener_estado_catapulta(catapulta):
+    """Retorna el estado completo de la catapulta"""
+    if not catapulta:
+        return None
+
+    return {
+        'nombre': catapulta.nombre,
+        'construida': catapulta.construida,
+        'estado': catapulta.estado.value if catapulta.construida else 'No construida',
+        'durabilidad': catapulta.durabilidad if catapulta.construida else 0,
+        'durabilidad_max': catapulta._durabilidad_maxima if catapulta.construida else 0,
+        'durabilidad_pct': catapulta.durabilidad_porcentaje if catapulta.construida else 0,
+        'potencia': catapulta.potencia,
+        'alcance': catapulta.alcance,
+        'precision': catapulta.precision,
+        'estabilidad': catapulta.estabilidad,
+        'disparos': catapulta.disparos_realizados,
+        'desgaste': catapulta.nivel_desgaste,
+        'enemigos_eliminados': catapulta.enemigos_eliminados,
+        'inventario': obtener_inventario(catapulta),
+        'historial': [disparo._asdict() for disparo in catapulta.historial_disparos.ultimos(10)]
+    }
+
+
+def obtener_enemigos(enemigos):
+    """Retorna la lista de enemigos"""
+    if isinstance(enemigos, OleadaMasiva):
+        return obtener_enemigos_masiva(enemigos)
+    return [{
+        'id': e.id,
+        'nombre': e.nombre,
+        'vida': e.vida,
+        'vida_max': e.vida_maxima,
+        'distancia': e.distancia,
+        'armadura': e.armadura,
+        'vivo': e.vivo
+    } for e in enemigos]
+
+
+def obtener_enemigos_masiva(oleada):
+    """Como obtener_enemigos, leyendo las columnas de la oleada sin crear una vista por enemigo"""
+    enemigos = []
+    for i, (codigo, distancia, vida) in enumerate(zip(oleada.tipos, oleada.distancias, oleada.vidas)):
+        nombre, vida_maxima, armadura = _DATOS_TIPO[codigo]
+        enemigos.append({
+            'id': i,
+            'nombre': nombre,
+            'vida': vida,
+            'vida_max': vida_maxima,
+            'distancia': distancia,
+            'armadura': armadura,
+            'vivo': vida > 0
+        })
+    return enemigos
+
+
+def obtener_estado_juego(juego):
+    """Retorna el estado completo del juego"""
+    catapulta = juego['catapulta']
+    return {
+        'catapulta': obtener_estado_catapulta(catapulta) if catapulta else None,
+        'enemigos': obtener_enemigos(juego['enemigos']),
+        'nivel': juego['nivel'],
+        'puntos': juego['puntos'],
+        'tiempo_real': juego.get('tiempo_real'),
+        'version': juego['version']
+    }
+
+
+# === PARCHES ===
+
+def calcular_parche(anterior, actual):
+    """
+    Calcula el parche que transforma `anterior` en `actual`.
+
+    - Diccionarios: solo las claves cuyo valor cambió (recursivo).
+    - Listas de igual longitud: diccionario {índice: parche} de los elementos
+      que cambiaron.
+    - Cualquier otro cambio: el valor nuevo completo.
+
+    Retorna None si no hay cambios.
+    """
+    if anterior == actual:
+        return None
+
+    if isinstance(anterior, dict) and isinstance(actual, dict) and anterior.keys() == actual.keys():
+        parche = {}
+        for clave, valor in actual.items():
+            cambio = calcular_parche(anterior[clave], valor)
+            if cambio is not None:
+                parche[clave] = cambio
+        return parche
+
+    if isinstance(anterior, list) and isinstance(actual, list) and len(anterior) == len(actual):
+        parche = {}
+        for i, (viejo, nuevo) in enumerate(zip(anterior, actual)):
+            cambio = calcular_parche(viejo, nuevo)
+            if cambio is not None:
+                parche[str(i)] = cambio
+        return parche
+
+    return Reemplazo(actual)
+
+
+class Reemplazo:
+    """Marca un valor que sustituye por completo al anterior"""
+    __slots__ = ('valor',)
+
+    def __init__(self, valor):
+        self.valor = valor
+
+
+def parche_a_json(parche):
+    """
+    Convierte un parche a estructuras JSON.
+    Los reemplazos de diccionarios o listas se envuelven en {'$': valor}
+    para distinguirlos de un parche parcial.
+    """
+    if isinstance(parche, Reemplazo):
+        if isinstance(parche.valor, (dict, list)):
+            return {'$': parche.valor}
+        return parche.valor
+    return {clave: parche_a_json(valor) for clave, valor in parche.items()}
+
+
+def aplicar_parche(base, parche):
+    """Aplica un parche en formato JSON a una copia de `base`"""
+    if not isinstance(parche, dict):
+        return parche
+    if '$' in parche and len(parche) == 1:
+        return parche['$']
+
+    if isinstance(base, list):
+        resultado = list(base)
+        for indice, cambio in parche.items():
+            resultado[int(indice)] = aplicar_parche(resultado[int(indice)], cambio)
+        return resultado
+
+    resultado = dict(base)
+    for clave, cambio in parche.items():
+        resultado[clave] = aplicar_parche(resultado.get(clave), cambio)
+    return resultado
+
+
+# === HISTORIAL DE VERSIONES ===
+
+class CacheVersiones:
+    """
+    Guarda los últimos estados serializados de cada juego, indexados por
+    versión, para responder con parches sin volver a serializar.
+
+    Si otro hilo puede modificar el juego (el motor de una batalla en tiempo
+    real), se pasa como `lock` el mismo con el que se modifica y se sube la
+    versión: la versión y el estado se leen juntos bajo él, y el estado
+    cacheado de una versión nunca mezcla cambios de la siguiente.
+
+    `serializar` (por defecto obtener_estado_juego) construye el estado de
+    un juego; el servidor lo envuelve para medir su duración.
+    """
+
+    def __init__(self, versiones_por_juego=VERSIONES_POR_JUEGO, max_juegos=MAX_JUEGOS_CACHEADOS,
+                 serializar=obtener_estado_juego):
+        self.versiones_por_juego = versiones_por_juego
+        self.max_juegos = max_juegos
+        self.serializar = serializar
+        self._juegos = OrderedDict()
+        self._lock = threading.Lock()
+
+    def estado_actual(self, game_id, juego, lock=None):
+        """Retorna el estado serializado de la versión actual (cacheado)"""
+        if lock is not None:
+            with lock:
+                return self.estado_actual(game_id, juego)
+
+        version = juego['version']
+        with self._lock:
+            versiones = self._juegos.get(game_id)
+            if versiones and versiones[-1][0] == version:
+                self._juegos.move_to_end(game_id)
+                return versiones[-1][1]
+
+        estado = self.serializar(juego)
+
+        with self._lock:
+            versiones = self._juegos.get(game_id)
+            if versiones is None:
+                versiones = self._juegos[game_id] = deque(maxlen=self.versiones_por_juego)
+                while len(self._juegos) > self.max_juegos:
+                    self._juegos.popitem(last=False)
+            if not versiones or versiones[-1][0] < version:
+                versiones.append((version, estado))
+            self._juegos.move_to_end(game_id)
+        return estado
+
+    def estado_en_version(self, game_id, version):
+        """Retorna el estado serializado de una versión anterior, o None"""
+        with self._lock:
+            for v, estado in self._juegos.get(game_id, ()):
+                if v == version:
+                    return estado
+        return None
+
+    def respuesta(self, game_id, juego, version_cliente=None, lock=None):
+        """
+        Calcula lo que hay que enviar a un cliente que conoce `version_cliente`.
+
+        Retorna una tupla (tipo, datos):
+            - ('sin_cambios', None) si el cliente ya tiene la versión actual
+            - ('parche', {...}) con 'base', 'version' y 'parche'
+            - ('completo', estado) si no se conoce la versión del cliente
+        """
+        with lock if lock is not None else nullcontext():
+            if version_cliente is not None and version_cliente == juego['version']:
+                return 'sin_cambios', None
+            actual = self.estado_actual(game_id, juego)
+
+        if version_cliente is not None:
+            anterior = self.estado_en_version(game_id, version_cliente)
+            if anterior is not None:
+                parche = calcular_parche(anterior, actual)
+                return 'parche', {
+                    'base': version_cliente,
+                    'version': actual['version'],
+                    'parche': parche_a_json(parche) if parche is not None else {}
+                }
+        return 'completo', actual
+
+    def olvidar(self, game_id):
+        """Elimina el historial de versiones de un juego"""
+        with self._lock:
+            self._juegos.pop(game_id, None)
@@ -0,0 +1,210 @@
+"""
+Eventos estructurados del modelo del juego.
+
+Las clases del dominio no escriben por pantalla: emiten eventos (un tipo y
+unos campos) a un sumidero intercambiable:
+
+    - SumideroNulo: descarta los eventos sin coste (simulaciones, servidor)
+    - SumideroConsola: escribe el mismo texto que el juego ha mostrado siempre
+    - SumideroJSONL: acumula los eventos y los escribe como líneas JSON
+    - SumideroMemoria: guarda los eventos en una lista (para inspeccionarlos)
+
+El texto solo se formatea si el sumidero está escuchando (`activo`).
+"""
+
+import atexit
+import json
+import sys
+import threading
+import time
+
+
+class Sumidero:
+    """Clase base de los sumideros de eventos"""
+
+    # Si es False, el modelo ni siquiera construye el evento
+    activo = True
+
+    def emitir(self, tipo, **campos):
+        raise NotImplementedError
+
+
+class SumideroNulo(Sumidero):
+    """Descarta todos los eventos"""
+
+    activo = False
+
+    def emitir(self, tipo, **campos):
+        pass
+
+
+# === TEXTOS DE CONSOLA ===
+
+def _texto_construccion_exitosa(c):
+    return f"✅ ¡Catapulta '{c['nombre']}' construida con éxito!\n{c['catapulta'].texto_estadisticas()}"
+
+
+def _texto_construccion_invalida(c):
+    return "\n".join(["❌ No se puede construir la catapulta:"] + [f"   - {error}" for error in c['errores']])
+
+
+def _texto_desgaste(c):
+    lineas = []
+    if c['aviso'] == 'destruida':
+        lineas.append("💔 ¡La catapulta se ha destruido!")
+    elif c['aviso'] == 'danada':
+        lineas.append("⚠️  La catapulta está muy dañada. Considera repararla.")
+    lineas.append(f"   Durabilidad: {c['durabilidad']}/{c['durabilidad_maxima']} ({c['porcentaje']:.1f}%)")
+    return "\n".join(lineas)
+
+
+def _texto_materiales_agregados(c):
+    partes = [f"{c[nombre]} {nombre}" for nombre in ('palos', 'gomas', 'tapones', 'corchos') if c[nombre]]
+    if c['pegamento'] is not None:
+        partes.append(f"pegamento de calidad {c['pegamento']}")
+    return f"✓ Materiales agregados: {', '.join(partes) or 'ninguno'}"
+
+
+def _texto_materiales_invalidos(c):
+    return "\n".join(["⚠ No se agregó ningún material:"] + [f"   - {error}" for error in c['errores']])
+
+
+_MOTIVOS_DISPARO_IMPOSIBLE = {
+    'destruida': "❌ La catapulta está destruida. Necesita reparación completa.",
+    'no_construida': "❌ La catapulta aún no está construida.",
+    'sin_municion': "❌ No hay munición disponible.",
+}
+
+TEXTOS = {
+    'componente_rechazado': lambda c: f"⚠ No se pueden agregar componentes. Estado: {c['estado']}",
+    'longitud_invalida': lambda c: "⚠ La longitud debe ser un número",
+    'elasticidad_invalida': lambda c: "⚠ La elasticidad debe estar entre 1 y 10",
+    'calidad_invalida': lambda c: "⚠ La calidad debe estar entre 1 y 10",
+    'palo_agregado': lambda c: f"✓ Palo agregado: {c['material']}",
+    'goma_agregada': lambda c: f"✓ Goma agregada: {c['material']}",
+    'tapon_agregado': lambda c: f"✓ Tapón agregado: {c['material']}",
+    'corcho_agregado': lambda c: f"✓ Corcho agregado: {c['material']}",
+    'pegamento_agregado': lambda c: f"✓ Pegamento agregado: {c['material']}",
+    'materiales_agregados': _texto_materiales_agregados,
+    'materiales_invalidos': _texto_materiales_invalidos,
+    'construccion_iniciada': lambda c: "\n🔨 Intentando construir la catapulta...",
+    'construccion_repetida': lambda c: f"⚠ La catapulta ya está en estado: {c['estado']}",
+    'construccion_invalida': _texto_construccion_invalida,
+    'construccion_exitosa': _texto_construccion_exitosa,
+    'construccion_fallida': lambda c: (f"❌ La construcción falló. Probabilidad de éxito: {c['probabilidad']}%\n"
+                                       "   Intenta agregar más tapones o mejor pegamento."),
+    'disparo_imposible': lambda c: _MOTIVOS_DISPARO_IMPOSIBLE[c['motivo']],
+    'disparo_preparado': lambda c: f"\n🎯 Preparando disparo contra {c['enemigo']}...",
+    'fuera_de_alcance': lambda c: (f"❌ Enemigo fuera de alcance. Distancia: {c['distancia']}m, "
+                                   f"Alcance: {c['alcance']}m"),
+    'disparo_acertado': lambda c: f"✅ ¡Disparo acertado! Daño: {c['danio']}",
+    'enemigo_eliminado': lambda c: f"💀 ¡{c['enemigo']} eliminado!",
+    'disparo_area_preparado': lambda c: (f"\n🎯 Preparando disparo de área a {c['distancia']}m "
+                                         f"(radio {c['radio']}m)..."),
+    'disparo_area_acertado': lambda c: (f"✅ ¡Impacto de área! Daño: {c['danio']} a {c['afectados']} enemigos, "
+                                        f"{c['eliminados']} eliminados"),
+    'castillo_alcanzado': lambda c: f"🏰 ¡{c['enemigo']} ha llegado al castillo!",
+    'disparo_fallado': lambda c: f"❌ ¡Disparo fallado! Precisión: {c['precision']}%",
+    'desgaste': _texto_desgaste,
+    'reparacion_imposible': lambda c: "⚠ La catapulta no está construida aún.",
+    'reparacion_iniciada': lambda c: "🔧 Reparación completa necesaria..." if c['completa'] else "🔧 Reparando catapulta...",
+    'reparacion_sin_corchos': lambda c: f"❌ Se necesitan {c['costo']} corchos para la reparación.",
+    'reparacion_completada': lambda c: (f"✅ Reparación completada. Durabilidad: "
+                                        f"{c['durabilidad']}/{c['durabilidad_maxima']}"),
+    'mejora_imposible': lambda c: "❌ No se puede mejorar una catapulta destruida. Repárala primero.",
+    'mejora_iniciada': lambda c: f"⚡ Mejorando catapulta: {c['mejora']}...",
+    'mejora_refuerzo': lambda c: "✅ Catapulta reforzada. Durabilidad máxima aumentada.",
+    'mejora_potencia': lambda c: "✅ Potencia mejorada.",
+    'mejora_desconocida': lambda c: "⚠ Tipo de mejora no reconocido.",
+}
+
+
+class SumideroConsola(Sumidero):
+    """Escribe los eventos como el texto de siempre"""
+
+    def __init__(self, salida=None):
+        self.salida = salida
+
+    def emitir(self, tipo, **campos):
+        formatear = TEXTOS.get(tipo)
+        texto = formatear(campos) if formatear else f"{tipo}: {campos}"
+        print(texto, file=self.salida or sys.stdout)
+
+
+class SumideroJSONL(Sumidero):
+    """
+    Acumula los eventos y los escribe como líneas JSON en bloques de
+    `tamano_buffer` eventos (y al cerrar o al terminar el programa).
+    """
+
+    def __init__(self, destino, tamano_buffer=1000):
+        if isinstance(destino, str):
+            self._fichero = open(destino, 'a', encoding='utf-8')
+            self._propio = True
+        else:
+            self._fichero = destino
+            self._propio = False
+        self.tamano_buffer = tamano_buffer
+        self._buffer = []
+        self._lock = threading.Lock()
+        atexit.register(self.cerrar)
+
+    def emitir(self, tipo, **campos):
+        campos['tipo'] = tipo
+        campos['t'] = time.time()
+        linea = json.dumps(campos, default=str, ensure_ascii=False)
+        with self._lock:
+            self._buffer.append(linea)
+            if len(self._buffer) >= self.tamano_buffer:
+                self._volcar()
+
+    def flush(self):
+        """Escribe los eventos pendientes"""
+        with self._lock:
+            self._volcar()
+
+    def _volcar(self):
+        if self._buffer:
+            self._fichero.write("\n".join(self._buffer) + "\n")
+            self._fichero.flush()
+            self._buffer.clear()
+
+    def cerrar(self):
+        """Escribe los eventos pendientes y cierra el fichero (si lo abrió el sumidero)"""
+        if self._fichero.closed:
+            return
+        self.flush()
+        if self._propio:
+            self._fichero.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+
+class SumideroMemoria(Sumidero):
+    """Guarda los eventos como tuplas (tipo, campos)"""
+
+    def __init__(self):
+        self.eventos = []
+
+    def emitir(self, tipo, **campos):
+        self.eventos.append((tipo, campos))
+
+
+# Sumidero que usan los objetos que no tienen uno propio
+NULO = SumideroNulo()
+_sumidero_por_defecto = SumideroConsola()
+
+
+def obtener_sumidero():
+    """Retorna el sumidero por defecto"""
+    return _sumidero_por_defecto
+
+
+def configurar_sumidero(sumidero):
+    """Cambia el sumidero por defecto (None equivale a SumideroNulo)"""
+    global _sumidero_por_defecto
+    _sumidero_por_defecto = sumidero or NULO
@@ -0,0 +1,159 @@
+"""
+Historial de disparos de capacidad fija.
+
+Guarda los últimos disparos en un buffer circular de tuplas (Disparo), así
+que añadir uno cuesta O(1) y la memoria no crece con la partida. Los
+disparos que salen del buffer se descartan o, si se indica un registro, se
+añaden a un fichero JSON lines que se puede volver a leer para analizarlo:
+
+    historial = HistorialDisparos(capacidad=100, registro='disparos.jsonl')
+    ...
+    for disparo in historial.todos():
+        ...
+"""
+
+from collections import namedtuple
+import io
+import itertools
+import json
+import os
+
+
+Disparo = namedtuple('Disparo', ['enemigo', 'acierto', 'danio', 'eliminado'])
+
+CAPACIDAD_POR_DEFECTO = 1000
+
+
+class HistorialDisparos:
+    """
+    Buffer circular con los últimos `capacidad` disparos (del más antiguo al
+    más reciente). Se usa como una lista de solo lectura: len, iteración e
+    índices (historial[-10:]).
+
+    Parámetros:
+        capacidad: disparos que se guardan en memoria
+        registro: ruta (o fichero de texto abierto) donde se añaden los
+            disparos que salen del buffer; None para descartarlos. todos()
+            solo puede releer un fichero abierto si admite lectura y seek
+            (modo 'a+' o 'w+'), y lee desde donde el historial empezó a escribir
+    """
+
+    __slots__ = ('capacidad', 'total', '_disparos', '_inicio', '_registro', '_fichero',
+                 '_inicio_registro')
+
+    def __init__(self, capacidad=CAPACIDAD_POR_DEFECTO, registro=None, disparos=()):
+        self.capacidad = capacidad
+        self.total = 0  # Disparos añadidos desde el principio (también los que ya salieron)
+        self._disparos = []
+        self._inicio = 0
+        self._registro = registro
+        self._fichero = None
+        self._inicio_registro = None  # posición del primer disparo en un fichero ajeno
+        disparos = list(disparos)
+        if registro is None and capacidad:
+            # Sin registro, los que no caben se descartan: basta con los últimos
+            self.total = len(disparos)
+            self._disparos = disparos[-capacidad:]
+        else:
+            for disparo in disparos:
+                self.append(disparo)
+
+    def append(self, disparo):
+        """Añade un disparo; si el buffer está lleno, sale el más antiguo"""
+        self.total += 1
+        if len(self._disparos) < self.capacidad:
+            self._disparos.append(disparo)
+            return
+        if self._registro is not None:
+            self._volcar(self._disparos[self._inicio] if self.capacidad else disparo)
+        if self.capacidad:
+            self._disparos[self._inicio] = disparo
+            self._inicio = (self._inicio + 1) % self.capacidad
+
+    def registrar(self, enemigo, acierto, danio, eliminado):
+        """Añade un disparo a partir de sus campos"""
+        self.append(Disparo(enemigo, acierto, danio, eliminado))
+
+    def ultimos(self, n):
+        """Los últimos `n` disparos, del más antiguo al más reciente"""
+        n = min(n, len(self._disparos))
+        return [self[i] for i in range(len(self._disparos) - n, len(self._disparos))]
+
+    def __len__(self):
+        return len(self._disparos)
+
+    def __iter__(self):
+        return iter(self._disparos[self._inicio:] + self._disparos[:self._inicio])
+
+    def __getitem__(self, indice):
+        n = len(self._disparos)
+        if isinstance(indice, slice):
+            return [self[i] for i in range(*indice.indices(n))]
+        if indice < 0:
+            indice += n
+        if not 0 <= indice < n:
+            raise IndexError("índice fuera del historial")
+        return self._disparos[(self._inicio + indice) % n]
+
+    # === REGISTRO EN DISCO ===
+
+    def _volcar(self, disparo):
+        if self._fichero is None:
+            if isinstance(self._registro, str):
+                self._fichero = open(self._registro, 'a', encoding='utf-8')
+            else:
+                self._fichero = self._registro
+                if self._inicio_registro is None and self._fichero.seekable():
+                    self._inicio_registro = self._fichero.tell()
+        self._fichero.write(json.dumps(list(disparo), ensure_ascii=False) + "\n")
+
+    def flush(self):
+        """Escribe en disco los disparos registrados pendientes"""
+        if self._fichero is not None:
+            self._fichero.flush()
+
+    def cerrar(self):
+        """Cierra el registro (si lo abrió el historial)"""
+        if self._fichero is not None and isinstance(self._registro, str):
+            self._fichero.close()
+        self._fichero = None
+
+    def todos(self):
+        """
+        Todos los disparos: los del registro y después los del buffer. Con
+        un fichero abierto que no se puede releer lanza io.UnsupportedOperation.
+        """
+        if self._registro is None:
+            return iter(self)
+        self.flush()
+        if isinstance(self._registro, str):
+            registrados = leer_registro(self._registro)
+        else:
+            registrados = self._releer_fichero()
+        return itertools.chain(registrados, self)
+
+    def _releer_fichero(self):
+        """Disparos escritos en el fichero abierto del registro"""
+        fichero = self._registro
+        if not (fichero.readable() and fichero.seekable()):
+            raise io.UnsupportedOperation(
+                "el registro no se puede releer: ábrelo con lectura y seek (modo 'a+' o 'w+')")
+        if self._inicio_registro is None:
+            return []  # aún no ha salido ningún disparo del buffer
+        # Se lee entero antes de volver al final: si se añaden disparos
+        # mientras se recorre, no se mezclan lecturas y escrituras
+        fichero.seek(self._inicio_registro)
+        lineas = fichero.readlines()
+        fichero.seek(0, os.SEEK_END)
+        return [Disparo(*json.loads(linea)) for linea in lineas if linea.strip()]
+
+
+def leer_registro(ruta):
+    """Lee (de forma perezosa) los disparos de un registro en disco"""
+    try:
+        with open(ruta, encoding='utf-8') as fichero:
+            for linea in fichero:
+                if linea.strip():
+                    yield Disparo(*json.loads(linea))
+    except FileNotFoundError:
+        return
@@ -6,7 +6,8 @@ import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext
 import random
 from catapulta.catapulta import Catapulta, EstadoCatapulta
-from catapulta.enemigos import generar_oleada_enemigos
+from catapulta.enemigos import Oleada, generar_oleada_enemigos
+from catapulta.tiempo_real import MotorBatalla
 
 
 class VentanaJuego:
@@ -18,8 +19,11 @@ class VentanaJuego:
         self.root.geometry("1200x800")
         self.root.configure(bg="#2C3E50")
         
+        self.rng = random.Random()
         self.catapulta = None
-        self.enemigos = []
+        self.enemigos = Oleada()
+        self.ids_lista_enemigos = []
+        self.motor = None  # MotorBatalla de la oleada en modo tiempo real
         self.nivel = 1
         self.puntos = 0
         self.en_construccion = True
@@ -123,7 +127,7 @@ class VentanaJuego:
         self.text_inventario.grid(row=7, column=0, columnspan=3, padx=5, pady=5)
         
         # Inicializar catapulta vacía
-        self.catapulta = Catapulta("Mi Catapulta")
+        self.catapulta = Catapulta("Mi Catapulta", rng=self.rng)
         self.actualizar_inventario()
         
     def crear_panel_estado(self):
@@ -262,6 +266,18 @@ class VentanaJuego:
         )
         self.btn_oleada.pack(pady=10, fill="x", padx=10)
         
+        # Modo tiempo real: los enemigos avanzan y la catapulta recarga
+        self.tiempo_real = tk.BooleanVar(value=False)
+        tk.Checkbutton(
+            frame,
+            text="⏱ Tiempo real",
+            variable=self.tiempo_real,
+            bg="#34495E",
+            fg="#ECF0F1",
+            selectcolor="#2C3E50",
+            font=("Arial", 11)
+        ).pack(pady=(0, 10))
+        
     # === MÉTODOS DE CONSTRUCCIÓN ===
     
     def agregar_palo(self):
@@ -287,8 +303,7 @@ class VentanaJuego:
     def agregar_corchos(self):
         if self.catapulta:
             cantidad = int(self.spin_corcho.get())
-            for _ in range(cantidad):
-                self.catapulta.agregar_corcho()
+            self.catapulta.agregar_materiales(corchos=cantidad)
             self.actualizar_inventario()
             self.log(f"✓ {cantidad} corchos agregados")
     
@@ -323,12 +338,40 @@ class VentanaJuego:
     # === MÉTODOS DE COMBATE ===
     
     def generar_oleada(self):
-        self.enemigos = generar_oleada_enemigos(self.nivel)
+        self.enemigos = generar_oleada_enemigos(self.nivel, self.rng)
+        self.enemigos.suscribir(self.al_cambiar_oleada)
         self.actualizar_lista_enemigos()
         self.dibujar_campo_batalla()
         self.btn_disparar.config(state="normal")
         self.btn_oleada.config(state="disabled")
         self.log(f"⚔️ Oleada {self.nivel}: {len(self.enemigos)} enemigos generados")
+        
+        if self.tiempo_real.get():
+            self.motor = MotorBatalla(self.catapulta, self.enemigos)
+            self.root.after(int(self.motor.dt * 1000), self.tick_tiempo_real)
+    
+    def tick_tiempo_real(self):
+        """Juega un tick del motor y se vuelve a programar con root.after"""
+        motor = self.motor
+        if motor is None:
+            return
+        motor.paso()
+        
+        self.actualizar_lista_enemigos()
+        self.actualizar_estado()
+        self.dibujar_campo_batalla()
+        
+        if motor.fin == 'castillo_alcanzado':
+            self.motor = None
+            self.castillo_alcanzado()
+        elif motor.fin == 'destruida':
+            self.motor = None
+            self.game_over()
+        elif motor.terminada:
+            # La victoria llega por al_cambiar_oleada
+            self.motor = None
+        else:
+            self.root.after(int(motor.dt * 1000), self.tick_tiempo_real)
     
     def disparar(self):
         if not self.catapulta or not self.catapulta.construida:
@@ -344,38 +387,41 @@ class VentanaJuego:
             messagebox.showwarning("Selección", "Selecciona un enemigo para disparar")
             return
         
-        enemigos_vivos = [e for e in self.enemigos if e.vivo]
-        if not enemigos_vivos:
+        if self.enemigos.superada:
             messagebox.showinfo("Victoria", "¡Todos los enemigos eliminados!")
             self.victoria_oleada()
             return
         
-        indice = seleccion[0]
-        if indice >= len(enemigos_vivos):
+        # Cada fila de la lista guarda el id del enemigo que muestra
+        enemigo = self.enemigos.por_id(self.ids_lista_enemigos[seleccion[0]])
+        if enemigo is None or not enemigo.vivo:
             return
         
-        enemigo = enemigos_vivos[indice]
-        
-        # Disparar
-        acierto = self.catapulta.disparar(enemigo)
+        if self.motor is not None:
+            # En tiempo real el disparo sale cuando la catapulta ha recargado
+            self.motor.ordenar_disparo(enemigo.id)
+            return
         
-        if acierto and
-            self.puntos += 50
-            self.label_puntos.config(text=f"Puntos: {self.puntos}")
+        # Disparar (las bajas y la victoria llegan por al_cambiar_oleada)
+        self.catapulta.disparar(enemigo)
         
         self.actualizar_lista_enemigos()
         self.actualizar_estado()
         self.dibujar_campo_batalla()
         
-        # Verificar si quedan enemigos vivos
-        enemigos_vivos = [e for e in self.enemigos if e.vivo]
-        if not enemigos_vivos:
-            self.victoria_oleada()
-        
         # Verificar estado de la catapulta
         if self.catapulta.estado == EstadoCatapulta.DESTRUIDA:
             self.game_over()
     
+    def al_cambiar_oleada(self, tipo, oleada, enemigo):
+        """Oyente de la oleada: puntos por baja y victoria al superarla"""
+        if tipo == 'eliminado':
+            self.puntos += 50
+            self.label_puntos.config(text=f"Puntos: {self.puntos}")
+        elif tipo == 'superada':
+            # Tras terminar de procesar el disparo
+            self.root.after_idle(self.victoria_oleada)
+    
     def victoria_oleada(self):
         self.puntos += self.nivel * 100
         self.nivel += 1
@@ -402,7 +448,20 @@ class VentanaJuego:
             f"💀 La catapulta ha sido destruida\n\nNivel alcanzado: {self.nivel}\nPuntuación final: {self.puntos}\n\nPuedes repararla para continuar."
         )
     
+    def castillo_alcanzado(self):
+        self.btn_disparar.config(state="disabled")
+        self.btn_oleada.config(state="normal")
+        self.log(f"🏰 ¡Los enemigos han llegado al castillo en la oleada {self.nivel}!")
+        messagebox.showinfo(
+            "Castillo alcanzado",
+            f"🏰 Los enemigos han llegado al castillo\n\nNivel: {self.nivel}\nPuntuación: {self.puntos}\n\nPuedes volver a intentar la oleada."
+        )
+    
     def reparar_catapulta(self):
+        if self.motor is not None:
+            self.motor.ordenar_reparacion()
+            self.log("🔧 Reparación ordenada")
+            return
         if self.catapulta:
             if self.catapulta.reparar():
                 self.actualizar_estado()
@@ -526,13 +585,18 @@ class VentanaJuego:
         )
     
     def actualizar_lista_enemigos(self):
+        # Conservar la selección (por id) al rehacer la lista
+        seleccion = self.listbox_enemigos.curselection()
+        id_seleccionado = self.ids_lista_enemigos[seleccion[0]] if seleccion else None
         self.listbox_enemigos.delete(0, tk.END)
-        enemigos_vivos = [e for e in self.enemigos if e.vivo]
-        
-        for enemigo in enemigos_vivos:
+        self.ids_lista_enemigos = []
+        for enemigo in self.enemigos.vivos():
+            self.ids_lista_enemigos.append(enemigo.id)
             estado = "💀" if not enemigo.vivo else "❤️"
             texto = f"{estado} {enemigo.nombre} - HP:{enemigo.vida}/{enemigo.vida_maxima} - {enemigo.distancia}m"
             self.listbox_enemigos.insert(tk.END, texto)
+            if enemigo.id == id_seleccionado:
+                self.listbox_enemigos.selection_set(tk.END)
     
     def dibujar_campo_batalla(self):
         """Dibuja la catapulta y los enemigos en el campo de batalla"""
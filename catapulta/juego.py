@@ -2,17 +2,21 @@
 Módulo del juego principal
 """
 
+import random
+
 from .catapulta import Catapulta
-from .enemigos import generar_oleada_enemigos
+from .enemigos import Oleada, generar_oleada_enemigos
 from .catapulta import EstadoCatapulta
 
 
 class Juego:
     """Controlador principal del juego"""
     
-    def __init__(self):
+    def __init__(self, semilla=None):
+        # Generador propio de la partida: con la misma semilla se repite
+        self.rng = random.Random(semilla)
         self.catapulta = None
-        self.enemigos = []
+        self.enemigos = Oleada()
         self.nivel = 1
         self.puntos = 0
     
@@ -26,7 +30,7 @@ class Juego:
         if not nombre:
             nombre = "Mi Catapulta"
         
-        self.catapulta = Catapulta(nombre)
+        self.catapulta = Catapulta(nombre, rng=self.rng)
         
         print("\n📋 MATERIALES DISPONIBLES:")
         print("1. Palos (estructura) - Aumentan potencia")
@@ -79,8 +83,7 @@ class Juego:
                 cantidad = input("¿Cuántos corchos? (Enter para 1): ").strip()
                 try:
                     cantidad = int(cantidad) if cantidad else 1
-                    for _ in range(cantidad):
-                        self.catapulta.agregar_corcho()
+                    self.catapulta.agregar_materiales(corchos=cantidad)
                 except ValueError:
                     print("⚠ Valor inválido")
             
@@ -107,7 +110,7 @@ class Juego:
     
     def generar_enemigos(self):
         """Genera una nueva oleada de enemigos"""
-        self.enemigos = generar_oleada_enemigos(self.nivel)
+        self.enemigos = generar_oleada_enemigos(self.nivel, self.rng)
         print(f"\n⚔️  ¡Oleada {self.nivel} de enemigos!")
         print(f"   {len(self.enemigos)} enemigos se aproximan:\n")
         for i, enemigo in enumerate(self.enemigos, 1):
@@ -115,7 +118,7 @@ class Juego:
     
     def seleccionar_objetivo(self):
         """Permite al jugador seleccionar un objetivo"""
-        enemigos_vivos = [e for e in self.enemigos if e.vivo]
+        enemigos_vivos = self.enemigos.vivos()
         
         if not enemigos_vivos:
             return None
@@ -142,9 +145,7 @@ class Juego:
         print("="*60)
         
         while True:
-            enemigos_vivos = [e for e in self.enemigos if e.vivo]
-            
-            if not enemigos_vivos:
+            if self.enemigos.superada:
                 print("\n🎉 ¡Has eliminado a todos los enemigos!")
                 self.puntos += self.nivel * 100
                 self.nivel += 1
@@ -152,7 +153,7 @@ class Juego:
             
             if len(self.catapulta.corchos) == 0:
                 print("\n😢 Te has quedado sin munición...")
-                print(f"   Enemigos restantes: {len(enemigos_vivos)}")
+                print(f"   Enemigos restantes: {self.enemigos.num_vivos}")
                 return False
             
             # Verificar estado de la catapulta
@@ -161,7 +162,11 @@ class Juego:
                 return False
             
             self.catapulta.mostrar_estadisticas()
-            print(f"\n   Enemigos vivos: {len(enemigos_vivos)}/{len(self.enemigos)}")
+            print(f"\n   Enemigos vivos: {self.enemigos.num_vivos}/{len(self.enemigos)}")
+            cercano = self.enemigos.mas_cercano(self.catapulta.alcance)
+            if cercano:
+                print(f"   Al alcance: {len(self.enemigos.en_alcance(self.catapulta.alcance))} "
+                      f"(el más cercano, {cercano.nombre} a {cercano.distancia}m)")
             print(f"   Puntos: {self.puntos}")
             
             print("\n¿Qué quieres hacer?")
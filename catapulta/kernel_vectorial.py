@@ -0,0 +1,336 @@
+"""
+Núcleo de batalla vectorizado con NumPy para barridos de Monte Carlo.
+
+Guarda lotes de partidas como estructuras de arrays (una fila por partida):
+las catapultas como arrays de durabilidad, desgaste, corchos, etc., y los
+enemigos como matrices (partida × enemigo) de vida, armadura y distancia.
+Cada paso resuelve un disparo de todas las partidas activas a la vez.
+
+Las reglas son las de Catapulta.construir/disparar/reparar y las partidas
+siguen el mismo guion que simulador.Simulador, de modo que los resultados son
+estadísticamente equivalentes (ver comparar_con_modelo()).
+
+Requiere NumPy.
+"""
+
+import numpy as np
+
+from catapulta.catapulta import Catapulta
+from catapulta.enemigos import Soldado, Caballero, Arquero, Gigante
+from catapulta.materiales import Palo, Goma, Corcho
+from catapulta.simulador import EstadisticasSimulacion, Simulador
+
+
+# Estados de la catapulta dentro del núcleo
+LISTA, DANADA, DESTRUIDA = 0, 1, 2
+
+# Motivos de fin de partida (mismos nombres que el simulador)
+MOTIVOS = ['construccion_fallida', 'destruida', 'sin_municion', 'fuera_de_alcance', 'max_oleadas']
+(FIN_CONSTRUCCION, FIN_DESTRUIDA, FIN_SIN_MUNICION,
+ FIN_FUERA_DE_ALCANCE, FIN_MAX_OLEADAS) = range(len(MOTIVOS))
+EN_JUEGO = -1
+
+# Vida y armadura por tipo de enemigo (índices como en generar_oleada_enemigos)
+_TIPOS = [Soldado(0), Caballero(0), Arquero(0), Gigante(0)]
+VIDA_TIPO = np.array([e.vida_maxima for e in _TIPOS], dtype=np.int64)
+ARMADURA_TIPO = np.array([e.armadura for e in _TIPOS], dtype=np.int64)
+
+# Constantes de los materiales
+_PALO, _GOMA, _CORCHO = Palo(1), Goma(1), Corcho()
+
+POLITICAS = ('mas_cercano', 'mas_debil', 'menos_blindado', 'aleatorio')
+
+
+class KernelBatalla:
+    """
+    Lote de partidas simuladas en paralelo.
+
+    Parámetros:
+        construcciones: lista de simulador.Construccion
+        n_partidas: partidas por construcción
+        politica, reparar, max_oleadas, max_intentos_construccion: como en Simulador
+        semilla: semilla del generador de NumPy
+    """
+
+    def __init__(self, construcciones, n_partidas, politica='mas_cercano', reparar=True,
+                 max_oleadas=50, max_intentos_construccion=20, semilla=None):
+        if politica not in POLITICAS:
+            raise ValueError(f"Política no soportada por el núcleo: {politica}")
+        self.construcciones = list(construcciones)
+        self.n_partidas = n_partidas
+        self.politica = politica
+        self.reparar = reparar
+        self.max_oleadas = max_oleadas
+        self.max_intentos = max_intentos_construccion
+        self.rng = np.random.default_rng(semilla)
+
+        n_grupos = len(self.construcciones)
+        n = n_grupos * n_partidas
+        self.n = n
+        self.grupo = np.repeat(np.arange(n_grupos), n_partidas)
+
+        # --- Catapultas: bases constantes por construcción ---
+        def por_partida(valores, dtype=np.float64):
+            return np.repeat(np.asarray(valores, dtype=dtype), n_partidas)
+
+        c = self.construcciones
+        calidad = [x.pegamento or 0 for x in c]
+        self.potencia_total = por_partida([
+            sum(l * 2 for l in x.palos) + sum(g * 5 for g in x.gomas) + (x.pegamento or 0) * 2 for x in c])
+        self.alcance_base = por_partida([
+            sum(x.palos) * 0.5 + sum(x.gomas) * 3 for x in c])
+        self.precision_base = por_partida([
+            50 + x.tapones * 10 + q * 5 for x, q in zip(c, calidad)], np.int64)
+        self.prob_construccion = por_partida([
+            min(95, 50 + x.tapones * 10 + q * 3) for x, q in zip(c, calidad)], np.int64)
+        self.construible = por_partida([
+            len(x.palos) >= 2 and len(x.gomas) >= 1 and x.pegamento and x.corchos >= 1 for x in c], bool)
+        self.durabilidad_maxima = por_partida([
+            min(Catapulta.DURABILIDAD_MAXIMA,
+                len(x.palos) * _PALO.resistencia + len(x.gomas) * _GOMA.resistencia
+                + (q * 2) + x.tapones * 10)
+            for x, q in zip(c, calidad)])
+
+        # --- Catapultas: estado variable ---
+        self.durabilidad = self.durabilidad_maxima.copy()
+        self.desgaste = np.zeros(n, dtype=np.int64)
+        self.corchos = por_partida([x.corchos for x in c], np.int64)
+        self.estado = np.full(n, LISTA, dtype=np.int8)
+
+        # --- Enemigos: matrices partida × enemigo ---
+        self.ancho = 3 + max_oleadas
+        forma = (n, self.ancho)
+        self.vida = np.zeros(forma, dtype=np.int64)
+        self.armadura = np.zeros(forma, dtype=np.int64)
+        self.distancia = np.zeros(forma, dtype=np.int64)
+        self.vivo = np.zeros(forma, dtype=bool)
+        self.nivel = np.zeros(n, dtype=np.int64)
+
+        # --- Resultados por partida ---
+        self.intentos = np.zeros(n, dtype=np.int64)
+        self.oleadas = np.zeros(n, dtype=np.int64)
+        self.disparos = np.zeros(n, dtype=np.int64)
+        self.aciertos = np.zeros(n, dtype=np.int64)
+        self.bajas = np.zeros(n, dtype=np.int64)
+        self.reparaciones = np.zeros(n, dtype=np.int64)
+        self.puntos = np.zeros(n, dtype=np.int64)
+        self.motivo = np.full(n, EN_JUEGO, dtype=np.int8)
+
+        # Curva de durabilidad: suma de % y partidas por (grupo, índice de disparo)
+        self._suma_curva = np.zeros((n_grupos, 64))
+        self._n_curva = np.zeros((n_grupos, 64), dtype=np.int64)
+
+    # === CARACTERÍSTICAS (vectorizadas) ===
+
+    def _factor_durabilidad(self):
+        return ((self.durabilidad / self.durabilidad_maxima) * 100) / 100
+
+    def potencia(self):
+        return (self.potencia_total * self._factor_durabilidad()).astype(np.int64)
+
+    def alcance(self):
+        return (self.alcance_base * self._factor_durabilidad()).astype(np.int64)
+
+    def precision(self):
+        return np.maximum(5, np.minimum(95, self.precision_base - self.desgaste * 2))
+
+    # === COMPORTAMIENTO (vectorizado) ===
+
+    def _construir(self):
+        """Resuelve los intentos de construcción de todas las partidas"""
+        intentos = self.rng.geometric(self.prob_construccion / 100)
+        exito = self.construible & (intentos <= self.max_intentos)
+        self.intentos = np.where(exito, intentos, self.max_intentos)
+        self.motivo[~exito] = FIN_CONSTRUCCION
+
+    def _generar_oleadas(self, filas):
+        """Genera una oleada de nivel self.nivel en las filas indicadas"""
+        niveles = self.nivel[filas]
+        n_tipos = np.where(niveles >= 3, 4, 3)
+        tipos = (self.rng.random((len(filas), self.ancho)) * n_tipos[:, None]).astype(np.int64)
+        self.vida[filas] = VIDA_TIPO[tipos]
+        self.armadura[filas] = ARMADURA_TIPO[tipos]
+        self.distancia[filas] = self.rng.integers(10, 51, size=(len(filas), self.ancho))
+        self.vivo[filas] = np.arange(self.ancho) < (3 + niveles)[:, None]
+
+    def _reparar(self, mascara):
+        """Repara donde indica la máscara y haya corchos. Retorna las filas reparadas"""
+        costo = np.where(self.estado == DESTRUIDA, 3, 1)
+        reparan = mascara & (self.corchos >= costo)
+        if not reparan.any():
+            return reparan
+
+        self.corchos[reparan] -= costo[reparan]
+        restauracion = self.durabilidad_maxima * 0.5
+        self.durabilidad = np.where(
+            reparan, np.minimum(self.durabilidad_maxima, self.durabilidad + restauracion), self.durabilidad)
+        self.desgaste[reparan] = np.maximum(0, self.desgaste[reparan] - 5)
+
+        porcentaje = (self.durabilidad / self.durabilidad_maxima) * 100
+        a_lista = reparan & ((self.estado == DESTRUIDA) | ((self.estado == DANADA) & (porcentaje > 50)))
+        self.estado[a_lista] = LISTA
+        self.reparaciones += reparan
+        return reparan
+
+    def _aplicar_desgaste(self, filas):
+        self.durabilidad[filas] -= Catapulta.DESGASTE_POR_DISPARO
+        self.desgaste[filas] += 1
+        destruida = filas & (self.durabilidad <= 0)
+        self.durabilidad[destruida] = 0
+        self.estado[destruida] = DESTRUIDA
+        danada = filas & ~destruida & (self.durabilidad < self.durabilidad_maxima * 0.3)
+        self.estado[danada] = DANADA
+
+    def _elegir_objetivos(self, en_rango, filas):
+        """Índice de enemigo objetivo en cada fila según la política"""
+        if self.politica == 'mas_cercano':
+            clave = self.distancia[filas]
+        elif self.politica == 'mas_debil':
+            clave = self.vida[filas] * 1000 + self.distancia[filas]
+        elif self.politica == 'menos_blindado':
+            clave = self.armadura[filas] * 1000 + self.vida[filas]
+        else:
+            clave = self.rng.random(en_rango.shape)
+        clave = np.where(en_rango, clave, np.iinfo(np.int64).max if clave.dtype != np.float64 else np.inf)
+        return np.argmin(clave, axis=1)
+
+    def _registrar_curva(self, filas):
+        """Acumula la durabilidad (%) tras el disparo de las filas indicadas"""
+        indices = self.disparos[filas] - 1
+        largo = int(indices.max()) + 1
+        if largo > self._suma_curva.shape[1]:
+            nuevo = max(largo, self._suma_curva.shape[1] * 2)
+            extra = nuevo - self._suma_curva.shape[1]
+            self._suma_curva = np.pad(self._suma_curva, ((0, 0), (0, extra)))
+            self._n_curva = np.pad(self._n_curva, ((0, 0), (0, extra)))
+        grupos = self.grupo[filas]
+        porcentaje = (self.durabilidad[filas] / self.durabilidad_maxima[filas]) * 100
+        np.add.at(self._suma_curva, (grupos, indices), porcentaje)
+        np.add.at(self._n_curva, (grupos, indices), 1)
+
+    def _paso(self):
+        """Un paso de todas las partidas activas. Retorna cuántas siguen activas"""
+        activas = self.motivo == EN_JUEGO
+
+        # Oleadas superadas (o primera oleada): generar la siguiente
+        limpias = activas & ~self.vivo.any(axis=1)
+        if limpias.any():
+            superadas = limpias & (self.nivel > 0)
+            self.oleadas[superadas] += 1
+            self.puntos[superadas] += self.nivel[superadas] * 100
+            terminadas = superadas & (self.oleadas >= self.max_oleadas)
+            self.motivo[terminadas] = FIN_MAX_OLEADAS
+            activas &= ~terminadas
+            nuevas = limpias & activas
+            self.nivel[nuevas] += 1
+            self._generar_oleadas(np.flatnonzero(nuevas))
+
+        if self.reparar:
+            self._reparar(activas & (self.estado != LISTA))
+
+        destruidas = activas & (self.estado == DESTRUIDA)
+        self.motivo[destruidas] = FIN_DESTRUIDA
+        activas &= ~destruidas
+        sin_municion = activas & (self.corchos == 0)
+        self.motivo[sin_municion] = FIN_SIN_MUNICION
+        activas &= ~sin_municion
+
+        en_rango = self.vivo & (self.distancia <= self.alcance()[:, None])
+        hay_objetivo = en_rango.any(axis=1)
+        sin_objetivo = activas & ~hay_objetivo
+        if self.reparar:
+            # El alcance depende de la durabilidad: reparar puede recuperarlo
+            reparadas = self._reparar(sin_objetivo & (self.durabilidad < self.durabilidad_maxima))
+            sin_objetivo &= ~reparadas
+        self.motivo[sin_objetivo] = FIN_FUERA_DE_ALCANCE
+
+        tiradores = activas & hay_objetivo
+        filas = np.flatnonzero(tiradores)
+        if len(filas):
+            objetivo = self._elegir_objetivos(en_rango[filas], filas)
+            precision = self.precision()[filas]
+            danio = _CORCHO.danio + self.potencia()[filas] // 10
+            aciertos = self.rng.integers(1, 101, size=len(filas)) <= precision
+
+            f_acierto, o_acierto = filas[aciertos], objetivo[aciertos]
+            self.corchos[f_acierto] -= 1
+            danio_real = np.maximum(0, danio[aciertos] - self.armadura[f_acierto, o_acierto])
+            vida = self.vida[f_acierto, o_acierto] - danio_real
+            muertos = vida <= 0
+            self.vida[f_acierto, o_acierto] = np.maximum(vida, 0)
+            self.vivo[f_acierto[muertos], o_acierto[muertos]] = False
+
+            self.aciertos[f_acierto] += 1
+            self.bajas[f_acierto[muertos]] += 1
+            self.puntos[f_acierto[muertos]] += 50
+            self.disparos[filas] += 1
+            self._aplicar_desgaste(tiradores)
+            self._registrar_curva(filas)
+
+        return int((self.motivo == EN_JUEGO).sum())
+
+    def ejecutar(self):
+        """Juega todas las partidas hasta el final. Retorna una EstadisticasSimulacion por construcción"""
+        self._construir()
+        while self._paso():
+            pass
+        return [self._estadisticas(g) for g in range(len(self.construcciones))]
+
+    def _estadisticas(self, g):
+        """Agrega los resultados de un grupo en una EstadisticasSimulacion"""
+        filas = self.grupo == g
+        e = EstadisticasSimulacion()
+        e.partidas = int(filas.sum())
+        e.construcciones_fallidas = int((self.motivo[filas] == FIN_CONSTRUCCION).sum())
+        e.intentos_construccion = int(self.intentos[filas].sum())
+        oleadas = self.oleadas[filas]
+        e.oleadas_superadas = int(oleadas.sum())
+        e.max_oleadas_superadas = int(oleadas.max()) if len(oleadas) else 0
+        e.distribucion_oleadas = {i: int(n) for i, n in enumerate(np.bincount(oleadas)) if n}
+        e.disparos = int(self.disparos[filas].sum())
+        e.aciertos = int(self.aciertos[filas].sum())
+        e.bajas = int(self.bajas[filas].sum())
+        e.reparaciones = int(self.reparaciones[filas].sum())
+        e.puntos = int(self.puntos[filas].sum())
+        e.motivos_fin = {MOTIVOS[m]: int(n) for m, n in enumerate(np.bincount(self.motivo[filas],
+                                                                             minlength=len(MOTIVOS))) if n}
+        usados = self._n_curva[g] > 0
+        e._suma_durabilidad = self._suma_curva[g][usados].tolist()
+        e._partidas_por_disparo = self._n_curva[g][usados].tolist()
+        return e
+
+
+def simular_lote(construcciones, n_partidas=1000, politica='mas_cercano', semilla=None, **opciones):
+    """Atajo: simula `n_partidas` por construcción con el núcleo vectorizado"""
+    return KernelBatalla(construcciones, n_partidas, politica, semilla=semilla, **opciones).ejecutar()
+
+
+# === EQUIVALENCIA CON EL MODELO DE OBJETOS ===
+
+def comparar_con_modelo(construccion, n_partidas=2000, politica='mas_cercano', semilla=0,
+                        tolerancia=0.05, **opciones):
+    """
+    Simula la misma construcción con el modelo de objetos (Simulador) y con el
+    núcleo, y compara las métricas principales.
+
+    Retorna un diccionario {métrica: (modelo, núcleo, coincide)}; una métrica
+    coincide si la diferencia relativa es menor que `tolerancia` (o la
+    absoluta, para valores cercanos a cero).
+    """
+    modelo = Simulador(politica, semilla=semilla, **opciones).simular(construccion, n_partidas)
+    nucleo = simular_lote([construccion], n_partidas, politica, semilla=semilla, **opciones)[0]
+
+    metricas = {
+        'media_oleadas_superadas': lambda e: e.media_oleadas_superadas,
+        'disparos_por_baja': lambda e: e.disparos_por_baja,
+        'tasa_acierto': lambda e: e.tasa_acierto,
+        'disparos_por_partida': lambda e: e.disparos / e.partidas,
+        'reparaciones_por_partida': lambda e: e.reparaciones / e.partidas,
+        'construcciones_fallidas': lambda e: e.construcciones_fallidas / e.partidas,
+    }
+    comparacion = {}
+    for nombre, calcular in metricas.items():
+        a, b = calcular(modelo), calcular(nucleo)
+        escala = max(abs(a), abs(b), 1)
+        comparacion[nombre] = (a, b, abs(a - b) <= tolerancia * escala)
+    return comparacion
@@ -2,8 +2,16 @@
 Módulo que define los materiales para construir la catapulta
 """
 
+from array import array
+import itertools
+import math
+import numbers
+
+
 class Material:
     """Clase base para todos los materiales"""
+    __slots__ = ('nombre', 'resistencia', 'peso')
+
     def __init__(self, nombre, resistencia, peso):
         self.nombre = nombre
         self.resistencia = resistencia
@@ -15,6 +23,9 @@ class Material:
 
 class Palo(Material):
     """Material para la estructura de la catapulta"""
+    __slots__ = ('longitud', 'potencia_base')
+    PARAMETRO = 'longitud'
+
     def __init__(self, longitud):
         super().__init__("Palo", resistencia=10, peso=5)
         self.longitud = longitud
@@ -26,6 +37,9 @@ class Palo(Material):
 
 class Goma(Material):
     """Material elástico para proporcionar impulso"""
+    __slots__ = ('elasticidad', 'impulso')
+    PARAMETRO = 'elasticidad'
+
     def __init__(self, elasticidad):
         super().__init__("Goma", resistencia=5, peso=1)
         self.elasticidad = elasticidad  # 1-10
@@ -37,6 +51,8 @@ class Goma(Material):
 
 class Tapon(Material):
     """Material para reforzar las uniones"""
+    __slots__ = ('estabilidad',)
+
     def __init__(self):
         super().__init__("Tapón", resistencia=8, peso=2)
         self.estabilidad = 3
@@ -47,6 +63,8 @@ class Tapon(Material):
 
 class Corcho(Material):
     """Proyectil ligero"""
+    __slots__ = ('danio',)
+
     def __init__(self):
         super().__init__("Corcho", resistencia=2, peso=1)
         self.danio = 5
@@ -57,6 +75,9 @@ class Corcho(Material):
 
 class Pegamento(Material):
     """Material para unir componentes"""
+    __slots__ = ('calidad', 'union')
+    PARAMETRO = 'calidad'
+
     def __init__(self, calidad):
         super().__init__("Pegamento", resistencia=calidad * 2, peso=0.5)
         self.calidad = calidad  # 1-10
@@ -64,3 +85,161 @@ class Pegamento(Material):
     
     def __str__(self):
         return f"{super().__str__()}, Calidad: {self.calidad}"
+
+
+# === INVENTARIOS ===
+# Se usan como listas de materiales (len, iteración, índices, append, pop),
+# pero sin guardar un objeto por unidad.
+
+class Existencias:
+    """
+    Inventario de materiales idénticos (tapones, corchos): guarda cuántos hay
+    y un único ejemplar, que es el que se entrega al iterar o al sacar uno.
+    """
+    __slots__ = ('ejemplar', '_cantidad')
+
+    def __init__(self, ejemplar, cantidad=0):
+        self.ejemplar = ejemplar
+        self._cantidad = cantidad
+
+    def __len__(self):
+        return self._cantidad
+
+    def __iter__(self):
+        return itertools.repeat(self.ejemplar, self._cantidad)
+
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            return [self.ejemplar] * len(range(*indice.indices(self._cantidad)))
+        if not -self._cantidad <= indice < self._cantidad:
+            raise IndexError("índice fuera del inventario")
+        return self.ejemplar
+
+    def append(self, material=None):
+        """Agrega una unidad"""
+        self._cantidad += 1
+
+    def extend(self, materiales):
+        """Agrega una unidad por cada material"""
+        self._cantidad += sum(1 for _ in materiales)
+
+    def agregar(self, cantidad):
+        """Agrega `cantidad` unidades de una vez"""
+        if cantidad < 0:
+            raise ValueError("La cantidad no puede ser negativa")
+        self._cantidad += cantidad
+
+    def pop(self, indice=-1):
+        """Saca una unidad (todas son iguales: el índice solo se valida)"""
+        if not -self._cantidad <= indice < self._cantidad:
+            raise IndexError("no quedan materiales" if not self._cantidad else "índice fuera del inventario")
+        self._cantidad -= 1
+        return self.ejemplar
+
+    def consumir(self, cantidad):
+        """Saca `cantidad` unidades de una vez. Retorna False (sin sacar nada) si no hay tantas"""
+        if cantidad < 0:
+            raise ValueError("La cantidad no puede ser negativa")
+        if cantidad > self._cantidad:
+            return False
+        self._cantidad -= cantidad
+        return True
+
+    def clear(self):
+        self._cantidad = 0
+
+    def __repr__(self):
+        return f"Existencias({self.ejemplar.nombre} x {self._cantidad})"
+
+
+class Municion(Existencias):
+    """
+    Cola de munición: los disparos la consumen por el frente y las
+    reparaciones por el final. Como todos los corchos son iguales, ambos
+    extremos son el mismo contador y cualquier consumo cuesta O(1).
+    """
+    __slots__ = ()
+
+    def sacar(self):
+        """Saca el siguiente proyectil (por el frente); None si no queda munición"""
+        if not self._cantidad:
+            return None
+        self._cantidad -= 1
+        return self.ejemplar
+
+    def __repr__(self):
+        return f"Municion({self.ejemplar.nombre} x {self._cantidad})"
+
+
+class ListaMateriales:
+    """
+    Inventario de materiales con un parámetro (palos por su longitud, gomas
+    por su elasticidad): guarda los parámetros en un array tipado y crea el
+    objeto del material solo cuando se pide.
+
+    El array empieza como enteros de 32 bits y se amplía (a 'q' o a 'd')
+    cuando llega un valor que no cabe, así que se admite cualquier número
+    real finito, como con las listas de antes.
+    """
+    __slots__ = ('clase', 'valores')
+
+    def __init__(self, clase, valores=(), codigo='i'):
+        self.clase = clase
+        if isinstance(valores, array):
+            self.valores = array(valores.typecode, valores)
+            return
+        try:
+            self.valores = array(codigo, valores)
+        except (TypeError, OverflowError):
+            self.valores = array(codigo)
+            for valor in valores:
+                self._agregar_valor(valor)
+
+    @staticmethod
+    def admite(valor):
+        """True si `valor` se puede guardar como parámetro (un número real finito)"""
+        if not isinstance(valor, numbers.Real):
+            return False
+        try:
+            return math.isfinite(valor)
+        except OverflowError:
+            return False  # entero demasiado grande incluso para un float
+
+    def _agregar_valor(self, valor):
+        try:
+            self.valores.append(valor)
+        except (TypeError, OverflowError):
+            if not self.admite(valor):
+                raise ValueError(f"{self.clase.PARAMETRO} inválida: {valor!r}") from None
+            entero = isinstance(valor, numbers.Integral) and self.valores.typecode != 'd'
+            codigo = 'q' if entero and -2 ** 63 <= valor < 2 ** 63 else 'd'
+            self.valores = array(codigo, self.valores)
+            self.valores.append(valor)
+
+    def __len__(self):
+        return len(self.valores)
+
+    def __iter__(self):
+        return map(self.clase, self.valores)
+
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            return [self.clase(valor) for valor in self.valores[indice]]
+        return self.clase(self.valores[indice])
+
+    def append(self, material):
+        """Agrega un material (se guarda solo su parámetro)"""
+        self._agregar_valor(getattr(material, self.clase.PARAMETRO))
+
+    def extend(self, materiales):
+        for material in materiales:
+            self.append(material)
+
+    def pop(self, indice=-1):
+        return self.clase(self.valores.pop(indice))
+
+    def clear(self):
+        del self.valores[:]
+
+    def __repr__(self):
+        return f"ListaMateriales({self.clase.__name__}, {list(self.valores)})"
@@ -0,0 +1,238 @@
+"""
+Métricas del servidor en formato de texto de Prometheus.
+
+Un RegistroMetricas guarda contadores, histogramas y medidores calculados al
+exportar (por ejemplo, los juegos vivos del almacén), y los escribe con
+exponer() en el formato que lee Prometheus.
+
+instalar(app, obtener_almacen, versiones) instrumenta el servidor Flask:
+latencia por ruta, tiempo de serialización del estado (el de su
+CacheVersiones) y de las respuestas JSON, y métricas del almacén, servidas
+en /metrics. Los disparos los cuenta el servidor donde los hace (acciones y
+motor de tiempo real) con contar_disparo().
+
+Con CATAPULTA_METRICAS=0 no se instala nada: ni hooks de Flask ni
+envoltorios, así que apagarlas no cuesta nada (y /metrics no existe).
+"""
+
+from bisect import bisect_left
+import functools
+import os
+import threading
+import time
+
+
+# Límites (segundos) de las cubetas de los histogramas de latencia
+CUBETAS_LATENCIA = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+# Límites (segundos) de las cubetas de los tiempos de serialización
+CUBETAS_SERIALIZACION = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025)
+
+
+def activas():
+    """True salvo que CATAPULTA_METRICAS las apague ('0', 'no', 'false', 'off')"""
+    return os.environ.get('CATAPULTA_METRICAS', '1').lower() not in ('0', 'no', 'false', 'off')
+
+
+class Histograma:
+    """Histograma acumulado de Prometheus para un conjunto de etiquetas"""
+
+    __slots__ = ('limites', 'cubetas', 'suma', 'cuenta')
+
+    def __init__(self, limites):
+        self.limites = limites
+        self.cubetas = [0] * (len(limites) + 1)  # la última es +Inf
+        self.suma = 0.0
+        self.cuenta = 0
+
+    def observar(self, valor):
+        self.cubetas[bisect_left(self.limites, valor)] += 1
+        self.suma += valor
+        self.cuenta += 1
+
+
+class RegistroMetricas:
+    """
+    Métricas con nombre y etiquetas.
+
+    Los contadores e histogramas se crean al primer uso; las etiquetas van
+    como tupla de pares ordenada (('ruta', '/api/disparar'),). Un lock
+    protege las actualizaciones (varios hilos atienden peticiones).
+    """
+
+    def __init__(self):
+        self._ayuda = {}  # nombre -> (tipo, texto de ayuda)
+        self._contadores = {}  # (nombre, etiquetas) -> valor
+        self._histogramas = {}  # (nombre, etiquetas) -> Histograma
+        self._limites = {}  # nombre de histograma -> límites de sus cubetas
+        self._medidores = {}  # nombre -> función sin argumentos que da el valor
+        self._lock = threading.Lock()
+
+    def contador(self, nombre, ayuda):
+        self._ayuda[nombre] = ('counter', ayuda)
+
+    def histograma(self, nombre, ayuda, limites):
+        self._ayuda[nombre] = ('histogram', ayuda)
+        self._limites[nombre] = tuple(limites)
+
+    def medidor(self, nombre, ayuda, funcion, tipo='gauge'):
+        """
+        Métrica cuyo valor se calcula al exportar (funcion() -> número o dict
+        etiquetas -> número). Con tipo='counter' sirve para contadores que ya
+        lleva otro objeto (como las operaciones del almacén).
+        """
+        self._ayuda[nombre] = (tipo, ayuda)
+        self._medidores[nombre] = funcion
+
+    def incrementar(self, nombre, etiquetas=(), cantidad=1):
+        clave = (nombre, etiquetas)
+        with self._lock:
+            self._contadores[clave] = self._contadores.get(clave, 0) + cantidad
+
+    def observar(self, nombre, etiquetas, valor):
+        clave = (nombre, etiquetas)
+        with self._lock:
+            histograma = self._histogramas.get(clave)
+            if histograma is None:
+                histograma = self._histogramas[clave] = Histograma(self._limites[nombre])
+            histograma.observar(valor)
+
+    def exponer(self):
+        """Retorna todas las métricas en el formato de texto de Prometheus"""
+        with self._lock:
+            contadores = dict(self._contadores)
+            histogramas = {clave: (list(h.cubetas), h.suma, h.cuenta)
+                           for clave, h in self._histogramas.items()}
+
+        lineas = []
+        for nombre, (tipo, ayuda) in self._ayuda.items():
+            lineas.append(f"# HELP {nombre} {ayuda}")
+            lineas.append(f"# TYPE {nombre} {tipo}")
+            if nombre in self._medidores:
+                valor = self._medidores[nombre]()
+                if isinstance(valor, dict):
+                    for etiquetas, v in valor.items():
+                        lineas.append(f"{nombre}{_etiquetas(etiquetas)} {v}")
+                else:
+                    lineas.append(f"{nombre} {valor}")
+            elif tipo == 'counter':
+                for (n, etiquetas), valor in contadores.items():
+                    if n == nombre:
+                        lineas.append(f"{nombre}{_etiquetas(etiquetas)} {valor}")
+            else:
+                limites = self._limites[nombre]
+                for (n, etiquetas), (cubetas, suma, cuenta) in histogramas.items():
+                    if n != nombre:
+                        continue
+                    acumulado = 0
+                    for limite, en_cubeta in zip(limites + (float('inf'),), cubetas):
+                        acumulado += en_cubeta
+                        le = '+Inf' if limite == float('inf') else repr(limite)
+                        lineas.append(f"{nombre}_bucket{_etiquetas(etiquetas + (('le', le),))} {acumulado}")
+                    lineas.append(f"{nombre}_sum{_etiquetas(etiquetas)} {suma}")
+                    lineas.append(f"{nombre}_count{_etiquetas(etiquetas)} {cuenta}")
+        return "\n".join(lineas) + "\n"
+
+
+def _etiquetas(etiquetas):
+    if not etiquetas:
+        return ""
+    pares = ",".join(f'{clave}="{_escapar(valor)}"' for clave, valor in etiquetas)
+    return "{" + pares + "}"
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# === INSTRUMENTACIÓN ===
+
+# Contador de cada tipo de disparo
+DISPAROS = {
+    'disparar': 'catapulta_disparos_total',
+    'disparar_area': 'catapulta_disparos_area_total',
+}
+
+
+def contar_disparo(registro, tipo, acierto):
+    """Cuenta un disparo ('disparar' o 'disparar_area') por resultado"""
+    registro.incrementar(DISPAROS[tipo], (('resultado', 'acierto' if acierto else 'fallo'),))
+
+
+def medir_tiempo(registro, nombre, etiquetas):
+    """Decorador: observa la duración de cada llamada en el histograma `nombre`"""
+    def decorador(funcion):
+        @functools.wraps(funcion)
+        def envoltorio(*args, **kwargs):
+            inicio = time.perf_counter()
+            try:
+                return funcion(*args, **kwargs)
+            finally:
+                registro.observar(nombre, etiquetas, time.perf_counter() - inicio)
+        envoltorio.sin_medir = funcion
+        return envoltorio
+    return decorador
+
+
+def instalar(app, obtener_almacen, versiones=None):
+    """
+    Instrumenta la aplicación Flask y sirve las métricas en /metrics.
+    `obtener_almacen()` retorna el almacén de juegos actual; si se pasa
+    `versiones` (la CacheVersiones del servidor), se mide su serialización.
+    Retorna el RegistroMetricas, con el que el servidor cuenta los disparos.
+    """
+    from flask import Response, g, request
+    from flask.json.provider import DefaultJSONProvider
+
+    registro = RegistroMetricas()
+    registro.histograma('catapulta_peticion_segundos', "Latencia de las peticiones por ruta",
+                        CUBETAS_LATENCIA)
+    registro.contador('catapulta_peticiones_total', "Peticiones atendidas por ruta y código")
+    registro.histograma('catapulta_serializacion_segundos',
+                        "Tiempo de serialización: estado del juego (estado) y respuestas JSON (json)",
+                        CUBETAS_SERIALIZACION)
+    registro.contador('catapulta_disparos_total', "Disparos a un enemigo por resultado")
+    registro.contador('catapulta_disparos_area_total', "Disparos de área por resultado")
+    registro.medidor('catapulta_juegos_vivos', "Juegos en el almacén", lambda: len(obtener_almacen()))
+    registro.medidor('catapulta_almacen_operaciones_total', "Aciertos, fallos y expulsiones del almacén",
+                     lambda: {(('tipo', tipo),): n for tipo, n in obtener_almacen().metricas().items()
+                              if tipo != 'juegos'},
+                     tipo='counter')
+
+    # Latencia por ruta (la regla, no la URL, para no multiplicar las series)
+    @app.before_request
+    def _empezar_medida():
+        g.inicio_peticion = time.perf_counter()
+
+    @app.after_request
+    def _terminar_medida(respuesta):
+        inicio = g.pop('inicio_peticion', None)
+        if inicio is not None:
+            ruta = request.url_rule.rule if request.url_rule is not None else 'desconocida'
+            registro.observar('catapulta_peticion_segundos', (('ruta', ruta),), time.perf_counter() - inicio)
+            registro.incrementar('catapulta_peticiones_total',
+                                 (('ruta', ruta), ('codigo', str(respuesta.status_code))))
+        return respuesta
+
+    # Serialización: el estado del juego (solo el de esta caché) y el JSON
+    # de las respuestas de Flask
+    if versiones is not None:
+        versiones.serializar = medir_tiempo(
+            registro, 'catapulta_serializacion_segundos', (('tipo', 'estado'),))(versiones.serializar)
+
+    class ProveedorJSONMedido(DefaultJSONProvider):
+        def dumps(self, obj, **kwargs):
+            inicio = time.perf_counter()
+            try:
+                return super().dumps(obj, **kwargs)
+            finally:
+                registro.observar('catapulta_serializacion_segundos', (('tipo', 'json'),),
+                                  time.perf_counter() - inicio)
+
+    app.json = ProveedorJSONMedido(app)
+
+    @app.route('/metrics')
+    def metrics():
+        """Métricas en formato de texto de Prometheus"""
+        return Response(registro.exponer(), mimetype='text/plain; version=0.0.4')
+
+    return registro
@@ -0,0 +1,278 @@
+"""
+Oleadas masivas (modo horda).
+
+Una OleadaMasiva guarda sus enemigos por columnas (tipo, distancia y vida en
+arrays tipados) en lugar de como un objeto por enemigo, y los tipos y las
+distancias se sortean en bloque. El objeto Enemigo de cada uno (una vista
+sobre las columnas) solo se crea cuando alguien lo pide, por ejemplo una
+interfaz que lo muestra o la catapulta que le dispara.
+
+Se usa igual que una Oleada (len, iteración, por_id, num_vivos, superada,
+en_alcance, mas_cercano, oyentes), así que los frontales y el simulador no
+necesitan saber qué tipo de oleada tienen.
+
+Ejemplo:
+    oleada = generar_oleada_masiva(nivel=40, num_enemigos=100_000, rng=rng)
+"""
+
+from array import array
+import random
+
+from catapulta.enemigos import (
+    Enemigo, Oleada, Soldado, Caballero, Arquero, Gigante, DISTANCIA_MINIMA, DISTANCIA_MAXIMA
+)
+
+
+# Tipos de enemigo por código (mismo orden que generar_oleada_enemigos)
+TIPOS = [Soldado, Caballero, Arquero, Gigante]
+_PROTOTIPOS = [tipo(0) for tipo in TIPOS]
+
+
+class EnemigoHorda(Enemigo):
+    """Vista de un enemigo de una OleadaMasiva: lee y escribe sus columnas"""
+
+    def __init__(self, oleada, id_enemigo):
+        prototipo = _PROTOTIPOS[oleada.tipos[id_enemigo]]
+        self.oleada = oleada
+        self.id = id_enemigo
+        self.nombre = prototipo.nombre
+        self.vida_maxima = prototipo.vida_maxima
+        self.armadura = prototipo.armadura
+
+    @property
+    def vida(self):
+        return self.oleada.vidas[self.id]
+
+    @vida.setter
+    def vida(self, valor):
+        self.oleada.vidas[self.id] = valor
+
+    @property
+    def distancia(self):
+        return self.oleada.distancias[self.id]
+
+    @property
+    def vivo(self):
+        return self.oleada.vidas[self.id] > 0
+
+    @vivo.setter
+    def vivo(self, valor):
+        # Se deduce de la vida (Enemigo.recibir_danio lo asigna al morir)
+        pass
+
+
+class OleadaMasiva(Oleada):
+    """
+    Oleada guardada por columnas.
+
+    Atributos:
+        tipos: array con el código (índice en TIPOS) de cada enemigo
+        distancias: array con la distancia de cada enemigo
+        vidas: array con la vida actual de cada enemigo
+
+    Los ids se ordenan una vez por (distancia, id) y se agrupan en cubetas
+    por distancia (las distancias son enteros en un rango pequeño), con el
+    número de vivos de cada una y un puntero a su primer vivo: contar y
+    buscar el más cercano no recorren la oleada, y listar los que están al
+    alcance solo recorre sus cubetas.
+    """
+
+    def __init__(self, tipos, distancias, vidas=None):
+        self.tipos = array('b', tipos)
+        self.distancias = array('h', distancias)
+        if vidas is None:
+            vida_tipo = [prototipo.vida_maxima for prototipo in _PROTOTIPOS]
+            vidas = (vida_tipo[codigo] for codigo in self.tipos)
+        self.vidas = array('h', vidas)
+        self._vistas = {}
+        self._oyentes = []
+
+        # 1 si el enemigo está vivo y contado en su cubeta
+        self._contado = bytearray(vida > 0 for vida in self.vidas)
+        self._num_vivos = sum(self._contado)
+
+        # Ids ordenados por (distancia, id) y, por distancia, su tramo
+        # [inicio, fin) en ese orden, sus vivos y el puntero a su primer vivo
+        self._orden = array('i', sorted(range(len(self.tipos)), key=self.distancias.__getitem__))
+        self._distancias_ordenadas = []
+        self._tramos = {}
+        self._vivos_cubeta = {}
+        self._primero = {}
+        for posicion, i in enumerate(self._orden):
+            distancia = self.distancias[i]
+            if distancia not in self._tramos:
+                self._distancias_ordenadas.append(distancia)
+                self._tramos[distancia] = [posicion, posicion]
+                self._vivos_cubeta[distancia] = 0
+                self._primero[distancia] = posicion
+            self._tramos[distancia][1] = posicion + 1
+            self._vivos_cubeta[distancia] += self._contado[i]
+
+    # === VISTAS ===
+
+    def vista(self, id_enemigo):
+        """El Enemigo (vista sobre las columnas) con ese id; se crea una sola vez"""
+        enemigo = self._vistas.get(id_enemigo)
+        if enemigo is None:
+            enemigo = self._vistas[id_enemigo] = EnemigoHorda(self, id_enemigo)
+        return enemigo
+
+    @property
+    def enemigos(self):
+        """Todos los enemigos como vistas (las materializa)"""
+        return [self.vista(i) for i in range(len(self.tipos))]
+
+    def _al_eliminar(self, enemigo):
+        if not self._contado[enemigo.id]:
+            return
+        self._contado[enemigo.id] = 0
+        self._vivos_cubeta[enemigo.distancia] -= 1
+        self._num_vivos -= 1
+
+        self._avisar('eliminado', enemigo)
+        if not self._num_vivos:
+            self._avisar('superada', None)
+
+    def danar(self, id_enemigo, danio):
+        """Aplica daño a un enemigo sin crear su vista si sobrevive. Retorna True si muere"""
+        danio_real = max(0, danio - _PROTOTIPOS[self.tipos[id_enemigo]].armadura)
+        vida = self.vidas[id_enemigo]
+        if vida <= 0:
+            return False
+        if vida > danio_real:
+            self.vidas[id_enemigo] = vida - danio_real
+            return False
+        self.vidas[id_enemigo] = 0
+        self._al_eliminar(self.vista(id_enemigo))
+        return True
+
+    def danar_area(self, centro, radio, danio):
+        """
+        Como Oleada.danar_area, directamente sobre las columnas: solo se crea
+        la vista de los enemigos que mueren (para avisar a los oyentes).
+        """
+        armaduras = [prototipo.armadura for prototipo in _PROTOTIPOS]
+        tipos, vidas, contado, orden = self.tipos, self.vidas, self._contado, self._orden
+        afectados = 0
+        eliminados = []
+        for distancia in self._distancias_ordenadas:
+            if distancia < centro - radio or not self._vivos_cubeta[distancia]:
+                continue
+            if distancia > centro + radio:
+                break
+            inicio, fin = self._tramos[distancia]
+            bajas = 0
+            for i in orden[inicio:fin]:
+                if not contado[i]:
+                    continue
+                afectados += 1
+                vida = vidas[i] - max(0, danio - armaduras[tipos[i]])
+                if vida > 0:
+                    vidas[i] = vida
+                else:
+                    vidas[i] = 0
+                    contado[i] = 0
+                    eliminados.append(i)
+                    bajas += 1
+            self._vivos_cubeta[distancia] -= bajas
+        
+        self._num_vivos -= len(eliminados)
+        for i in eliminados:
+            self._avisar('eliminado', self.vista(i))
+        if eliminados and not self._num_vivos:
+            self._avisar('superada', None)
+        return afectados, len(eliminados)
+
+    def avanzar(self, metros):
+        """
+        Como Oleada.avanzar, pero desplaza la columna entera (también los
+        caídos): el orden y los tramos no cambian, solo las distancias que
+        usan de clave las cubetas.
+        """
+        self.distancias = array('h', [distancia - metros for distancia in self.distancias])
+        self._distancias_ordenadas = [distancia - metros for distancia in self._distancias_ordenadas]
+        self._tramos = {d - metros: tramo for d, tramo in self._tramos.items()}
+        self._vivos_cubeta = {d - metros: vivos for d, vivos in self._vivos_cubeta.items()}
+        self._primero = {d - metros: posicion for d, posicion in self._primero.items()}
+
+    # === CONSULTAS ===
+
+    @property
+    def num_vivos(self):
+        return self._num_vivos
+
+    @property
+    def superada(self):
+        return not self._num_vivos
+
+    def por_id(self, id_enemigo):
+        if isinstance(id_enemigo, int) and 0 <= id_enemigo < len(self.tipos):
+            return self.vista(id_enemigo)
+        return None
+
+    def ids_vivos(self):
+        """Ids de los vivos en orden de generación (sin crear vistas)"""
+        return [i for i, vivo in enumerate(self._contado) if vivo]
+
+    def vivos(self):
+        return [self.vista(i) for i in self.ids_vivos()]
+
+    def ids_en_alcance(self, alcance):
+        """Ids de los vivos a `alcance` metros o menos, del más cercano al más lejano"""
+        fin = 0
+        for distancia in self._distancias_ordenadas:
+            if distancia > alcance:
+                break
+            fin = self._tramos[distancia][1]
+        contado = self._contado
+        return [i for i in self._orden[:fin] if contado[i]]
+
+    def en_alcance(self, alcance):
+        return [self.vista(i) for i in self.ids_en_alcance(alcance)]
+
+    def mas_cercano(self, alcance=None):
+        for distancia in self._distancias_ordenadas:
+            if alcance is not None and distancia > alcance:
+                return None
+            if self._vivos_cubeta[distancia]:
+                # El puntero solo avanza: coste amortizado O(1) por baja
+                posicion = self._primero[distancia]
+                while not self._contado[self._orden[posicion]]:
+                    posicion += 1
+                self._primero[distancia] = posicion
+                return self.vista(self._orden[posicion])
+        return None
+
+    # === COMO LISTA ===
+
+    def __len__(self):
+        return len(self.tipos)
+
+    def __iter__(self):
+        return (self.vista(i) for i in range(len(self.tipos)))
+
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            return [self.vista(i) for i in range(*indice.indices(len(self.tipos)))]
+        if indice < 0:
+            indice += len(self.tipos)
+        if not 0 <= indice < len(self.tipos):
+            raise IndexError("índice fuera de la oleada")
+        return self.vista(indice)
+
+
+def generar_oleada_masiva(nivel=1, rng=None, num_enemigos=None):
+    """
+    Genera una OleadaMasiva sorteando tipos y distancias en bloque.
+
+    Sigue las reglas de generar_oleada_enemigos (gigantes desde el nivel 3,
+    distancias entre DISTANCIA_MINIMA y DISTANCIA_MAXIMA); por defecto con
+    el mismo número de enemigos, 3 + nivel.
+    """
+    rng = rng if rng is not None else random
+    if num_enemigos is None:
+        num_enemigos = 3 + nivel
+    codigos = range(len(TIPOS) if nivel >= 3 else len(TIPOS) - 1)
+    tipos = rng.choices(codigos, k=num_enemigos)
+    distancias = rng.choices(range(DISTANCIA_MINIMA, DISTANCIA_MAXIMA + 1), k=num_enemigos)
+    return OleadaMasiva(tipos, distancias)
@@ -0,0 +1,397 @@
+"""
+Serialización compacta de catapultas, enemigos y juegos.
+
+Solo se guarda lo que no se puede deducir: de un palo basta su longitud, de
+una goma su elasticidad, de tapones y corchos el número, y de un enemigo su
+tipo, vida y distancia.
+
+Hay dos formatos para un juego completo:
+
+    - JSON compacto (juego_a_bytes), legible y fácil de depurar
+    - Instantánea binaria versionada (juego_a_instantanea): campos fijos con
+      struct y los inventarios, el historial y los enemigos por columnas
+      como arrays en bruto; es la que usan los almacenes y los puntos de
+      control porque se codifica y decodifica mucho más rápido
+
+juego_desde_bytes reconoce los dos.
+"""
+
+from array import array
+import json
+import struct
+import sys
+
+from catapulta.catapulta import Catapulta, EstadoCatapulta
+from catapulta.historial import Disparo, HistorialDisparos
+from catapulta.enemigos import Oleada, Enemigo, Soldado, Caballero, Arquero, Gigante
+from catapulta.oleada_masiva import OleadaMasiva, TIPOS
+from catapulta.materiales import Palo, Goma, Tapon, Corcho, Pegamento, Existencias, ListaMateriales, Municion
+
+
+TIPOS_ENEMIGO = {tipo.__name__: tipo for tipo in (Soldado, Caballero, Arquero, Gigante)}
+
+
+def catapulta_a_dict(catapulta):
+    """Convierte una catapulta a un diccionario compacto"""
+    return {
+        'n': catapulta.nombre,
+        'e': catapulta.estado.name,
+        'p': catapulta.palos.valores.tolist(),
+        'g': catapulta.gomas.valores.tolist(),
+        't': len(catapulta.tapones),
+        'c': len(catapulta.corchos),
+        'pg': catapulta.pegamento.calidad if catapulta.pegamento else None,
+        'd': catapulta._durabilidad,
+        'dm': catapulta._durabilidad_maxima,
+        'dr': catapulta.disparos_realizados,
+        'nd': catapulta.nivel_desgaste,
+        'k': catapulta.construida,
+        'h': [list(disparo) for disparo in catapulta.historial_disparos],
+        'ht': catapulta.historial_disparos.total,
+        'ee': catapulta.enemigos_eliminados,
+    }
+
+
+def catapulta_desde_dict(datos):
+    """Reconstruye una catapulta a partir de catapulta_a_dict()"""
+    catapulta = Catapulta(datos['n'])
+    catapulta._estado = EstadoCatapulta[datos['e']]
+    catapulta.palos = ListaMateriales(Palo, datos['p'])
+    catapulta.gomas = ListaMateriales(Goma, datos['g'])
+    catapulta.tapones = Existencias(Tapon(), datos['t'])
+    catapulta.corchos = Municion(Corcho(), datos['c'])
+    catapulta.pegamento = Pegamento(datos['pg']) if datos['pg'] is not None else None
+    catapulta._durabilidad = datos['d']
+    catapulta._durabilidad_maxima = datos['dm']
+    catapulta.disparos_realizados = datos['dr']
+    catapulta.nivel_desgaste = datos['nd']
+    catapulta.construida = datos['k']
+    catapulta.historial_disparos = HistorialDisparos(
+        catapulta.CAPACIDAD_HISTORIAL, disparos=(Disparo(*disparo) for disparo in datos['h']))
+    catapulta.historial_disparos.total = datos.get('ht', len(datos['h']))
+    catapulta.enemigos_eliminados = datos['ee']
+
+    for nombre, valor in catapulta.recalcular_agregados().items():
+        setattr(catapulta, nombre, valor)
+    return catapulta
+
+
+def enemigo_a_lista(enemigo):
+    """Convierte un enemigo a [tipo, vida, distancia] (o todos sus campos si no es de un tipo conocido)"""
+    tipo = type(enemigo).__name__
+    if tipo in TIPOS_ENEMIGO:
+        return [tipo, enemigo.vida, enemigo.distancia]
+    return [None, enemigo.vida, enemigo.distancia, enemigo.nombre, enemigo.vida_maxima, enemigo.armadura]
+
+
+def enemigo_desde_lista(datos):
+    """Reconstruye un enemigo a partir de enemigo_a_lista()"""
+    tipo, vida, distancia = datos[:3]
+    if tipo is None:
+        nombre, vida_maxima, armadura = datos[3:]
+        enemigo = Enemigo(nombre, vida_maxima, distancia, armadura)
+    else:
+        enemigo = TIPOS_ENEMIGO[tipo](distancia)
+    enemigo.vida = vida
+    enemigo.vivo = vida > 0
+    return enemigo
+
+
+def juego_a_dict(juego):
+    """Convierte el diccionario de un juego del servidor a uno serializable"""
+    catapulta = juego['catapulta']
+    enemigos = juego['enemigos']
+    datos = {
+        'c': catapulta_a_dict(catapulta) if catapulta else None,
+        'en': [enemigo_a_lista(e) for e in enemigos] if not isinstance(enemigos, OleadaMasiva) else [],
+        'ni': juego['nivel'],
+        'pu': juego['puntos'],
+        'v': juego['version'],
+        'se': juego.get('semilla'),
+    }
+    if isinstance(enemigos, OleadaMasiva):
+        # Las oleadas masivas se guardan por columnas
+        datos['om'] = [enemigos.tipos.tolist(), enemigos.distancias.tolist(), enemigos.vidas.tolist()]
+    return datos
+
+
+def juego_desde_dict(datos):
+    """Reconstruye el diccionario de un juego a partir de juego_a_dict()"""
+    return {
+        'catapulta': catapulta_desde_dict(datos['c']) if datos['c'] else None,
+        'enemigos': OleadaMasiva(*datos['om']) if 'om' in datos
+                    else Oleada(enemigo_desde_lista(e) for e in datos['en']),
+        'nivel': datos['ni'],
+        'puntos': datos['pu'],
+        'version': datos['v'],
+        'semilla': datos.get('se'),
+    }
+
+
+def juego_a_bytes(juego):
+    """Serializa un juego a JSON compacto en UTF-8"""
+    return json.dumps(juego_a_dict(juego), separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def juego_desde_bytes(datos):
+    """Reconstruye un juego serializado con juego_a_bytes() o juego_a_instantanea()"""
+    if datos[:len(MAGIA)] == MAGIA:
+        return juego_desde_instantanea(datos)
+    return juego_desde_dict(json.loads(datos))
+
+
+# === INSTANTÁNEAS BINARIAS ===
+#
+# Formato (little-endian):
+#
+#   cabecera   magia 'CATJ', formato (B), banderas (B)
+#   juego      nivel (i), puntos (q), versión (q), semilla (Q)
+#   catapulta  (si la bandera CATAPULTA) nombre, campos fijos, palos, gomas
+#              e historial: tabla de nombres de enemigo y columnas índice,
+#              marcas (acierto, eliminado) y daño
+#   enemigos   columnas tipo (código en oleada_masiva.TIPOS, -1 si no es de
+#              un tipo conocido), distancia y vida; después, nombre, vida
+#              máxima y armadura de los de tipo desconocido
+#
+# Los textos van como longitud (I) + UTF-8 y los arrays como código de tipo
+# (1 byte) + número de elementos (I) + los bytes; las columnas de números
+# (daño, distancia, vida) se ensanchan a 'q' o 'd' si sus valores no caben
+# en 'i'. Un cambio incompatible del formato sube FORMATO_INSTANTANEA (el
+# formato 1, con contadores de 32 bits y pegamento entero, se sigue leyendo).
+
+MAGIA = b'CATJ'
+FORMATO_INSTANTANEA = 2
+
+_CON_CATAPULTA = 1
+_OLEADA_MASIVA = 2
+_CON_SEMILLA = 4
+
+_CABECERA = struct.Struct('<4sBB')
+_JUEGO = struct.Struct('<iqqQ')
+# estado, construida, tapones, corchos, pegamento (-1 = sin pegamento),
+# disparos, desgaste, eliminados, disparos totales del historial, máscara de
+# los _NUMEROS (y, en el bit 7, del pegamento) que son float (los demás
+# vuelven como int) y los _NUMEROS
+_CATAPULTA = struct.Struct('<BBQQdQQQQB7d')
+_CATAPULTA_FORMATO_1 = struct.Struct('<BBIIhIIIQB7d')
+_PEGAMENTO_DECIMAL = 1 << 7
+# La durabilidad y los agregados se guardan tal cual (así no hay que
+# recorrer el inventario al decodificar, y se conserva el redondeo acumulado)
+_NUMEROS = ('_durabilidad', '_durabilidad_maxima', '_suma_longitud', '_suma_potencia_base',
+            '_suma_elasticidad', '_suma_impulso', '_suma_estabilidad_tapones')
+_ENEMIGO_DESCONOCIDO = struct.Struct('<ii')
+_LONGITUD = struct.Struct('<I')
+
+_ESTADOS = list(EstadoCatapulta)
+_CODIGO_ESTADO = {estado: codigo for codigo, estado in enumerate(_ESTADOS)}
+_CODIGO_TIPO = {tipo: codigo for codigo, tipo in enumerate(TIPOS)}
+_BIG_ENDIAN = sys.byteorder == 'big'
+
+
+def _escribir_texto(partes, texto):
+    datos = texto.encode('utf-8')
+    partes.append(_LONGITUD.pack(len(datos)))
+    partes.append(datos)
+
+
+def _leer_texto(datos, pos):
+    (largo,) = _LONGITUD.unpack_from(datos, pos)
+    pos += _LONGITUD.size
+    return bytes(datos[pos:pos + largo]).decode('utf-8'), pos + largo
+
+
+def _escribir_array(partes, valores):
+    if _BIG_ENDIAN:
+        valores = array(valores.typecode, valores)
+        valores.byteswap()
+    partes.append(valores.typecode.encode('ascii') + _LONGITUD.pack(len(valores)))
+    partes.append(valores.tobytes())
+
+
+def _leer_array(datos, pos):
+    codigo = chr(datos[pos])
+    (largo,) = _LONGITUD.unpack_from(datos, pos + 1)
+    pos += 1 + _LONGITUD.size
+    valores = array(codigo)
+    fin = pos + largo * valores.itemsize
+    valores.frombytes(datos[pos:fin])
+    if _BIG_ENDIAN:
+        valores.byteswap()
+    return valores, fin
+
+
+def _columna(codigo, valores):
+    """array(codigo, valores), ensanchado a 'q' o 'd' si algún valor no cabe"""
+    valores = list(valores)
+    for codigo in (codigo, 'q', 'd'):
+        try:
+            return array(codigo, valores)
+        except (TypeError, OverflowError):
+            continue
+    raise ValueError("Columna de números no serializable")
+
+
+def _escribir_catapulta(partes, catapulta):
+    _escribir_texto(partes, catapulta.nombre)
+    historial = catapulta.historial_disparos
+    numeros = [getattr(catapulta, atributo) for atributo in _NUMEROS]
+    decimales = sum(1 << i for i, numero in enumerate(numeros) if isinstance(numero, float))
+    pegamento = catapulta.pegamento.calidad if catapulta.pegamento else -1
+    if isinstance(pegamento, float):
+        decimales |= _PEGAMENTO_DECIMAL
+    partes.append(_CATAPULTA.pack(
+        _CODIGO_ESTADO[catapulta.estado], catapulta.construida, len(catapulta.tapones),
+        len(catapulta.corchos), pegamento,
+        catapulta.disparos_realizados, catapulta.nivel_desgaste, catapulta.enemigos_eliminados,
+        historial.total, decimales, *numeros))
+    _escribir_array(partes, catapulta.palos.valores)
+    _escribir_array(partes, catapulta.gomas.valores)
+
+    # Historial por columnas; los nombres de enemigo se repiten mucho y van en una tabla
+    disparos = list(historial)
+    nombres = {}
+    partes_historial = []
+    for columna in (
+        array('I', [nombres.setdefault(disparo.enemigo, len(nombres)) for disparo in disparos]),
+        array('B', [bool(disparo.acierto) | bool(disparo.eliminado) << 1 for disparo in disparos]),
+        _columna('i', [disparo.danio for disparo in disparos]),
+    ):
+        _escribir_array(partes_historial, columna)
+    partes.append(_LONGITUD.pack(len(nombres)))
+    for nombre in nombres:
+        _escribir_texto(partes, nombre)
+    partes.extend(partes_historial)
+
+
+def _leer_catapulta(datos, pos, formato):
+    nombre, pos = _leer_texto(datos, pos)
+    campos = _CATAPULTA if formato >= 2 else _CATAPULTA_FORMATO_1
+    (estado, construida, tapones, corchos, pegamento, disparos, desgaste, eliminados, total,
+     decimales, *numeros) = campos.unpack_from(datos, pos)
+    pos += campos.size
+    if not decimales & _PEGAMENTO_DECIMAL:
+        pegamento = int(pegamento)
+    palos, pos = _leer_array(datos, pos)
+    gomas, pos = _leer_array(datos, pos)
+
+    (num_nombres,) = _LONGITUD.unpack_from(datos, pos)
+    pos += _LONGITUD.size
+    nombres = []
+    for _ in range(num_nombres):
+        texto, pos = _leer_texto(datos, pos)
+        nombres.append(texto)
+    indices, pos = _leer_array(datos, pos)
+    marcas, pos = _leer_array(datos, pos)
+    danios, pos = _leer_array(datos, pos)
+
+    catapulta = Catapulta(nombre)
+    catapulta._estado = _ESTADOS[estado]
+    catapulta.construida = bool(construida)
+    catapulta.palos = ListaMateriales(Palo, palos)
+    catapulta.gomas = ListaMateriales(Goma, gomas)
+    catapulta.tapones = Existencias(Tapon(), tapones)
+    catapulta.corchos = Municion(Corcho(), corchos)
+    catapulta.pegamento = Pegamento(pegamento) if pegamento >= 0 else None
+    catapulta.disparos_realizados = disparos
+    catapulta.nivel_desgaste = desgaste
+    catapulta.enemigos_eliminados = eliminados
+    catapulta.historial_disparos = HistorialDisparos(
+        catapulta.CAPACIDAD_HISTORIAL,
+        disparos=map(Disparo, map(nombres.__getitem__, indices), [m & 1 == 1 for m in marcas],
+                     danios, [m & 2 == 2 for m in marcas]))
+    catapulta.historial_disparos.total = total
+    for i, (atributo, numero) in enumerate(zip(_NUMEROS, numeros)):
+        setattr(catapulta, atributo, numero if decimales >> i & 1 else int(numero))
+    return catapulta, pos
+
+
+def _escribir_enemigos(partes, enemigos):
+    if isinstance(enemigos, OleadaMasiva):
+        # Ya está por columnas
+        for columna in (enemigos.tipos, enemigos.distancias, enemigos.vidas):
+            _escribir_array(partes, columna)
+        return
+
+    tipos, distancias, vidas = array('b'), [], []
+    desconocidos = []
+    for enemigo in enemigos:
+        codigo = _CODIGO_TIPO.get(type(enemigo), -1)
+        if codigo < 0:
+            desconocidos.append(enemigo)
+        tipos.append(codigo)
+        distancias.append(enemigo.distancia)
+        vidas.append(enemigo.vida)
+    for columna in (tipos, _columna('i', distancias), _columna('i', vidas)):
+        _escribir_array(partes, columna)
+    for enemigo in desconocidos:
+        _escribir_texto(partes, enemigo.nombre)
+        partes.append(_ENEMIGO_DESCONOCIDO.pack(enemigo.vida_maxima, enemigo.armadura))
+
+
+def _leer_enemigos(datos, pos, masiva):
+    tipos, pos = _leer_array(datos, pos)
+    distancias, pos = _leer_array(datos, pos)
+    vidas, pos = _leer_array(datos, pos)
+    if masiva:
+        return OleadaMasiva(tipos, distancias, vidas), pos
+
+    enemigos = []
+    for codigo, distancia, vida in zip(tipos, distancias, vidas):
+        if codigo < 0:
+            nombre, pos = _leer_texto(datos, pos)
+            vida_maxima, armadura = _ENEMIGO_DESCONOCIDO.unpack_from(datos, pos)
+            pos += _ENEMIGO_DESCONOCIDO.size
+            enemigo = Enemigo(nombre, vida_maxima, distancia, armadura)
+        else:
+            enemigo = TIPOS[codigo](distancia)
+        enemigo.vida = vida
+        enemigo.vivo = vida > 0
+        enemigos.append(enemigo)
+    return Oleada(enemigos), pos
+
+
+def juego_a_instantanea(juego):
+    """Serializa un juego a una instantánea binaria (ver el formato arriba)"""
+    catapulta = juego['catapulta']
+    enemigos = juego['enemigos']
+    semilla = juego.get('semilla')
+
+    banderas = 0
+    if catapulta:
+        banderas |= _CON_CATAPULTA
+    if isinstance(enemigos, OleadaMasiva):
+        banderas |= _OLEADA_MASIVA
+    if semilla is not None:
+        banderas |= _CON_SEMILLA
+
+    partes = [_CABECERA.pack(MAGIA, FORMATO_INSTANTANEA, banderas),
+              _JUEGO.pack(juego['nivel'], juego['puntos'], juego['version'], semilla or 0)]
+    if catapulta:
+        _escribir_catapulta(partes, catapulta)
+    _escribir_enemigos(partes, enemigos)
+    return b''.join(partes)
+
+
+def juego_desde_instantanea(datos):
+    """Reconstruye un juego a partir de juego_a_instantanea()"""
+    datos = memoryview(datos)
+    magia, formato, banderas = _CABECERA.unpack_from(datos, 0)
+    if magia != MAGIA:
+        raise ValueError("No es una instantánea de juego")
+    if not 1 <= formato <= FORMATO_INSTANTANEA:
+        raise ValueError(f"Formato de instantánea no soportado: {formato}")
+    nivel, puntos, version, semilla = _JUEGO.unpack_from(datos, _CABECERA.size)
+    pos = _CABECERA.size + _JUEGO.size
+
+    catapulta = None
+    if banderas & _CON_CATAPULTA:
+        catapulta, pos = _leer_catapulta(datos, pos, formato)
+    enemigos, pos = _leer_enemigos(datos, pos, banderas & _OLEADA_MASIVA)
+    return {
+        'catapulta': catapulta,
+        'enemigos': enemigos,
+        'nivel': nivel,
+        'puntos': puntos,
+        'version': version,
+        'semilla': semilla if banderas & _CON_SEMILLA else None,
+    }
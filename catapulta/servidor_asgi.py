@@ -0,0 +1,530 @@
+"""
+Servidor asyncio (ASGI) de la Catapulta.
+
+Expone la misma API que servidor_web (/api/crear_catapulta,
+/api/agregar_material, /api/agregar_materiales, /api/construir,
+/api/generar_oleada, /api/disparar, /api/disparar_area, /api/reparar,
+/api/mejorar, /api/estado y /api/stream) con las mismas reglas
+(catapulta.acciones), pero sin un hilo por conexión: un stream abierto solo
+ocupa una corrutina, así que un proceso aguanta miles de navegadores
+conectados sin hacer nada.
+
+Las acciones de un mismo juego se ejecutan de una en una (un asyncio.Lock
+por juego); las de juegos distintos no se esperan entre sí.
+
+El jugador se identifica con la cookie `catapulta_juego` (las sesiones de
+Flask no se comparten con servidor_web). La batalla en tiempo real
+(/api/tiempo_real) solo la ofrece servidor_web.
+
+Uso:
+    uvicorn catapulta.servidor_asgi:app        (con uvicorn instalado)
+    python main_asgi.py                        (usa uvicorn o ServidorHTTP)
+"""
+
+import asyncio
+import json
+import os
+import secrets
+import time
+from http.cookies import CookieError, SimpleCookie
+from urllib.parse import parse_qs, unquote
+
+from catapulta import acciones, eventos
+from catapulta.acciones import preparar_generador
+from catapulta.almacen import crear_almacen
+from catapulta.estado_juego import CacheVersiones
+
+
+# Cookie con el id del juego del jugador
+COOKIE_JUEGO = 'catapulta_juego'
+
+# Segundos sin cambios tras los que el stream envía un comentario keep-alive
+INTERVALO_KEEPALIVE = 15
+
+# Con un almacén compartido, cada cuántos segundos mira el stream si otro
+# proceso cambió el juego
+INTERVALO_SONDEO_COMPARTIDO = 1
+
+# Veces que se intenta una acción si otro proceso cambia el juego a la vez
+REINTENTOS_ACCION = 3
+
+# Segundos entre purgas de juegos inactivos
+INTERVALO_PURGA = 60
+
+# Tamaño máximo del cuerpo de una petición (bytes)
+MAX_CUERPO = 64 * 1024
+
+RUTA_INDEX = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates', 'index.html')
+
+
+class AplicacionJuego:
+    """
+    Aplicación ASGI del juego.
+
+    Parámetros:
+        almacen: almacén de juegos (por defecto, crear_almacen(), que se
+            configura con CATAPULTA_ALMACEN)
+    """
+
+    def __init__(self, almacen=None):
+        self.juegos = almacen if almacen is not None else crear_almacen()
+        self.juegos.al_expulsar = self._al_expulsar
+        self.versiones = CacheVersiones()
+        self._locks = {}  # game_id -> asyncio.Lock de sus acciones
+        self._cambios = {}  # game_id -> asyncio.Condition que despierta a sus streams
+        self._ultima_purga = time.monotonic()
+        self._index = None
+
+    def _al_expulsar(self, game_id):
+        """Libera lo asociado a un juego expulsado del almacén"""
+        self.versiones.olvidar(game_id)
+        self._locks.pop(game_id, None)
+        self._cambios.pop(game_id, None)
+
+    def _lock(self, game_id):
+        lock = self._locks.get(game_id)
+        if lock is None:
+            lock = self._locks[game_id] = asyncio.Lock()
+        return lock
+
+    def _condicion(self, game_id):
+        condicion = self._cambios.get(game_id)
+        if condicion is None:
+            condicion = self._cambios[game_id] = asyncio.Condition()
+        return condicion
+
+    async def _en_almacen(self, metodo, *args):
+        """Llama al almacén; si es compartido (E/S a disco), en un hilo aparte"""
+        if self.juegos.compartido:
+            return await asyncio.to_thread(metodo, *args)
+        return metodo(*args)
+
+    # === JUEGOS ===
+
+    async def obtener_juego(self, game_id):
+        """Obtiene o crea el juego"""
+        ahora = time.monotonic()
+        if ahora - self._ultima_purga >= INTERVALO_PURGA:
+            self._ultima_purga = ahora
+            await self._en_almacen(self.juegos.purgar)
+
+        juego = await self._en_almacen(self.juegos.obtener, game_id)
+        if juego is None:
+            juego = acciones.nuevo_juego()
+            if not await self._en_almacen(self.juegos.guardar_si_version, game_id, juego, None):
+                # Otro proceso lo acaba de crear
+                juego = await self._en_almacen(self.juegos.obtener, game_id) or juego
+        return juego
+
+    async def notificar_cambio(self, game_id, juego):
+        """
+        Marca un cambio de estado del juego, lo guarda y despierta a sus
+        streams. Retorna False, sin guardarlo, si otro proceso cambió el
+        juego guardado desde que se leyó.
+        """
+        base = juego['version']
+        juego['version'] += 1
+        if not await self._en_almacen(self.juegos.guardar_si_version, game_id, juego, base):
+            juego['version'] = base
+            return False
+        condicion = self._condicion(game_id)
+        async with condicion:
+            condicion.notify_all()
+        return True
+
+    async def ejecutar_accion(self, game_id, nombre, data):
+        """
+        Ejecuta una acción de catapulta.acciones con el lock del juego. Si
+        otro proceso (con un almacén compartido) cambió el juego entretanto,
+        la acción se repite sobre el estado actual.
+        """
+        async with self._lock(game_id):
+            for _ in range(REINTENTOS_ACCION):
+                juego = await self.obtener_juego(game_id)
+                preparar_generador(juego)
+                respuesta, cambio = acciones.ACCIONES[nombre](juego, data)
+                if not cambio:
+                    return respuesta
+                if not await self.notificar_cambio(game_id, juego):
+                    continue
+                if nombre in acciones.CON_ESTADO:
+                    acciones.agregar_estado(respuesta, self.versiones, game_id, juego, data.get('version'))
+                return respuesta
+        return {'success': False, 'error': 'El juego está cambiando en otro proceso; inténtalo de nuevo'}
+
+    # === ASGI ===
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._ciclo_de_vida(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+
+        game_id, cabeceras = self._sesion(scope)
+        ruta, metodo = scope['path'], scope['method']
+
+        if ruta == '/' and metodo == 'GET':
+            await _responder(send, 200, self._pagina_index(), b'text/html; charset=utf-8', cabeceras)
+        elif ruta == '/api/estado' and metodo == 'GET':
+            await self._estado(scope, send, game_id, cabeceras)
+        elif ruta == '/api/stream' and metodo == 'GET':
+            await self._stream(scope, receive, send, game_id, cabeceras)
+        elif ruta.startswith('/api/') and ruta[5:] in acciones.ACCIONES:
+            if metodo != 'POST':
+                await _responder(send, 405, b'', cabeceras=cabeceras)
+                return
+            data = await _leer_json(receive)
+            if data is None:
+                await _responder_json(send, {'success': False, 'error': 'Petición inválida'}, 400, cabeceras)
+                return
+            respuesta = await self.ejecutar_accion(game_id, ruta[5:], data)
+            await _responder_json(send, respuesta, 200, cabeceras)
+        elif ruta.startswith('/api/'):
+            await _responder_json(send, {'success': False, 'error': 'Ruta no disponible'}, 404, cabeceras)
+        else:
+            await _responder(send, 404, b'', cabeceras=cabeceras)
+
+    async def _ciclo_de_vida(self, receive, send):
+        while True:
+            mensaje = await receive()
+            if mensaje['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif mensaje['type'] == 'lifespan.shutdown':
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def _sesion(self, scope):
+        """Retorna (game_id, cabeceras extra): si no hay cookie, crea el id y la fija"""
+        for nombre, valor in scope['headers']:
+            if nombre == b'cookie':
+                try:
+                    morsel = SimpleCookie(valor.decode('latin-1')).get(COOKIE_JUEGO)
+                except CookieError:
+                    continue
+                if morsel is not None and morsel.value:
+                    return morsel.value, []
+        game_id = secrets.token_hex(16)
+        cookie = f"{COOKIE_JUEGO}={game_id}; Path=/; HttpOnly; SameSite=Lax"
+        return game_id, [(b'set-cookie', cookie.encode('latin-1'))]
+
+    def _pagina_index(self):
+        if self._index is None:
+            with open(RUTA_INDEX, 'rb') as fichero:
+                self._index = fichero.read()
+        return self._index
+
+    async def _estado(self, scope, send, game_id, cabeceras):
+        """
+        Estado del juego; con ?version=N, 304 si no hay cambios o un parche desde N
+        """
+        version_cliente = _parametro_entero(scope, 'version')
+        async with self._lock(game_id):
+            juego = await self.obtener_juego(game_id)
+            tipo, datos = self.versiones.respuesta(game_id, juego, version_cliente)
+        if tipo == 'sin_cambios':
+            await _responder(send, 304, b'', cabeceras=cabeceras)
+        else:
+            await _responder_json(send, datos, 200, cabeceras)
+
+    async def _stream(self, scope, receive, send, game_id, cabeceras):
+        """
+        Stream Server-Sent Events, como el de servidor_web: el estado completo
+        al conectar y después parches cuando cambia (continuando desde
+        Last-Event-ID al reconectar).
+        """
+        ultima_version = None
+        for nombre, valor in scope['headers']:
+            if nombre == b'last-event-id' and valor.isdigit():
+                ultima_version = int(valor)
+
+        async with self._lock(game_id):
+            juego = await self.obtener_juego(game_id)
+        condicion = self._condicion(game_id)
+        compartido = self.juegos.compartido
+        espera = INTERVALO_SONDEO_COMPARTIDO if compartido else INTERVALO_KEEPALIVE
+
+        await send({'type': 'http.response.start', 'status': 200, 'headers': cabeceras + [
+            (b'content-type', b'text/event-stream'),
+            (b'cache-control', b'no-cache'),
+            (b'x-accel-buffering', b'no'),
+        ]})
+
+        desconexion = asyncio.ensure_future(_esperar_desconexion(receive))
+        ultimo_envio = time.monotonic()
+        try:
+            while True:
+                if compartido:
+                    # El cambio puede venir de otro proceso
+                    cambiado = await self._en_almacen(self.juegos.version, game_id) != ultima_version
+                else:
+                    cambiado = juego['version'] != ultima_version
+                if not cambiado:
+                    # Sin almacén compartido se comprueba la versión dentro de la
+                    # condición, para no perder un aviso llegado entretanto
+                    predicado = None if compartido else (lambda: juego['version'] != ultima_version)
+                    esperar = asyncio.ensure_future(_esperar_aviso(condicion, predicado, espera))
+                    await asyncio.wait({esperar, desconexion}, return_when=asyncio.FIRST_COMPLETED)
+                    if desconexion.done():
+                        esperar.cancel()
+                        return
+                    if esperar.result():
+                        continue
+                    if time.monotonic() - ultimo_envio < INTERVALO_KEEPALIVE:
+                        continue
+                    # Comprobar que el juego no fue expulsado (y quizá recreado)
+                    if not compartido and self.juegos.obtener(game_id) is not juego:
+                        return  # El navegador reconectará y recibirá el estado completo
+                    ultimo_envio = time.monotonic()
+                    await _enviar_trozo(send, b": keep-alive\n\n")
+                    continue
+
+                juego = await self._en_almacen(self.juegos.obtener, game_id)
+                if juego is None:
+                    return  # Juego expulsado: el navegador reconectará con uno nuevo
+
+                tipo, datos = self.versiones.respuesta(game_id, juego, ultima_version)
+                if tipo == 'sin_cambios':
+                    continue
+
+                ultimo_envio = time.monotonic()
+                ultima_version = datos['version']
+                if tipo == 'parche':
+                    mensaje = f"event: parche\nid: {ultima_version}\ndata: {json.dumps(datos)}\n\n"
+                else:
+                    mensaje = f"id: {ultima_version}\ndata: {json.dumps(datos)}\n\n"
+                await _enviar_trozo(send, mensaje.encode('utf-8'))
+        except (ConnectionError, OSError):
+            return
+        finally:
+            desconexion.cancel()
+            try:
+                await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+            except (ConnectionError, OSError, RuntimeError):
+                pass
+
+
+# === AUXILIARES ASGI ===
+
+async def _leer_json(receive):
+    """Lee el cuerpo de la petición como JSON; {} si está vacío, None si no es válido"""
+    cuerpo = b''
+    while True:
+        mensaje = await receive()
+        if mensaje['type'] == 'http.disconnect':
+            return None
+        cuerpo += mensaje.get('body', b'')
+        if len(cuerpo) > MAX_CUERPO:
+            return None
+        if not mensaje.get('more_body'):
+            break
+    if not cuerpo:
+        return {}
+    try:
+        data = json.loads(cuerpo)
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+async def _esperar_desconexion(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def _esperar_aviso(condicion, predicado, espera):
+    """
+    True si la condición se notifica (y se cumple el predicado, si lo hay)
+    antes de `espera` segundos
+    """
+    async with condicion:
+        try:
+            if predicado is None:
+                await asyncio.wait_for(condicion.wait(), espera)
+            else:
+                await asyncio.wait_for(condicion.wait_for(predicado), espera)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+
+def _parametro_entero(scope, nombre):
+    valores = parse_qs(scope.get('query_string', b'').decode('latin-1')).get(nombre)
+    try:
+        return int(valores[0]) if valores else None
+    except ValueError:
+        return None
+
+
+async def _responder(send, estado, cuerpo, tipo=None, cabeceras=()):
+    cabeceras = list(cabeceras)
+    if tipo is not None:
+        cabeceras.append((b'content-type', tipo))
+    cabeceras.append((b'content-length', str(len(cuerpo)).encode()))
+    await send({'type': 'http.response.start', 'status': estado, 'headers': cabeceras})
+    await send({'type': 'http.response.body', 'body': cuerpo})
+
+
+async def _responder_json(send, datos, estado=200, cabeceras=()):
+    await _responder(send, estado, json.dumps(datos).encode('utf-8'), b'application/json', cabeceras)
+
+
+async def _enviar_trozo(send, trozo):
+    await send({'type': 'http.response.body', 'body': trozo, 'more_body': True})
+
+
+# === SERVIDOR HTTP MÍNIMO ===
+
+_MOTIVOS = {200: 'OK', 304: 'Not Modified', 400: 'Bad Request', 404: 'Not Found',
+            405: 'Method Not Allowed', 413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+
+class ServidorHTTP:
+    """
+    Servidor HTTP/1.1 mínimo sobre asyncio para ejecutar la aplicación ASGI
+    sin dependencias (keep-alive, cuerpos con Content-Length y respuestas en
+    streaming con Transfer-Encoding: chunked). Con uvicorn instalado,
+    iniciar_servidor usa uvicorn.
+    """
+
+    def __init__(self, aplicacion, host='0.0.0.0', port=8000):
+        self.aplicacion = aplicacion
+        self.host = host
+        self.port = port
+        self.conexiones = 0  # conexiones abiertas ahora mismo
+
+    async def servir(self, listo=None):
+        """Atiende conexiones hasta que se cancela (llama a listo() al escuchar)"""
+        servidor = await asyncio.start_server(self._conexion, self.host, self.port, backlog=4096)
+        if listo is not None:
+            listo()
+        async with servidor:
+            await servidor.serve_forever()
+
+    async def _conexion(self, reader, writer):
+        self.conexiones += 1
+        try:
+            while await self._peticion(reader, writer):
+                pass
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            self.conexiones -= 1
+            writer.close()
+
+    async def _peticion(self, reader, writer):
+        """Atiende una petición. Retorna True si la conexión sigue abierta"""
+        linea = await reader.readline()
+        if not linea:
+            return False
+        metodo, destino, version = linea.decode('latin-1').split()
+        cabeceras = []
+        largo = 0
+        mantener = version == 'HTTP/1.1'
+        while True:
+            linea = await reader.readline()
+            if linea in (b'\r\n', b'\n', b''):
+                break
+            nombre, _, valor = linea.decode('latin-1').partition(':')
+            nombre, valor = nombre.strip().lower(), valor.strip()
+            cabeceras.append((nombre.encode('latin-1'), valor.encode('latin-1')))
+            if nombre == 'content-length':
+                largo = int(valor)
+            elif nombre == 'connection':
+                mantener = valor.lower() != 'close' if version == 'HTTP/1.1' else valor.lower() == 'keep-alive'
+
+        if largo > MAX_CUERPO:
+            writer.write(b"HTTP/1.1 413 Payload Too Large\r\ncontent-length: 0\r\nconnection: close\r\n\r\n")
+            await writer.drain()
+            return False
+        cuerpo = await reader.readexactly(largo) if largo else b''
+
+        ruta, _, consulta = destino.partition('?')
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': version[5:],
+            'method': metodo,
+            'scheme': 'http',
+            'path': unquote(ruta),
+            'raw_path': ruta.encode('latin-1'),
+            'query_string': consulta.encode('latin-1'),
+            'headers': cabeceras,
+            'client': writer.get_extra_info('peername'),
+            'server': (self.host, self.port),
+        }
+
+        pendiente = [{'type': 'http.request', 'body': cuerpo, 'more_body': False}]
+        estado = {'empezada': False, 'chunked': False, 'terminada': False}
+
+        async def receive():
+            if pendiente:
+                return pendiente.pop()
+            # Tras el cuerpo solo queda esperar a que el cliente cierre
+            while await reader.read(4096):
+                pass
+            return {'type': 'http.disconnect'}
+
+        async def send(mensaje):
+            if mensaje['type'] == 'http.response.start':
+                estado['inicio'] = mensaje
+                return
+            cuerpo = mensaje.get('body', b'')
+            mas = mensaje.get('more_body', False)
+            if not estado['empezada']:
+                estado['empezada'] = True
+                inicio = estado['inicio']
+                nombres = {nombre.lower() for nombre, _ in inicio['headers']}
+                lineas = [f"HTTP/1.1 {inicio['status']} {_MOTIVOS.get(inicio['status'], '')}".encode()]
+                lineas += [nombre + b': ' + valor for nombre, valor in inicio['headers']]
+                if b'content-length' not in nombres:
+                    if mas:
+                        estado['chunked'] = True
+                        lineas.append(b'transfer-encoding: chunked')
+                    else:
+                        lineas.append(b'content-length: ' + str(len(cuerpo)).encode())
+                if not mantener:
+                    lineas.append(b'connection: close')
+                writer.write(b'\r\n'.join(lineas) + b'\r\n\r\n')
+            if estado['chunked']:
+                if cuerpo:
+                    writer.write(f"{len(cuerpo):x}\r\n".encode() + cuerpo + b'\r\n')
+                if not mas:
+                    writer.write(b'0\r\n\r\n')
+            elif cuerpo:
+                writer.write(cuerpo)
+            if not mas:
+                estado['terminada'] = True
+            await writer.drain()
+
+        try:
+            await self.aplicacion(scope, receive, send)
+        except Exception:
+            if estado['empezada']:
+                return False
+            writer.write(b"HTTP/1.1 500 Internal Server Error\r\ncontent-length: 0\r\nconnection: close\r\n\r\n")
+            await writer.drain()
+            return False
+        return mantener and estado['terminada']
+
+
+def iniciar_servidor(host='0.0.0.0', port=8000):
+    """Sirve `app` con uvicorn si está instalado; si no, con ServidorHTTP"""
+    try:
+        import uvicorn
+    except ImportError:
+        uvicorn = None
+    if uvicorn is not None:
+        uvicorn.run(app, host=host, port=port, log_level='warning')
+    else:
+        asyncio.run(ServidorHTTP(app, host, port).servir())
+
+
+# Eventos del modelo: descartados, o en JSON lines si se indica un fichero
+# con CATAPULTA_EVENTOS (como en servidor_web)
+if os.environ.get('CATAPULTA_EVENTOS'):
+    eventos.configurar_sumidero(eventos.SumideroJSONL(os.environ['CATAPULTA_EVENTOS']))
+else:
+    eventos.configurar_sumidero(eventos.NULO)
+
+app = AplicacionJuego()
@@ -2,287 +2,582 @@
 Interfaz Web para el juego de la Catapulta usando Flask
 """
 
-from flask import Flask, render_template, jsonify, request, session
+from flask import Flask, Response, render_template, jsonify, request, session, stream_with_context
+import atexit
 import secrets
 import json
-from catapulta.catapulta import Catapulta, EstadoCatapulta
-from catapulta.enemigos import generar_oleada_enemigos
+import os
+import threading
+import time
+from catapulta import acciones, eventos, metricas
+from catapulta.acciones import preparar_generador
+from catapulta.almacen import PuntoControl, crear_almacen
+from catapulta.bitacora import BitacoraJuegos
+from catapulta.estado_juego import CacheVersiones
+from catapulta.tiempo_real import MotorBatalla
 
 
 app = Flask(__name__)
-app.secret_key = secrets.token_hex(16)
+# Con varios procesos todos deben compartir la clave para validar las cookies
+# de sesión; si no se configura, se genera una nueva en cada arranque
+app.secret_key = os.environ.get('CATAPULTA_SECRET_KEY') or secrets.token_hex(16)
+
+# Eventos del modelo: descartados, o en JSON lines si se indica un fichero
+# con CATAPULTA_EVENTOS (nada de escrituras síncronas por consola por petición)
+if os.environ.get('CATAPULTA_EVENTOS'):
+    eventos.configurar_sumidero(eventos.SumideroJSONL(os.environ['CATAPULTA_EVENTOS']))
+else:
+    eventos.configurar_sumidero(eventos.NULO)
 
-# Almacenamiento temporal de juegos (en memoria)
-juegos = {}
+# Últimos estados serializados por juego, para responder con parches
+versiones = CacheVersiones()
 
+# Condiciones por juego para despertar a los streams cuando cambia el estado
+_condiciones = {}
+_condiciones_lock = threading.Lock()
 
-def obtener_juego():
-    """Obtiene o crea el juego de la sesión actual"""
+# Segundos sin cambios tras los que el stream envía un comentario keep-alive
+INTERVALO_KEEPALIVE = 15
+
+# Con un almacén compartido, cada cuántos segundos mira el stream si otro
+# proceso cambió el juego
+INTERVALO_SONDEO_COMPARTIDO = 1
+
+# Batallas en tiempo real en marcha: game_id -> (motor, juego). El motor
+# corre en un hilo de este proceso y su juego es el que vale mientras dure.
+# Con un almacén compartido, el proceso anota la batalla en el almacén (con
+# un plazo que renueva mientras dura) y los demás rechazan los cambios y las
+# órdenes de ese juego: las órdenes solo las atiende el proceso del motor
+_motores = {}
+_motores_lock = threading.Lock()
+
+# Segundos de validez de la anotación de una batalla en el almacén (si el
+# proceso cae, el juego queda libre pasado este plazo) y cada cuántos se renueva
+PLAZO_BATALLA = 10
+RENOVACION_BATALLA = 2
+
+# Ticks entre dos publicaciones del estado a los streams (con DT = 0.05 s,
+# diez por segundo)
+TICKS_POR_PUBLICACION = 2
+
+# Veces que se intenta una acción si otro worker cambia el juego a la vez
+REINTENTOS_ACCION = 3
+
+# Respuesta a un cuerpo JSON que no es un objeto (como la de servidor_asgi)
+PETICION_INVALIDA = {'success': False, 'error': 'Petición inválida'}
+
+# Segundos entre purgas de juegos inactivos
+INTERVALO_PURGA = 60
+_ultima_purga = time.monotonic()
+
+
+def _al_expulsar(game_id):
+    """Libera lo asociado a un juego expulsado del almacén"""
+    versiones.olvidar(game_id)
+    with _condiciones_lock:
+        _condiciones.pop(game_id, None)
+    if bitacora is not None:
+        # Un juego expulsado no vuelve desde la bitácora (solo los de una caída)
+        bitacora.olvidar(game_id)
+
+
+# Almacén de juegos (ver catapulta.almacen; se configura con CATAPULTA_ALMACEN)
+juegos = crear_almacen(al_expulsar=_al_expulsar)
+
+
+def configurar_almacen(almacen):
+    """Sustituye el almacén de juegos (por ejemplo, por uno compartido)"""
+    global juegos, bitacora
+    almacen.al_expulsar = _al_expulsar
+    juegos = almacen
+    if almacen.compartido and bitacora is not None:
+        # Como en iniciar_bitacora: no con un almacén compartido
+        bitacora.cerrar()
+        bitacora = None
+
+
+# Puntos de control del almacén en memoria (ver iniciar_punto_control)
+punto_control = None
+
+
+def iniciar_punto_control(ruta, intervalo=None):
+    """
+    Recupera los juegos del último punto de control en `ruta` y guarda uno
+    nuevo cada `intervalo` segundos (y al salir). El hilo arranca con la
+    primera petición: el proceso vigía del recargador de Flask también
+    importa este módulo, pero no atiende peticiones y no debe sobrescribir
+    el fichero.
+    """
+    global punto_control
+    if juegos.compartido:
+        return None  # el almacén compartido ya sobrevive a los reinicios
+    punto_control = PuntoControl(juegos, ruta, *([intervalo] if intervalo else []))
+    punto_control.cargar()
+    atexit.register(punto_control.detener)
+    return punto_control
+
+
+@app.before_request
+def _arrancar_punto_control():
+    if punto_control is not None and not punto_control.activo:
+        punto_control.iniciar()
+
+
+if os.environ.get('CATAPULTA_PUNTO_CONTROL'):
+    iniciar_punto_control(os.environ['CATAPULTA_PUNTO_CONTROL'],
+                          float(os.environ.get('CATAPULTA_INTERVALO_PUNTO_CONTROL', 0)) or None)
+
+
+# Bitácora de acciones por juego (ver catapulta.bitacora y iniciar_bitacora)
+bitacora = None
+
+
+def iniciar_bitacora(directorio, instantanea_cada=None):
+    """
+    Añade cada acción que cambia un juego a su bitácora en `directorio`.
+    Los juegos que no están en el almacén (tras una caída o un reinicio) se
+    rehacen a partir de ella; las batallas en tiempo real no se registran
+    tick a tick, sino con una instantánea del juego al terminar. Los juegos
+    expulsados del almacén pierden su bitácora.
+
+    Con un almacén compartido no se activa: ya sobrevive a los reinicios, y
+    varios workers añadirían los registros de un juego desordenados.
+    """
+    global bitacora
+    if juegos.compartido:
+        return None
+    bitacora = BitacoraJuegos(directorio, *([instantanea_cada] if instantanea_cada else []))
+    return bitacora
+
+
+@app.before_request
+def _arrancar_bitacora():
+    if bitacora is not None and not bitacora.activo:
+        bitacora.iniciar()
+
+
+if os.environ.get('CATAPULTA_BITACORA'):
+    iniciar_bitacora(os.environ['CATAPULTA_BITACORA'],
+                     int(os.environ.get('CATAPULTA_INSTANTANEA_CADA', 0)) or None)
+
+
+def id_juego_sesion():
+    """Identificador del juego de la sesión actual (lo crea si aún no tiene)"""
     if 'game_id' not in session:
         session['game_id'] = secrets.token_hex(8)
+    return session['game_id']
+
+
+def obtener_juego():
+    """
+    Obtiene o crea el juego de la sesión actual. No prepara su generador:
+    eso lo hace solo quien va a cambiar el juego, con el lock del juego
+    (ver ejecutar_accion)
+    """
+    game_id = id_juego_sesion()
+    _purgar_si_toca()
     
-    game_id = session['game_id']
-    
-    if game_id not in juegos:
-        juegos[game_id] = {
-            'catapulta': None,
-            'enemigos': [],
-            'nivel': 1,
-            'puntos': 0
-        }
+    with _motores_lock:
+        activo = _motores.get(game_id)
+    if activo is not None:
+        return activo[1]
     
-    return juegos[game_id]
+    juego = juegos.obtener(game_id)
+    if juego is None and bitacora is not None:
+        juego = bitacora.recuperar(game_id)
+        if juego is not None:
+            juegos.guardar(game_id, juego)
+    if juego is None:
+        juego = acciones.nuevo_juego()
+        if not juegos.guardar_si_version(game_id, juego, None):
+            # Otro worker lo acaba de crear
+            juego = juegos.obtener(game_id) or juego
+    return juego
+
+
+def _purgar_si_toca():
+    """Expulsa los juegos inactivos cada INTERVALO_PURGA segundos"""
+    global _ultima_purga
+    ahora = time.monotonic()
+    if ahora - _ultima_purga >= INTERVALO_PURGA:
+        _ultima_purga = ahora
+        juegos.purgar()
+
+
+def obtener_condicion(game_id):
+    """
+    Obtiene (o crea) la condición de cambios de un juego. Su lock
+    (reentrante) es también el del estado del juego: lo toman los ticks del
+    motor en tiempo real y quien lo serializa.
+    """
+    with _condiciones_lock:
+        condicion = _condiciones.get(game_id)
+        if condicion is None:
+            condicion = _condiciones[game_id] = threading.Condition(threading.RLock())
+        return condicion
+
+
+def notificar_cambio(juego, game_id=None):
+    """
+    Marca un cambio de estado del juego, lo guarda y despierta a sus
+    streams. Retorna False, sin guardarlo, si otro worker cambió el juego
+    guardado desde que se leyó (ver AlmacenJuegos.guardar_si_version).
+    """
+    if game_id is None:
+        game_id = session['game_id']
+    condicion = obtener_condicion(game_id)
+    with condicion:
+        base = juego['version']
+        juego['version'] += 1
+        if not juegos.guardar_si_version(game_id, juego, base):
+            juego['version'] = base
+            return False
+        condicion.notify_all()
+        return True
 
 
 @app.route('/')
 def index():
     """Página principal"""
+    # Fijar la sesión antes de que el navegador abra el stream y las llamadas a la API
+    id_juego_sesion()
     return render_template('index.html')
 
 
+def datos_peticion():
+    """
+    Cuerpo JSON de la petición: {} si no tiene (o no es JSON) y None si no
+    es un objeto (una lista o un número no llevan los campos de una acción)
+    """
+    data = request.get_json(silent=True)
+    if data is None:
+        return {}
+    return data if isinstance(data, dict) else None
+
+
+def ejecutar_accion(nombre):
+    """
+    Ejecuta una acción de catapulta.acciones sobre el juego de la sesión.
+
+    Las acciones de un juego se ejecutan de una en una, con el lock de su
+    condición, y solo ellas siembran el generador: una lectura concurrente
+    (/api/estado, /api/stream) no lo cambia a mitad de una acción. Todas
+    cambian el juego, así que se rechazan mientras corre una batalla en
+    tiempo real (el motor es el dueño del juego y de su generador; la
+    bitácora lo retoma con la instantánea del final de la batalla).
+
+    Con un almacén compartido otro worker puede cambiar el mismo juego a la
+    vez: si al guardar el juego ya no está en la versión leída, la acción
+    se repite sobre el estado actual (hasta REINTENTOS_ACCION veces).
+    """
+    data = datos_peticion()
+    if data is None:
+        return jsonify(PETICION_INVALIDA)
+    game_id = id_juego_sesion()
+    for _ in range(REINTENTOS_ACCION):
+        with obtener_condicion(game_id):
+            if en_tiempo_real():
+                return jsonify({'success': False, 'error': 'Batalla en tiempo real en curso'})
+            juego = obtener_juego()
+            preparar_generador(juego)
+            grabador = bitacora.preparar(game_id, juego) if bitacora is not None else None
+            try:
+                respuesta, cambio = acciones.ACCIONES[nombre](juego, data)
+            finally:
+                if grabador is not None:
+                    grabador.soltar(juego)
+            if not cambio:
+                return jsonify(respuesta)
+            if not notificar_cambio(juego, game_id):
+                continue
+            if grabador is not None:
+                bitacora.registrar(game_id, nombre, data, juego, grabador.tiradas)
+            if nombre in acciones.CON_ESTADO:
+                # Si el cliente indica su versión, se envía solo el parche del estado
+                acciones.agregar_estado(respuesta, versiones, game_id, juego, data.get('version'))
+            if nombre in metricas.DISPAROS:
+                contar_disparo(nombre, respuesta['acierto'])
+            return jsonify(respuesta)
+    return jsonify({'success': False, 'error': 'El juego está cambiando en otro proceso; inténtalo de nuevo'})
+
+
 @app.route('/api/crear_catapulta', methods=['POST'])
 def crear_catapulta():
     """Crea una nueva catapulta"""
-    data = request.json
-    nombre = data.get('nombre', 'Mi Catapulta')
-    
-    juego = obtener_juego()
-    juego['catapulta'] = Catapulta(nombre)
-    
-    return jsonify({'success': True, 'mensaje': f"Catapulta '{nombre}' creada"})
+    return ejecutar_accion('crear_catapulta')
 
 
 @app.route('/api/agregar_material', methods=['POST'])
 def agregar_material():
     """Agrega un material a la catapulta"""
-    data = request.json
-    tipo = data.get('tipo')
-    valor = data.get('valor')
-    
-    juego = obtener_juego()
-    catapulta = juego['catapulta']
-    
-    if not catapulta:
-        return jsonify({'success': False, 'error': 'Catapulta no creada'})
-    
-    if catapulta.construida:
-        return jsonify({'success': False, 'error': 'Catapulta ya construida'})
-    
-    try:
-        if tipo == 'palo':
-            catapulta.agregar_palo(int(valor))
-        elif tipo == 'goma':
-            catapulta.agregar_goma(int(valor))
-        elif tipo == 'tapon':
-            catapulta.agregar_tapon()
-        elif tipo == 'corcho':
-            for _ in range(int(valor)):
-                catapulta.agregar_corcho()
-        elif tipo == 'pegamento':
-            catapulta.agregar_pegamento(int(valor))
-        
-        return jsonify({
-            'success': True,
-            'inventario': obtener_inventario(catapulta)
-        })
-    except Exception as e:
-        return jsonify({'success': False, 'error': str(e)})
+    return ejecutar_accion('agregar_material')
+
+
+@app.route('/api/agregar_materiales', methods=['POST'])
+def agregar_materiales():
+    """
+    Agrega una lista completa de materiales en una sola petición:
+    {"palos": [30, 40], "gomas": [8], "tapones": 2, "corchos": 20, "pegamento": 7}
+    """
+    return ejecutar_accion('agregar_materiales')
 
 
 @app.route('/api/construir', methods=['POST'])
 def construir():
     """Construye la catapulta"""
-    juego = obtener_juego()
-    catapulta = juego['catapulta']
-    
-    if not catapulta:
-        return jsonify({'success': False, 'error': 'Catapulta no creada'})
-    
-    if catapulta.construir():
-        return jsonify({
-            'success': True,
-            'mensaje': f"¡Catapulta '{catapulta.nombre}' construida con éxito!",
-            'estado': obtener_estado_catapulta(catapulta)
-        })
-    else:
-        return jsonify({
-            'success': False,
-            'error': 'No se pudo construir. Verifica los materiales mínimos.'
-        })
+    return ejecutar_accion('construir')
 
 
 @app.route('/api/generar_oleada', methods=['POST'])
 def generar_oleada():
     """Genera una nueva oleada de enemigos"""
-    juego = obtener_juego()
-    
-    if not juego['catapulta'] or not juego['catapulta'].construida:
-        return jsonify({'success': False, 'error': 'Construye la catapulta primero'})
-    
-    juego['enemigos'] = generar_oleada_enemigos(juego['nivel'])
-    
-    return jsonify({
-        'success': True,
-        'nivel': juego['nivel'],
-        'enemigos': obtener_enemigos(juego['enemigos'])
-    })
+    return ejecutar_accion('generar_oleada')
 
 
 @app.route('/api/disparar', methods=['POST'])
 def disparar():
     """Dispara a un enemigo"""
-    data = request.json
-    indice_enemigo = data.get('enemigo')
-    
-    juego = obtener_juego()
-    catapulta = juego['catapulta']
-    
-    if not catapulta or not catapulta.construida:
-        return jsonify({'success': False, 'error': 'Catapulta no lista'})
-    
-    enemigos_vivos = [e for e in juego['enemigos'] if e.vivo]
-    
-    if indice_enemigo >= len(enemigos_vivos):
-        return jsonify({'success': False, 'error': 'Enemigo inválido'})
-    
-    enemigo = enemigos_vivos[indice_enemigo]
-    acierto = catapulta.disparar(enemigo)
-    
-    eliminado = not enemigo.vivo
-    if eliminado:
-        juego['puntos'] += 50
-    
-    # Verificar victoria
-    enemigos_vivos = [e for e in juego['enemigos'] if e.vivo]
-    victoria = len(enemigos_vivos) == 0
-    
-    if victoria:
-        juego['puntos'] += juego['nivel'] * 100
-        juego['nivel'] += 1
-    
-    return jsonify({
-        'success': True,
-        'acierto': acierto,
-        'eliminado': eliminado,
-        'victoria': victoria,
-        'estado': obtener_estado_catapulta(catapulta),
-        'enemigos': obtener_enemigos(juego['enemigos']),
-        'puntos': juego['puntos'],
-        'nivel': juego['nivel'],
-        'game_over': catapulta.estado == EstadoCatapulta.DESTRUIDA
-    })
+    return ejecutar_accion('disparar')
+
+
+@app.route('/api/disparar_area', methods=['POST'])
+def disparar_area():
+    """
+    Disparo de área: {"distancia": 30} daña a todos los enemigos vivos a
+    Catapulta.RADIO_AREA metros o menos del punto de impacto
+    """
+    return ejecutar_accion('disparar_area')
 
 
 @app.route('/api/reparar', methods=['POST'])
 def reparar():
     """Repara la catapulta"""
-    juego = obtener_juego()
-    catapulta = juego['catapulta']
-    
-    if not catapulta:
-        return jsonify({'success': False, 'error': 'Catapulta no creada'})
-    
-    if catapulta.reparar():
-        return jsonify({
-            'success': True,
-            'mensaje': 'Catapulta reparada',
-            'estado': obtener_estado_catapulta(catapulta)
-        })
-    else:
-        return jsonify({
-            'success': False,
-            'error': 'No se pudo reparar (¿sin recursos?)'
-        })
+    return ejecutar_accion('reparar')
 
 
 @app.route('/api/mejorar', methods=['POST'])
 def mejorar():
     """Mejora la catapulta"""
-    data = request.json
-    tipo = data.get('tipo')
+    return ejecutar_accion('mejorar')
+
+
+def en_tiempo_real():
+    """
+    True si el juego de la sesión tiene una batalla en tiempo real en marcha,
+    en este proceso o (con un almacén compartido) en otro
+    """
+    game_id = session.get('game_id')
+    with _motores_lock:
+        if game_id in _motores:
+            return True
+    return game_id is not None and juegos.batalla_en_curso(game_id)
+
+
+@app.route('/api/tiempo_real', methods=['POST'])
+def tiempo_real():
+    """
+    Batalla en tiempo real contra la oleada actual (ver catapulta.tiempo_real).
+
+    {"accion": "iniciar"} la pone en marcha; mientras dura, las órdenes son
+    {"accion": "disparar", "id": 3}, {"accion": "disparar_area",
+    "distancia": 30} y {"accion": "reparar"}, que se ejecutan cuando la
+    catapulta ha recargado, y {"accion": "detener"} la para. El estado llega
+    por /api/stream (o /api/estado) a medida que avanzan los enemigos.
+    """
+    data = datos_peticion()
+    if data is None:
+        return jsonify(PETICION_INVALIDA)
+    accion = data.get('accion')
     
-    juego = obtener_juego()
-    catapulta = juego['catapulta']
+    game_id = id_juego_sesion()
+    with _motores_lock:
+        activo = _motores.get(game_id)
+    if activo is None and juegos.batalla_en_curso(game_id):
+        return jsonify({'success': False,
+                        'error': 'La batalla se juega en otro proceso del servidor; '
+                                 'sus órdenes deben llegar a ese proceso'})
     
-    if not catapulta:
-        return jsonify({'success': False, 'error': 'Catapulta no creada'})
+    if accion == 'iniciar':
+        # Todo bajo el lock del juego: dos 'iniciar' a la vez no lanzan dos motores
+        with obtener_condicion(game_id):
+            juego = obtener_juego()
+            if not juego['catapulta'] or not juego['catapulta'].construida:
+                return jsonify({'success': False, 'error': 'Construye la catapulta primero'})
+            if juego['enemigos'].superada:
+                return jsonify({'success': False, 'error': 'No hay enemigos'})
+            # Generador de la batalla (lo usará el hilo del motor)
+            preparar_generador(juego)
+            if not iniciar_tiempo_real(game_id, juego):
+                return jsonify({'success': False, 'error': 'La batalla ya está en marcha'})
+        return jsonify({'success': True})
     
-    if catapulta.mejorar(tipo):
-        return jsonify({
-            'success': True,
-            'mensaje': f'Mejora {tipo} aplicada',
-            'estado': obtener_estado_catapulta(catapulta)
-        })
+    if activo is None:
+        return jsonify({'success': False, 'error': 'No hay ninguna batalla en tiempo real'})
+    motor = activo[0]
+    
+    if accion == 'detener':
+        motor.detener()
+    elif accion == 'disparar':
+        if not isinstance(data.get('id'), int):
+            return jsonify({'success': False, 'error': 'Enemigo inválido'})
+        motor.ordenar_disparo(data['id'])
+    elif accion == 'disparar_area':
+        distancia = data.get('distancia')
+        if not isinstance(distancia, (int, float)) or isinstance(distancia, bool) or distancia < 0:
+            return jsonify({'success': False, 'error': 'Distancia inválida'})
+        motor.ordenar_disparo_area(distancia)
+    elif accion == 'reparar':
+        motor.ordenar_reparacion()
     else:
-        return jsonify({
-            'success': False,
-            'error': 'No se pudo mejorar'
-        })
+        return jsonify({'success': False, 'error': 'Acción no reconocida'})
+    return jsonify({'success': True, 'ordenes_pendientes': motor.ordenes_pendientes})
+
+
+def iniciar_tiempo_real(game_id, juego):
+    """
+    Crea el motor de la oleada del juego y lo lanza en un hilo. Retorna
+    False (sin lanzar nada) si el juego ya tiene una batalla en marcha.
+    """
+    # Los ticks toman la condición del juego: quien lo serializa con ella
+    # (versiones.respuesta) nunca ve un tick a medias
+    motor = MotorBatalla(juego['catapulta'], juego['enemigos'], lock=obtener_condicion(game_id),
+                         al_disparar=contar_disparo)
+    
+    def al_cambiar_oleada(tipo, oleada, enemigo):
+        if tipo == 'eliminado':
+            juego['puntos'] += 50
+    
+    renovada = time.monotonic()
+    
+    def al_tick(motor):
+        nonlocal renovada
+        if motor.ticks % TICKS_POR_PUBLICACION == 0 and not motor.terminada:
+            juego['tiempo_real'] = {'activo': True, 'fin': None, 'cargada': motor.cargada}
+            if not notificar_cambio(juego, game_id):
+                # Otro worker cambió el juego guardado: la batalla ya no es la suya
+                motor.detener()
+        if time.monotonic() - renovada >= RENOVACION_BATALLA:
+            renovada = time.monotonic()
+            juegos.anotar_batalla(game_id, PLAZO_BATALLA)
+    
+    def batalla():
+        try:
+            motor.ejecutar_en_tiempo_real(al_tick)
+        finally:
+            # Como los ticks, bajo el lock del juego: nadie lo lee a medio cerrar
+            with obtener_condicion(game_id):
+                juego['enemigos'].cancelar(al_cambiar_oleada)
+                if motor.fin == 'victoria':
+                    juego['puntos'] += juego['nivel'] * 100
+                    juego['nivel'] += 1
+                juego['tiempo_real'] = {'activo': False, 'fin': motor.fin, 'cargada': True}
+                notificar_cambio(juego, game_id)
+                with _motores_lock:
+                    _motores.pop(game_id, None)
+                juegos.terminar_batalla(game_id)
+                if bitacora is not None:
+                    bitacora.instantanea(game_id, juego)
+    
+    # El motor se anota y se comprueba en un solo paso
+    with _motores_lock:
+        if game_id in _motores:
+            return False
+        _motores[game_id] = (motor, juego)
+    juego['enemigos'].suscribir(al_cambiar_oleada)
+    juego['tiempo_real'] = {'activo': True, 'fin': None, 'cargada': True}
+    juegos.anotar_batalla(game_id, PLAZO_BATALLA)
+    notificar_cambio(juego, game_id)
+    threading.Thread(target=batalla, daemon=True).start()
+    return True
 
 
 @app.route('/api/estado', methods=['GET'])
 def estado():
-    """Obtiene el estado completo del juego"""
+    """
+    Obtiene el estado del juego.
+    Con ?version=N retorna 304 si no hay cambios o un parche desde N.
+    """
     juego = obtener_juego()
-    catapulta = juego['catapulta']
+    version_cliente = request.args.get('version', type=int)
     
-    return jsonify({
-        'catapulta': obtener_estado_catapulta(catapulta) if catapulta else None,
-        'enemigos': obtener_enemigos(juego['enemigos']),
-        'nivel': juego['nivel'],
-        'puntos': juego['puntos']
-    })
-
-
-# === FUNCIONES AUXILIARES ===
-
-def obtener_inventario(catapulta):
-    """Retorna el inventario de la catapulta"""
-    return {
-        'palos': len(catapulta.palos),
-        'gomas': len(catapulta.gomas),
-        'tapones': len(catapulta.tapones),
-        'corchos': len(catapulta.corchos),
-        'pegamento': catapulta.pegamento is not None
-    }
-
-
-def obtener_estado_catapulta(catapulta):
-    """Retorna el estado completo de la catapulta"""
-    if not catapulta:
-        return None
+    game_id = session['game_id']
+    tipo, datos = versiones.respuesta(game_id, juego, version_cliente, obtener_condicion(game_id))
+    if tipo == 'sin_cambios':
+        return '', 304
+    return jsonify(datos)
+
+
+@app.route('/api/stream', methods=['GET'])
+def stream():
+    """
+    Stream Server-Sent Events con el estado del juego.
+    Envía el estado completo al conectar y después parches cuando cambia.
+    Al reconectar, el navegador envía Last-Event-ID y se continúa desde ahí.
+    """
+    juego = obtener_juego()
+    game_id = session['game_id']
+    condicion = obtener_condicion(game_id)
+    ultimo_id = request.headers.get('Last-Event-ID', type=int)
+    
+    almacen = juegos
+    espera = INTERVALO_SONDEO_COMPARTIDO if almacen.compartido else INTERVALO_KEEPALIVE
+    
+    def version_actual(juego_stream):
+        # Con un almacén compartido, el cambio puede venir de otro proceso
+        if almacen.compartido:
+            return almacen.version(game_id)
+        return juego_stream['version']
+    
+    def eventos():
+        juego_stream = juego
+        ultima_version = ultimo_id
+        ultimo_envio = time.monotonic()
+        while True:
+            with condicion:
+                cambiado = condicion.wait_for(lambda: version_actual(juego_stream) != ultima_version,
+                                              timeout=espera)
+            
+            if not cambiado:
+                if time.monotonic() - ultimo_envio < INTERVALO_KEEPALIVE:
+                    continue
+                # Comprobar que el juego no fue expulsado (y quizá recreado)
+                if not almacen.compartido and almacen.obtener(game_id) is not juego_stream:
+                    return  # El navegador reconectará y recibirá el estado completo
+                ultimo_envio = time.monotonic()
+                yield ": keep-alive\n\n"
+                continue
+            
+            juego_stream = almacen.obtener(game_id)
+            if juego_stream is None:
+                return  # Juego expulsado: el navegador reconectará con uno nuevo
+            
+            tipo, datos = versiones.respuesta(game_id, juego_stream, ultima_version, condicion)
+            if tipo == 'sin_cambios':
+                continue
+            
+            ultimo_envio = time.monotonic()
+            if tipo == 'parche':
+                ultima_version = datos['version']
+                yield f"event: parche\nid: {ultima_version}\ndata: {json.dumps(datos)}\n\n"
+            else:
+                ultima_version = datos['version']
+                yield f"id: {ultima_version}\ndata: {json.dumps(datos)}\n\n"
     
-    return {
-        'nombre': catapulta.nombre,
-        'construida': catapulta.construida,
-        'estado': catapulta.estado.value if catapulta.construida else 'No construida',
-        'durabilidad': catapulta.durabilidad if catapulta.construida else 0,
-        'durabilidad_max': catapulta._durabilidad_maxima if catapulta.construida else 0,
-        'durabilidad_pct': catapulta.durabilidad_porcentaje if catapulta.construida else 0,
-        'potencia': catapulta.potencia,
-        'alcance': catapulta.alcance,
-        'precision': catapulta.precision,
-        'estabilidad': catapulta.estabilidad,
-        'disparos': catapulta.disparos_realizados,
-        'desgaste': catapulta.nivel_desgaste,
-        'enemigos_eliminados': catapulta.enemigos_eliminados,
-        'inventario': obtener_inventario(catapulta),
-        'historial': catapulta.historial_disparos[-10:] if hasattr(catapulta, 'historial_disparos') else []
-    }
-
-
-def obtener_enemigos(enemigos):
-    """Retorna la lista de enemigos"""
-    return [{
-        'nombre': e.nombre,
-        'vida': e.vida,
-        'vida_max': e.vida_maxima,
-        'distancia': e.distancia,
-        'armadura': e.armadura,
-        'vivo': e.vivo
-    } for e in enemigos]
+    return Response(stream_with_context(eventos()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+# Métricas de Prometheus en /metrics (latencias por ruta, serialización,
+# disparos y juegos vivos); CATAPULTA_METRICAS=0 las apaga sin coste
+registro_metricas = metricas.instalar(app, lambda: juegos, versiones) if metricas.activas() else None
+
+
+def contar_disparo(tipo, acierto):
+    """Cuenta en las métricas un disparo de una acción o del motor"""
+    if registro_metricas is not None:
+        metricas.contar_disparo(registro_metricas, tipo, acierto)
 
 
 def iniciar_servidor(host='0.0.0.0', port=5000, debug=True):
     """Inicia el servidor Flask"""
-    app.run(host=host, port=port, debug=debug)
+    app.run(host=host, port=port, debug=debug, threaded=True)
@@ -0,0 +1,287 @@
+"""
+Simulador de partidas sin interfaz.
+
+Juega partidas completas (construcción → oleadas → fin de la partida) con una
+política de selección de objetivos y sin entrada/salida, y agrega los
+resultados para ajustar el equilibrio del juego.
+
+Ejemplo:
+    construccion = Construccion(palos=[40, 40], gomas=[8], tapones=3, corchos=30, pegamento=8)
+    estadisticas = simular(construccion, n_partidas=1000, politica='mas_cercano')
+    print(estadisticas.resumen())
+"""
+
+import random
+
+from catapulta import eventos
+from catapulta.catapulta import Catapulta, EstadoCatapulta
+from catapulta.enemigos import generar_oleada_enemigos
+
+
+class Construccion:
+    """Lista de materiales con la que se construye cada catapulta simulada"""
+
+    def __init__(self, palos=(30, 30), gomas=(5,), tapones=2, corchos=20, pegamento=5):
+        self.palos = list(palos)
+        self.gomas = list(gomas)
+        self.tapones = tapones
+        self.corchos = corchos
+        self.pegamento = pegamento
+
+    def crear_catapulta(self, nombre="Simulada", sumidero=eventos.NULO, rng=None):
+        """Crea una catapulta (sin construir) con estos materiales; por defecto sin eventos"""
+        catapulta = Catapulta(nombre, sumidero, rng)
+        catapulta.agregar_materiales(self.palos, self.gomas, self.tapones, self.corchos, self.pegamento)
+        return catapulta
+
+    def __repr__(self):
+        return (f"Construccion(palos={self.palos}, gomas={self.gomas}, tapones={self.tapones}, "
+                f"corchos={self.corchos}, pegamento={self.pegamento})")
+
+
+# === POLÍTICAS DE SELECCIÓN DE OBJETIVO ===
+# Reciben los enemigos vivos al alcance (nunca vacío) y la catapulta, y
+# retornan el enemigo al que disparar.
+
+def objetivo_mas_cercano(enemigos, catapulta):
+    """Dispara al enemigo más cercano"""
+    return min(enemigos, key=lambda e: e.distancia)
+
+
+def objetivo_mas_debil(enemigos, catapulta):
+    """Dispara al enemigo con menos vida (rematar primero)"""
+    return min(enemigos, key=lambda e: (e.vida, e.distancia))
+
+
+def objetivo_menos_blindado(enemigos, catapulta):
+    """Dispara al enemigo con menos armadura (más daño efectivo por disparo)"""
+    return min(enemigos, key=lambda e: (e.armadura, e.vida))
+
+
+def objetivo_aleatorio(enemigos, catapulta):
+    """Dispara a un enemigo al azar (con el generador de la partida)"""
+    return catapulta.rng.choice(enemigos)
+
+
+POLITICAS = {
+    'mas_cercano': objetivo_mas_cercano,
+    'mas_debil': objetivo_mas_debil,
+    'menos_blindado': objetivo_menos_blindado,
+    'aleatorio': objetivo_aleatorio,
+}
+
+
+# === RESULTADOS ===
+
+class ResultadoPartida:
+    """Resultado de una partida simulada"""
+
+    def __init__(self):
+        self.construida = False
+        self.intentos_construccion = 0
+        self.oleadas_superadas = 0
+        self.disparos = 0
+        self.aciertos = 0
+        self.bajas = 0
+        self.reparaciones = 0
+        self.puntos = 0
+        self.motivo_fin = None
+        self.curva_durabilidad = []  # % de durabilidad tras cada disparo
+
+
+class EstadisticasSimulacion:
+    """Estadísticas agregadas de un conjunto de partidas"""
+
+    def __init__(self):
+        self.partidas = 0
+        self.construcciones_fallidas = 0
+        self.intentos_construccion = 0
+        self.oleadas_superadas = 0
+        self.max_oleadas_superadas = 0
+        self.distribucion_oleadas = {}  # oleadas superadas -> número de partidas
+        self.disparos = 0
+        self.aciertos = 0
+        self.bajas = 0
+        self.reparaciones = 0
+        self.puntos = 0
+        self.motivos_fin = {}
+        self._suma_durabilidad = []  # por índice de disparo
+        self._partidas_por_disparo = []
+
+    def agregar(self, resultado):
+        """Acumula el resultado de una partida"""
+        self.partidas += 1
+        self.intentos_construccion += resultado.intentos_construccion
+        if not resultado.construida:
+            self.construcciones_fallidas += 1
+        self.oleadas_superadas += resultado.oleadas_superadas
+        self.max_oleadas_superadas = max(self.max_oleadas_superadas, resultado.oleadas_superadas)
+        self.distribucion_oleadas[resultado.oleadas_superadas] = \
+            self.distribucion_oleadas.get(resultado.oleadas_superadas, 0) + 1
+        self.disparos += resultado.disparos
+        self.aciertos += resultado.aciertos
+        self.bajas += resultado.bajas
+        self.reparaciones += resultado.reparaciones
+        self.puntos += resultado.puntos
+        self.motivos_fin[resultado.motivo_fin] = self.motivos_fin.get(resultado.motivo_fin, 0) + 1
+
+        for i, porcentaje in enumerate(resultado.curva_durabilidad):
+            if i == len(self._suma_durabilidad):
+                self._suma_durabilidad.append(0.0)
+                self._partidas_por_disparo.append(0)
+            self._suma_durabilidad[i] += porcentaje
+            self._partidas_por_disparo[i] += 1
+
+    def combinar(self, otras):
+        """Acumula otras estadísticas (por ejemplo, de otro proceso)"""
+        self.partidas += otras.partidas
+        self.construcciones_fallidas += otras.construcciones_fallidas
+        self.intentos_construccion += otras.intentos_construccion
+        self.oleadas_superadas += otras.oleadas_superadas
+        self.max_oleadas_superadas = max(self.max_oleadas_superadas, otras.max_oleadas_superadas)
+        for oleadas, n in otras.distribucion_oleadas.items():
+            self.distribucion_oleadas[oleadas] = self.distribucion_oleadas.get(oleadas, 0) + n
+        self.disparos += otras.disparos
+        self.aciertos += otras.aciertos
+        self.bajas += otras.bajas
+        self.reparaciones += otras.reparaciones
+        self.puntos += otras.puntos
+        for motivo, n in otras.motivos_fin.items():
+            self.motivos_fin[motivo] = self.motivos_fin.get(motivo, 0) + n
+        for i, (suma, n) in enumerate(zip(otras._suma_durabilidad, otras._partidas_por_disparo)):
+            if i == len(self._suma_durabilidad):
+                self._suma_durabilidad.append(0.0)
+                self._partidas_por_disparo.append(0)
+            self._suma_durabilidad[i] += suma
+            self._partidas_por_disparo[i] += n
+
+    @property
+    def media_oleadas_superadas(self):
+        return self.oleadas_superadas / self.partidas if self.partidas else 0
+
+    @property
+    def disparos_por_baja(self):
+        return self.disparos / self.bajas if self.bajas else float('inf')
+
+    @property
+    def tasa_acierto(self):
+        return self.aciertos / self.disparos if self.disparos else 0
+
+    @property
+    def curva_durabilidad(self):
+        """Durabilidad media (%) tras el disparo i, entre las partidas que llegaron a él"""
+        return [suma / n for suma, n in zip(self._suma_durabilidad, self._partidas_por_disparo)]
+
+    def resumen(self):
+        """Retorna un diccionario con las estadísticas principales"""
+        return {
+            'partidas': self.partidas,
+            'construcciones_fallidas': self.construcciones_fallidas,
+            'media_oleadas_superadas': self.media_oleadas_superadas,
+            'max_oleadas_superadas': self.max_oleadas_superadas,
+            'distribucion_oleadas': dict(sorted(self.distribucion_oleadas.items())),
+            'disparos_por_baja': self.disparos_por_baja,
+            'tasa_acierto': self.tasa_acierto,
+            'reparaciones_por_partida': self.reparaciones / self.partidas if self.partidas else 0,
+            'puntos_medios': self.puntos / self.partidas if self.partidas else 0,
+            'motivos_fin': dict(self.motivos_fin),
+        }
+
+
+# === SIMULACIÓN ===
+
+class Simulador:
+    """
+    Juega partidas completas sin interfaz.
+
+    Parámetros:
+        politica: nombre en POLITICAS o función (enemigos, catapulta) -> enemigo
+        reparar: si repara la catapulta cuando está dañada o destruida
+        max_oleadas: oleadas tras las que se da la partida por ganada
+        max_intentos_construccion: intentos de construir antes de rendirse
+        semilla: semilla del generador propio del simulador; con la misma
+            semilla, las mismas partidas se repiten exactamente
+    """
+
+    def __init__(self, politica='mas_cercano', reparar=True, max_oleadas=50,
+                 max_intentos_construccion=20, semilla=None):
+        self.rng = random.Random(semilla)
+        self.politica = POLITICAS[politica] if isinstance(politica, str) else politica
+        self.reparar = reparar
+        self.max_oleadas = max_oleadas
+        self.max_intentos_construccion = max_intentos_construccion
+
+    def jugar_partida(self, construccion):
+        """Juega una partida completa y retorna su ResultadoPartida"""
+        return self._jugar_partida(construccion)
+
+    def simular(self, construccion, n_partidas):
+        """Juega `n_partidas` y retorna sus EstadisticasSimulacion"""
+        estadisticas = EstadisticasSimulacion()
+        for _ in range(n_partidas):
+            estadisticas.agregar(self._jugar_partida(construccion))
+        return estadisticas
+
+    def _jugar_partida(self, construccion):
+        resultado = ResultadoPartida()
+        catapulta = construccion.crear_catapulta(rng=self.rng)
+
+        while resultado.intentos_construccion < self.max_intentos_construccion:
+            resultado.intentos_construccion += 1
+            if catapulta.construir():
+                resultado.construida = True
+                break
+        if not resultado.construida:
+            resultado.motivo_fin = 'construccion_fallida'
+            return resultado
+
+        nivel = 1
+        while resultado.oleadas_superadas < self.max_oleadas:
+            enemigos = generar_oleada_enemigos(nivel, self.rng)
+            motivo = self._jugar_oleada(catapulta, enemigos, resultado)
+            if motivo:
+                resultado.motivo_fin = motivo
+                return resultado
+            resultado.oleadas_superadas += 1
+            resultado.puntos += nivel * 100
+            nivel += 1
+
+        resultado.motivo_fin = 'max_oleadas'
+        return resultado
+
+    def _jugar_oleada(self, catapulta, enemigos, resultado):
+        """Juega una oleada. Retorna el motivo de fin de partida, o None si se superó"""
+        while True:
+            if enemigos.num_vivos == 0:
+                return None
+
+            if self.reparar and catapulta.estado in (EstadoCatapulta.DANADA, EstadoCatapulta.DESTRUIDA):
+                if catapulta.reparar():
+                    resultado.reparaciones += 1
+            if catapulta.estado == EstadoCatapulta.DESTRUIDA:
+                return 'destruida'
+            if len(catapulta.corchos) == 0:
+                return 'sin_municion'
+
+            al_alcance = enemigos.en_alcance(catapulta.alcance)
+            if not al_alcance and self.reparar and catapulta.durabilidad < catapulta._durabilidad_maxima:
+                # El alcance depende de la durabilidad: reparar puede recuperarlo
+                if catapulta.reparar():
+                    resultado.reparaciones += 1
+                    continue
+            if not al_alcance:
+                return 'fuera_de_alcance'
+
+            objetivo = self.politica(al_alcance, catapulta)
+            if catapulta.disparar(objetivo):
+                resultado.aciertos += 1
+            resultado.disparos += 1
+            resultado.curva_durabilidad.append(catapulta.durabilidad_porcentaje)
+            if not objetivo.vivo:
+                resultado.bajas += 1
+                resultado.puntos += 50
+
+
+def simular(construccion, n_partidas=1000, politica='mas_cercano', **opciones):
+    """Atajo: juega `n_partidas` con un Simulador y retorna sus estadísticas"""
+    return Simulador(politica, **opciones).simular(construccion, n_partidas)
@@ -0,0 +1,305 @@
+"""
+Batallas en tiempo real con paso de tiempo fijo.
+
+Un MotorBatalla avanza una oleada en ticks de `dt` segundos: en cada tick
+los enemigos se acercan al castillo y, si la catapulta ya ha recargado,
+ejecuta la siguiente orden (disparar a un enemigo, disparo de área o
+reparar). El daño lo siguen resolviendo Catapulta y Enemigo; el motor solo
+decide cuándo pasa cada cosa.
+
+El mismo motor se mueve de dos formas:
+
+    - Sin pausa (ejecutar): los ticks se encadenan tan rápido como se pueda,
+      para simulaciones y pruebas; una política elige los objetivos.
+    - Con el reloj (ejecutar_en_tiempo_real): un tick cada `dt` segundos de
+      reloj, con un callback tras cada tick para refrescar la interfaz. Tk
+      puede llamar a paso() desde root.after en su lugar.
+
+Ejemplo:
+    motor = MotorBatalla(catapulta, oleada, politica='mas_cercano', perfilar=True)
+    motor.ejecutar()
+    print(motor.fin, motor.perfil.resumen())
+"""
+
+from collections import deque
+import threading
+import time
+
+from catapulta.catapulta import EstadoCatapulta
+from catapulta.simulador import POLITICAS, objetivo_mas_cercano
+
+
+# Duración de un tick (segundos)
+DT = 0.05
+# Metros por segundo que avanzan los enemigos
+VELOCIDAD_ENEMIGOS = 1.0
+# Segundos entre dos acciones de la catapulta
+TIEMPO_RECARGA = 1.5
+# Ticks de retraso a partir de los que el reloj deja de intentar recuperarlos
+MAX_TICKS_RETRASO = 5
+
+
+class PerfilTicks:
+    """Contadores de duración de los ticks (segundos)"""
+
+    def __init__(self):
+        self.ticks = 0
+        self.total = 0.0
+        self.maximo = 0.0
+        self.minimo = float('inf')
+        self.retrasos = 0  # ticks de reloj que empezaron tarde
+
+    def registrar(self, duracion):
+        self.ticks += 1
+        self.total += duracion
+        if duracion > self.maximo:
+            self.maximo = duracion
+        if duracion < self.minimo:
+            self.minimo = duracion
+
+    @property
+    def media(self):
+        return self.total / self.ticks if self.ticks else 0.0
+
+    @property
+    def ticks_por_segundo(self):
+        """Ticks por segundo de cálculo (sin contar las esperas del reloj)"""
+        return self.ticks / self.total if self.total else 0.0
+
+    def resumen(self):
+        """Retorna un diccionario con los contadores (duraciones en µs)"""
+        return {
+            'ticks': self.ticks,
+            'media_us': self.media * 1e6,
+            'maximo_us': self.maximo * 1e6,
+            'minimo_us': (self.minimo if self.ticks else 0.0) * 1e6,
+            'ticks_por_segundo': self.ticks_por_segundo,
+            'retrasos': self.retrasos,
+        }
+
+
+class MotorBatalla:
+    """
+    Batalla de una catapulta contra una oleada, en ticks de `dt` segundos.
+
+    Parámetros:
+        catapulta: Catapulta construida
+        oleada: Oleada u OleadaMasiva
+        dt: duración de un tick
+        velocidad: metros por segundo que avanzan los enemigos
+        recarga: segundos entre dos acciones de la catapulta
+        politica: nombre en simulador.POLITICAS o función (enemigos,
+            catapulta) -> enemigo; si se indica, la catapulta dispara sola
+            cuando no hay órdenes
+        reparar: con política, si repara sola cuando está dañada o destruida
+        perfilar: si mide la duración de cada tick (en self.perfil)
+        lock: lock (reentrante) de los ticks; por defecto uno propio. Quien
+            lea el juego desde otro hilo puede pasar el suyo para no ver
+            nunca un tick a medias
+        al_disparar: función (tipo, acierto) a la que se llama tras cada
+            disparo de la catapulta ('disparar' o 'disparar_area')
+
+    Atributos:
+        ticks, tiempo: ticks jugados y segundos de juego transcurridos
+        acciones: acciones ejecutadas por la catapulta
+        fin: None mientras dura la batalla; 'victoria', 'castillo_alcanzado'
+            o 'destruida' (la catapulta está destruida y nadie va a repararla)
+
+    Todas las operaciones toman self.lock, así que se pueden dar órdenes
+    desde otro hilo mientras ejecutar_en_tiempo_real mueve el motor (que
+    también llama a al_tick bajo self.lock).
+    """
+
+    def __init__(self, catapulta, oleada, dt=DT, velocidad=VELOCIDAD_ENEMIGOS,
+                 recarga=TIEMPO_RECARGA, politica=None, reparar=True, perfilar=False, lock=None,
+                 al_disparar=None):
+        if isinstance(politica, str):
+            politica = POLITICAS[politica]
+        # El más cercano lo da el índice de la oleada sin listar los que están
+        # al alcance (que con una OleadaMasiva serían miles de vistas)
+        self._usar_indice = politica is objetivo_mas_cercano
+        self.catapulta = catapulta
+        self.oleada = oleada
+        self.dt = dt
+        self.velocidad = velocidad
+        self.recarga = recarga
+        self.politica = politica
+        self.reparar = reparar
+        self.perfil = PerfilTicks() if perfilar else None
+        self.al_disparar = al_disparar
+
+        self.ticks = 0
+        self.tiempo = 0.0
+        self.acciones = 0
+        self.fin = None
+        self.recarga_restante = 0.0
+        self._avance_pendiente = 0.0  # metros acumulados aún sin aplicar
+        self._ordenes = deque()
+        self._detener = threading.Event()
+        self.lock = lock if lock is not None else threading.RLock()
+
+    @property
+    def terminada(self):
+        return self.fin is not None
+
+    @property
+    def cargada(self):
+        """True si la catapulta puede actuar en el próximo tick"""
+        return self.recarga_restante <= 1e-9  # tolera el error al restar dt
+
+    # === ÓRDENES ===
+
+    def ordenar_disparo(self, id_enemigo):
+        """Encola un disparo contra el enemigo con ese id"""
+        with self.lock:
+            self._ordenes.append(('disparar', id_enemigo))
+
+    def ordenar_disparo_area(self, distancia):
+        """Encola un disparo de área a `distancia` metros"""
+        with self.lock:
+            self._ordenes.append(('disparar_area', distancia))
+
+    def ordenar_reparacion(self):
+        """Encola una reparación"""
+        with self.lock:
+            self._ordenes.append(('reparar', None))
+
+    @property
+    def ordenes_pendientes(self):
+        return len(self._ordenes)
+
+    # === TICKS ===
+
+    def paso(self):
+        """Juega un tick. Retorna False si la batalla ha terminado"""
+        with self.lock:
+            if self.fin is not None:
+                return False
+            inicio = time.perf_counter() if self.perfil else 0.0
+
+            self.ticks += 1
+            self.tiempo += self.dt
+
+            # Los enemigos avanzan metros enteros (las distancias son enteros)
+            self._avance_pendiente += self.velocidad * self.dt
+            if self._avance_pendiente >= 1:
+                metros = int(self._avance_pendiente)
+                self._avance_pendiente -= metros
+                self.oleada.avanzar(metros)
+
+            if self.recarga_restante > 0:
+                self.recarga_restante -= self.dt
+            if self.cargada and self._actuar():
+                self.acciones += 1
+                self.recarga_restante = self.recarga
+
+            self._comprobar_fin()
+            if self.perfil:
+                self.perfil.registrar(time.perf_counter() - inicio)
+            return self.fin is None
+
+    def _actuar(self):
+        """Ejecuta la siguiente orden (o la de la política). Retorna True si hubo acción"""
+        orden = self._ordenes.popleft() if self._ordenes else self._orden_automatica()
+        if orden is None:
+            return False
+        tipo, argumento = orden
+        if tipo == 'disparar':
+            enemigo = self.oleada.por_id(argumento)
+            if enemigo is None or not enemigo.vivo:
+                return False
+            acierto = self.catapulta.disparar(enemigo)
+        elif tipo == 'disparar_area':
+            acierto = self.catapulta.disparar_area(self.oleada, argumento).acierto
+        else:
+            self.catapulta.reparar()
+            return True
+        if self.al_disparar is not None:
+            self.al_disparar(tipo, acierto)
+        return True
+
+    def _orden_automatica(self):
+        if self.politica is None:
+            return None
+        catapulta = self.catapulta
+        if self.reparar and catapulta.estado in (EstadoCatapulta.DANADA, EstadoCatapulta.DESTRUIDA) \
+                and len(catapulta.corchos) >= (3 if catapulta.estado == EstadoCatapulta.DESTRUIDA else 1):
+            return ('reparar', None)
+        if catapulta.estado != EstadoCatapulta.LISTA or not len(catapulta.corchos):
+            return None
+        if self._usar_indice:
+            objetivo = self.oleada.mas_cercano(catapulta.alcance)
+            return ('disparar', objetivo.id) if objetivo is not None else None
+        al_alcance = self.oleada.en_alcance(catapulta.alcance)
+        if not al_alcance:
+            return None
+        return ('disparar', self.politica(al_alcance, catapulta).id)
+
+    def _comprobar_fin(self):
+        if self.oleada.superada:
+            self.fin = 'victoria'
+            return
+        enemigo = self.oleada.mas_cercano(0)
+        if enemigo is not None:
+            self.fin = 'castillo_alcanzado'
+            self.catapulta._emitir('castillo_alcanzado', enemigo=enemigo.nombre)
+            return
+        if self.catapulta.estado == EstadoCatapulta.DESTRUIDA and not self._reparacion_pendiente():
+            self.fin = 'destruida'
+
+    def _reparacion_pendiente(self):
+        """True si hay una reparación ordenada o la política va a repararla"""
+        if ('reparar', None) in self._ordenes:
+            return True
+        return self.politica is not None and self.reparar and len(self.catapulta.corchos) >= 3
+
+    # === EJECUCIÓN ===
+
+    def ejecutar(self, max_ticks=None):
+        """Encadena ticks sin esperar hasta que termina la batalla (o max_ticks). Retorna fin"""
+        paso = self.paso
+        if max_ticks is None:
+            while paso():
+                pass
+        else:
+            for _ in range(max_ticks):
+                if not paso():
+                    break
+        return self.fin
+
+    def ejecutar_en_tiempo_real(self, al_tick=None):
+        """
+        Juega un tick cada `dt` segundos de reloj hasta que termina la
+        batalla o se llama a detener(); tras cada tick llama a al_tick(motor).
+        Si un tick llega tarde se recupera el ritmo, salvo que el retraso
+        supere MAX_TICKS_RETRASO ticks (entonces se descartan). Retorna fin.
+        """
+        self._detener.clear()
+        siguiente = time.perf_counter()
+        while not self._detener.is_set():
+            with self.lock:
+                continua = self.paso()
+                if al_tick is not None:
+                    al_tick(self)
+            if not continua:
+                break
+            siguiente += self.dt
+            espera = siguiente - time.perf_counter()
+            if espera > 0:
+                self._detener.wait(espera)
+                continue
+            if self.perfil:
+                self.perfil.retrasos += 1
+            if -espera > self.dt * MAX_TICKS_RETRASO:
+                siguiente = time.perf_counter()
+        return self.fin
+
+    def iniciar_hilo(self, al_tick=None):
+        """Lanza ejecutar_en_tiempo_real en un hilo demonio y lo retorna"""
+        hilo = threading.Thread(target=self.ejecutar_en_tiempo_real, args=(al_tick,), daemon=True)
+        hilo.start()
+        return hilo
+
+    def detener(self):
+        """Para ejecutar_en_tiempo_real al final del tick en curso"""
+        self._detener.set()
@@ -0,0 +1,40 @@
+"""
+Servidor asyncio de la Catapulta
+================================
+
+Ejecuta el juego web con el servidor ASGI (catapulta.servidor_asgi): la misma
+API que main_web.py, pero en un solo hilo con asyncio, de modo que los
+navegadores conectados al stream no ocupan un hilo cada uno.
+
+Uso:
+    python main_asgi.py [--host 0.0.0.0] [--port 8000]
+
+Usa uvicorn si está instalado; si no, el servidor HTTP mínimo del módulo.
+"""
+
+import argparse
+
+from catapulta.servidor_asgi import iniciar_servidor
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor asyncio de la Catapulta")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8000)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("🏰 CATAPULTA - Servidor asyncio 🏰".center(60))
+    print("=" * 60)
+    print(f"\n🌐 Abre tu navegador en: http://localhost:{args.port}")
+    print("\n💡 Presiona Ctrl+C para detener el servidor\n")
+    print("=" * 60)
+
+    try:
+        iniciar_servidor(args.host, args.port)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Servidor Web de la Catapulta para producción
+=============================================
+
+Ejecuta el juego web con varios procesos (workers) que comparten la clave de
+sesión y el almacén de juegos, de modo que cualquier worker puede atender
+cualquier petición de cualquier jugador.
+
+Uso:
+    python main_produccion.py --workers 8 --port 8000
+
+Configuración (argumentos o variables de entorno):
+    CATAPULTA_SECRET_KEY   Clave de las cookies de sesión. Debe ser estable
+                           entre reinicios; si falta se genera una para esta
+                           ejecución (las sesiones no sobreviven al reinicio).
+    CATAPULTA_ALMACEN      Almacén de juegos compartido
+                           (por defecto sqlite:///catapulta_juegos.db).
+
+Las batallas en tiempo real son la excepción: el motor corre en el worker
+que la inició, que la anota en el almacén mientras dura. Los demás workers
+rechazan los cambios y las órdenes de ese juego, así que para jugarlas con
+varios workers el balanceador debe fijar cada sesión a un worker.
+
+Usa gunicorn si está instalado; si no, arranca los workers con el servidor
+de Werkzeug sobre un socket compartido (solo en sistemas con fork()).
+"""
+
+import argparse
+import os
+import secrets
+import signal
+import socket
+import sys
+
+
+ALMACEN_POR_DEFECTO = 'sqlite:///catapulta_juegos.db'
+
+
+def configurar_entorno(args):
+    """Fija la configuración compartida antes de crear los workers"""
+    if args.secret_key:
+        os.environ['CATAPULTA_SECRET_KEY'] = args.secret_key
+    elif not os.environ.get('CATAPULTA_SECRET_KEY'):
+        print("⚠ CATAPULTA_SECRET_KEY no configurada: se genera una para esta ejecución")
+        os.environ['CATAPULTA_SECRET_KEY'] = secrets.token_hex(32)
+
+    os.environ['CATAPULTA_ALMACEN'] = args.almacen
+    if args.almacen == 'memoria' and args.workers > 1:
+        print("⚠ El almacén 'memoria' no se comparte entre workers: "
+              "cada jugador debe caer siempre en el mismo proceso")
+
+
+def iniciar_gunicorn(args):
+    """Arranca los workers con gunicorn (hilos por worker para los streams)"""
+    from gunicorn.app.base import BaseApplication
+
+    class AplicacionCatapulta(BaseApplication):
+        def load_config(self):
+            self.cfg.set('bind', f"{args.host}:{args.port}")
+            self.cfg.set('workers', args.workers)
+            self.cfg.set('worker_class', 'gthread')
+            self.cfg.set('threads', args.hilos)
+            # Los streams SSE mantienen la petición abierta
+            self.cfg.set('timeout', 0)
+
+        def load(self):
+            from catapulta.servidor_web import app
+            return app
+
+    AplicacionCatapulta().run()
+
+
+def iniciar_prefork(args):
+    """Arranca los workers con fork() y el servidor de Werkzeug"""
+    from werkzeug.serving import ThreadedWSGIServer
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((args.host, args.port))
+    sock.listen(128)
+    sock.set_inheritable(True)
+
+    hijos = []
+    for _ in range(args.workers):
+        pid = os.fork()
+        if pid == 0:
+            # Cada worker importa la aplicación (y abre su conexión al almacén)
+            from catapulta.servidor_web import app
+            servidor = ThreadedWSGIServer(args.host, args.port, app, fd=sock.fileno())
+            servidor.daemon_threads = True
+            try:
+                servidor.serve_forever()
+            finally:
+                os._exit(0)
+        hijos.append(pid)
+
+    def detener(signum, frame):
+        for pid in hijos:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, detener)
+    signal.signal(signal.SIGTERM, detener)
+    for pid in hijos:
+        try:
+            os.waitpid(pid, 0)
+        except ChildProcessError:
+            pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor web de la Catapulta con varios workers")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=int(os.environ.get('PORT', 8000)))
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Número de procesos (por defecto, uno por núcleo)")
+    parser.add_argument('--hilos', type=int, default=32,
+                        help="Hilos por worker (cada stream abierto ocupa uno)")
+    parser.add_argument('--secret-key', default=None,
+                        help="Clave de sesión (por defecto CATAPULTA_SECRET_KEY)")
+    parser.add_argument('--almacen', default=os.environ.get('CATAPULTA_ALMACEN', ALMACEN_POR_DEFECTO),
+                        help="Almacén de juegos compartido ('sqlite:///ruta.db' o 'memoria')")
+    args = parser.parse_args()
+
+    configurar_entorno(args)
+
+    print("="*60)
+    print("🏰 CATAPULTA - Servidor de producción 🏰".center(60))
+    print("="*60)
+    print(f"\n🌐 http://{args.host}:{args.port}")
+    print(f"⚙️  Workers: {args.workers} | Almacén: {args.almacen}")
+    print("="*60)
+
+    try:
+        import gunicorn  # noqa: F401
+    except ImportError:
+        if not hasattr(os, 'fork'):
+            sys.exit("❌ Se necesita gunicorn (pip install gunicorn) en este sistema")
+        iniciar_prefork(args)
+    else:
+        iniciar_gunicorn(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,17 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catapulta import eventos  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def sin_consola():
+    """El modelo no escribe por consola durante las pruebas"""
+    anterior = eventos.obtener_sumidero()
+    eventos.configurar_sumidero(eventos.NULO)
+    yield
+    eventos.configurar_sumidero(anterior)
@@ -0,0 +1,85 @@
+"""
+Los agregados acumulados de Catapulta (sumas de longitudes, elasticidades,
+estabilidad...) deben coincidir siempre con los recalculados desde los
+componentes, pase lo que pase con la catapulta.
+"""
+
+import random
+
+import pytest
+
+from catapulta import Catapulta
+from catapulta.enemigos import generar_oleada_enemigos
+from catapulta.serializacion import juego_a_instantanea, juego_desde_instantanea
+
+
+@pytest.fixture
+def verificacion(monkeypatch):
+    """Cada lectura de potencia, alcance o estabilidad comprueba los agregados"""
+    monkeypatch.setattr(Catapulta, 'MODO_VERIFICACION', True)
+
+
+def construida(rng, **materiales):
+    catapulta = Catapulta("Prueba", rng=rng)
+    catapulta.agregar_materiales(**materiales)
+    while not catapulta.construir():
+        pass
+    return catapulta
+
+
+def test_agregar_uno_a_uno_y_en_lote(verificacion):
+    catapulta = Catapulta("Prueba", rng=random.Random(1))
+    catapulta.agregar_palo(40)
+    catapulta.agregar_palo(1.5)
+    catapulta.agregar_goma(8)
+    catapulta.agregar_tapon()
+    catapulta.agregar_materiales(palos=[30, 10 ** 12], gomas=[3, 10], tapones=2, corchos=50, pegamento=7)
+    assert catapulta.verificar_agregados()
+
+
+def test_lote_invalido_no_cambia_nada(verificacion):
+    catapulta = Catapulta("Prueba", rng=random.Random(1))
+    catapulta.agregar_materiales(palos=[40], gomas=[8])
+    antes = catapulta.recalcular_agregados()
+
+    assert not catapulta.agregar_materiales(palos=[10, 'x'])
+    assert not catapulta.agregar_materiales(palos=[10], gomas=[11])
+    assert not catapulta.agregar_materiales(palos=[10], tapones=-1)
+    assert not catapulta.agregar_materiales(palos=[10, float('inf')])
+
+    assert len(catapulta.palos) == 1
+    assert catapulta.recalcular_agregados() == antes
+    assert catapulta.verificar_agregados()
+
+
+@pytest.mark.parametrize('semilla', range(5))
+def test_partida_completa(verificacion, semilla):
+    rng = random.Random(semilla)
+    catapulta = construida(rng, palos=[rng.randint(10, 50) for _ in range(3)],
+                           gomas=[rng.randint(1, 10) for _ in range(2)],
+                           tapones=rng.randint(0, 4), corchos=300, pegamento=rng.randint(1, 10))
+    enemigos = generar_oleada_enemigos(1, rng)
+    for _ in range(300):
+        if enemigos.superada:
+            enemigos = generar_oleada_enemigos(rng.randint(1, 5), rng)
+        accion = rng.random()
+        if accion < 0.6:
+            catapulta.disparar(rng.choice(enemigos.vivos()))
+        elif accion < 0.7:
+            catapulta.disparar_area(enemigos, rng.randint(10, 50))
+        elif accion < 0.9:
+            catapulta.reparar()
+        else:
+            catapulta.mejorar(rng.choice(['refuerzo', 'potencia']))
+        catapulta.potencia, catapulta.alcance, catapulta.estabilidad
+        assert catapulta.verificar_agregados()
+
+
+def test_instantanea_conserva_agregados():
+    rng = random.Random(7)
+    catapulta = construida(rng, palos=[40, 2.5, 10 ** 12], gomas=[8], tapones=3, corchos=20, pegamento=8)
+    juego = {'catapulta': catapulta, 'enemigos': generar_oleada_enemigos(1, rng), 'nivel': 1,
+             'puntos': 0, 'version': 3, 'semilla': 1, 'rng': rng}
+    recuperada = juego_desde_instantanea(juego_a_instantanea(juego))['catapulta']
+    assert recuperada.verificar_agregados()
+    assert recuperada.recalcular_agregados() == catapulta.recalcular_agregados()
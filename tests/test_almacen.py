@@ -0,0 +1,96 @@
+"""
+Almacenes de juegos: orden de expulsión (LRU y por inactividad) y guardado
+condicional entre procesos.
+"""
+
+import pytest
+
+from catapulta import acciones, almacen
+from catapulta.almacen import AlmacenMemoria, AlmacenSQLite
+
+
+class Reloj:
+    """Sustituye al módulo time del almacén con un reloj que avanza a mano"""
+
+    def __init__(self):
+        self.ahora = 0.0
+
+    def monotonic(self):
+        return self.ahora
+
+
+@pytest.fixture
+def reloj(monkeypatch):
+    reloj = Reloj()
+    monkeypatch.setattr(almacen, 'time', reloj)
+    return reloj
+
+
+def memoria(**opciones):
+    """Un AlmacenMemoria que anota sus expulsiones en .expulsados"""
+    expulsados = []
+    juegos = AlmacenMemoria(al_expulsar=expulsados.append, **opciones)
+    juegos.expulsados = expulsados
+    return juegos
+
+
+def test_expulsion_lru(reloj):
+    juegos = memoria(max_juegos=3)
+    for game_id in 'abc':
+        juegos.guardar(game_id, acciones.nuevo_juego())
+    assert juegos.obtener('a') is not None  # 'a' pasa a ser el más reciente
+
+    juegos.guardar('d', acciones.nuevo_juego())
+    juegos.guardar('b', acciones.nuevo_juego())  # 'b' vuelve: sale 'c'
+    juegos.guardar('e', acciones.nuevo_juego())
+
+    assert juegos.expulsados == ['b', 'c', 'a']
+    assert [game_id for game_id, _ in juegos.elementos()] == ['d', 'b', 'e']
+    assert juegos.metricas()['expulsiones_lru'] == 3
+
+
+def test_expulsion_por_inactividad(reloj):
+    juegos = memoria(ttl=10)
+    for game_id in 'abc':
+        juegos.guardar(game_id, acciones.nuevo_juego())
+        reloj.ahora += 1
+    reloj.ahora = 9
+    assert juegos.obtener('a') is not None  # se renueva su último acceso
+
+    reloj.ahora = 12
+    assert juegos.purgar() == 1  # solo 'b' (último acceso en 1)
+    reloj.ahora = 13
+    assert juegos.obtener('c') is None  # expira al leerlo
+    assert juegos.purgar() == 0
+    reloj.ahora = 19
+    assert juegos.purgar() == 0
+    reloj.ahora = 19.5
+    assert juegos.purgar() == 1
+
+    assert juegos.expulsados == ['b', 'c', 'a']
+    assert len(juegos) == 0
+    metricas = juegos.metricas()
+    assert metricas['expulsiones_ttl'] == 3 and metricas['expulsiones_lru'] == 0
+
+
+def test_guardado_condicional_entre_procesos(tmp_path):
+    ruta = str(tmp_path / 'juegos.db')
+    uno, otro = AlmacenSQLite(ruta), AlmacenSQLite(ruta)
+    assert uno.guardar_si_version('j', acciones.nuevo_juego(), None)
+    assert not otro.guardar_si_version('j', acciones.nuevo_juego(), None)
+
+    # Los dos leen la versión 0 y la cambian a la 1: solo gana el primero
+    a, b = uno.obtener('j'), otro.obtener('j')
+    a['puntos'], b['puntos'] = 10, 20
+    for juego in (a, b):
+        juego['version'] += 1
+    assert uno.guardar_si_version('j', a, 0)
+    assert not otro.guardar_si_version('j', b, 0)
+    assert otro.obtener('j')['puntos'] == 10
+
+    # Repetido sobre el estado actual, el segundo cambio se guarda
+    b = otro.obtener('j')
+    b['puntos'] += 20
+    b['version'] += 1
+    assert otro.guardar_si_version('j', b, 1)
+    assert uno.obtener('j')['puntos'] == 30
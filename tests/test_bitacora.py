@@ -0,0 +1,186 @@
+"""
+Recuperación de juegos con la bitácora: reproducción de acciones con azar,
+bitácoras cortadas o dañadas, escrituras que fallan y juegos olvidados.
+"""
+
+import json
+import os
+
+import pytest
+
+from catapulta import acciones
+from catapulta.acciones import preparar_generador
+from catapulta.bitacora import ACCION, INSTANTANEA, BitacoraJuegos, _CABECERA, leer_registros, reproducir
+from catapulta.serializacion import juego_a_dict
+
+GAME_ID = '0123456789abcdef'
+
+
+@pytest.fixture
+def bitacora(tmp_path):
+    bitacora = BitacoraJuegos(str(tmp_path), instantanea_cada=1000)
+    yield bitacora
+    bitacora.cerrar()
+
+
+def jugar(bitacora, juego, nombre, datos, game_id=GAME_ID):
+    """Ejecuta una acción como el servidor"""
+    preparar_generador(juego)
+    grabador = bitacora.preparar(game_id, juego)
+    _, cambio = acciones.ACCIONES[nombre](juego, datos)
+    grabador.soltar(juego)
+    if cambio:
+        juego['version'] += 1
+        bitacora.registrar(game_id, nombre, datos, juego, grabador.tiradas)
+    return cambio
+
+
+def partida(bitacora):
+    juego = acciones.nuevo_juego()
+    juego['semilla'] = 1
+    jugar(bitacora, juego, 'crear_catapulta', {'nombre': 'Prueba'})
+    jugar(bitacora, juego, 'agregar_materiales',
+          {'palos': [50, 50], 'gomas': [10], 'tapones': 5, 'corchos': 300, 'pegamento': 10})
+    return juego
+
+
+def batalla(bitacora):
+    """
+    Una partida con todas las acciones que usan el azar. Retorna el juego
+    y su estado serializado tras cada versión.
+    """
+    juego = partida(bitacora)
+    estados = {juego['version']: juego_a_dict(juego)}
+
+    def accion(nombre, datos):
+        if jugar(bitacora, juego, nombre, datos):
+            estados[juego['version']] = juego_a_dict(juego)
+
+    accion('mejorar', {'tipo': 'potencia'})  # solo antes de construir
+    while not juego['catapulta'].construida:
+        accion('construir', {})
+    accion('generar_oleada', {})
+    for _ in range(3):
+        accion('disparar', {'id': juego['enemigos'].vivos()[0].id})
+    accion('generar_oleada', {'enemigos': 200})
+    accion('disparar_area', {'distancia': 60})
+    accion('mejorar', {'tipo': 'refuerzo'})
+    for _ in range(3):
+        accion('disparar', {'id': juego['enemigos'].vivos()[0].id})
+    return juego, estados
+
+
+def posiciones(ruta):
+    """(posición, tipo, versión, largo) de cada registro de una bitácora"""
+    resultado = []
+    with open(ruta, 'rb') as fichero:
+        while True:
+            inicio = fichero.tell()
+            cabecera = fichero.read(_CABECERA.size)
+            if len(cabecera) < _CABECERA.size:
+                return resultado
+            tipo, largo, version = _CABECERA.unpack(cabecera)
+            resultado.append((inicio, tipo, version, largo))
+            fichero.seek(largo, os.SEEK_CUR)
+
+
+@pytest.mark.parametrize('instantanea_cada', [1000, 4])
+def test_reproducir_acciones_con_azar(tmp_path, instantanea_cada):
+    bitacora = BitacoraJuegos(str(tmp_path), instantanea_cada=instantanea_cada)
+    juego, estados = batalla(bitacora)
+    bitacora.vaciar()
+    ruta = bitacora.ruta(GAME_ID)
+
+    assert juego_a_dict(reproducir(ruta)) == juego_a_dict(juego)
+    # Y cada versión intermedia
+    for version, estado in estados.items():
+        assert juego_a_dict(reproducir(ruta, version)) == estado
+    bitacora.cerrar()
+
+
+def test_recuperar_bitacora_cortada(bitacora):
+    juego, estados = batalla(bitacora)
+    bitacora.vaciar()
+    ruta = bitacora.ruta(GAME_ID)
+    # Una caída a mitad de la escritura del último registro
+    inicio, _, version, largo = posiciones(ruta)[-1]
+    with open(ruta, 'r+b') as fichero:
+        fichero.truncate(inicio + _CABECERA.size + largo // 2)
+
+    recuperado = bitacora.recuperar(GAME_ID)
+    assert recuperado['version'] == version - 1
+    assert juego_a_dict(recuperado) == estados[version - 1]
+
+
+def test_recuperar_bitacora_danada_tras_la_instantanea(tmp_path):
+    bitacora = BitacoraJuegos(str(tmp_path), instantanea_cada=4)
+    juego, estados = batalla(bitacora)
+    bitacora.vaciar()
+    ruta = bitacora.ruta(GAME_ID)
+    registros = posiciones(ruta)
+    ultima = max(i for i, (_, tipo, _, _) in enumerate(registros) if tipo == INSTANTANEA)
+    assert ultima < len(registros) - 1
+    # La acción que sigue a la última instantánea no se puede leer
+    inicio, tipo, _, largo = registros[ultima + 1]
+    assert tipo == ACCION
+    with open(ruta, 'r+b') as fichero:
+        fichero.seek(inicio + _CABECERA.size)
+        fichero.write(b'\xff' * largo)
+
+    version = registros[ultima][2]
+    recuperado = bitacora.recuperar(GAME_ID)
+    assert recuperado['version'] == version
+    assert juego_a_dict(recuperado) == estados[version]
+    bitacora.cerrar()
+
+
+def test_recuperar_hasta_la_ultima_accion_valida(bitacora):
+    juego = partida(bitacora)
+    bitacora.vaciar()
+    # Una acción que no sigue a la versión anterior (bitácora dañada)
+    carga = json.dumps({'a': 'construir', 'd': {}, 'r': []}).encode()
+    with open(bitacora.ruta(GAME_ID), 'ab') as fichero:
+        fichero.write(_CABECERA.pack(ACCION, len(carga), juego['version'] + 5) + carga)
+
+    recuperado = bitacora.recuperar(GAME_ID)
+    assert juego_a_dict(recuperado) == juego_a_dict(juego)
+
+
+def test_recuperar_sin_estado_valido_empieza_de_nuevo(bitacora):
+    partida(bitacora)
+    bitacora.vaciar()
+    ruta = bitacora.ruta(GAME_ID)
+    with open(ruta, 'r+b') as fichero:
+        fichero.seek(_CABECERA.size)
+        fichero.write(b'\xff' * 4)  # la marca de la instantánea inicial
+
+    assert bitacora.recuperar(GAME_ID) is None
+    assert not os.path.exists(ruta)
+    assert os.path.exists(ruta + '.danada')
+
+
+def test_volcar_no_repite_registros_tras_un_error(bitacora):
+    partida(bitacora)
+    otro = acciones.nuevo_juego()
+    jugar(bitacora, otro, 'crear_catapulta', {'nombre': 'Otro'}, game_id='otro')
+    # El fichero del segundo juego no se puede abrir
+    os.makedirs(bitacora.ruta('otro'))
+    with pytest.raises(OSError):
+        bitacora.vaciar()
+    os.rmdir(bitacora.ruta('otro'))
+    bitacora.vaciar()
+
+    for game_id, esperados in ((GAME_ID, 3), ('otro', 2)):
+        assert len(list(leer_registros(bitacora.ruta(game_id)))) == esperados
+
+
+def test_olvidar_borra_la_bitacora(bitacora):
+    partida(bitacora)
+    bitacora.vaciar()
+    juego = acciones.nuevo_juego()
+    jugar(bitacora, juego, 'crear_catapulta', {'nombre': 'Pendiente'})
+    bitacora.olvidar(GAME_ID)
+
+    assert not os.path.exists(bitacora.ruta(GAME_ID))
+    assert bitacora.recuperar(GAME_ID) is None
+    assert not bitacora._desde_instantanea
@@ -0,0 +1,104 @@
+"""
+Parches entre versiones del estado: aplicar el parche calculado entre dos
+estados debe dar el segundo, y el historial de versiones cae al estado
+completo cuando no conoce la versión del cliente.
+"""
+
+import json
+
+import pytest
+
+from catapulta import acciones
+from catapulta.acciones import preparar_generador
+from catapulta.estado_juego import (CacheVersiones, aplicar_parche, calcular_parche,
+                                    obtener_estado_juego, parche_a_json)
+
+
+def ida_y_vuelta(anterior, actual):
+    """Aplica a `anterior` el parche hacia `actual`, pasado por JSON como en la red"""
+    parche = calcular_parche(anterior, actual)
+    if parche is None:
+        return anterior
+    return aplicar_parche(anterior, json.loads(json.dumps(parche_a_json(parche))))
+
+
+@pytest.mark.parametrize('anterior, actual', [
+    ({'a': 1, 'b': {'c': 2, 'd': [1, 2]}}, {'a': 1, 'b': {'c': 3, 'd': [1, 5]}}),
+    ({'a': 1, 'b': 2}, {'a': 1}),                         # clave borrada
+    ({'a': 1}, {'a': 1, 'b': None}),                      # clave nueva
+    ({'x': {'a': 1, 'b': 2}}, {'x': {'a': 1}}),           # borrada en un diccionario anidado
+    ({'x': [1, 2, 3]}, {'x': [1, 2]}),                    # lista más corta
+    ({'x': [{'a': 1}, {'a': 2}]}, {'x': [{'a': 1}, {'b': 2}]}),
+    ({'x': {'a': 1}}, {'x': None}),                       # diccionario que pasa a None
+    ({'x': None}, {'x': {'a': 1}}),
+    ({'x': 1}, {'x': [1]}),
+    ({'x': [1]}, {'x': 1}),
+])
+def test_parche_ida_y_vuelta(anterior, actual):
+    assert ida_y_vuelta(anterior, actual) == actual
+
+
+def test_reemplazos_con_marca():
+    # Un diccionario con otras claves no es un parche parcial: va entero en {'$': ...}
+    parche = parche_a_json(calcular_parche({'x': {'a': 1, 'b': 2}}, {'x': {'a': 1}}))
+    assert parche == {'x': {'$': {'a': 1}}}
+    # Los valores simples se sustituyen sin marca
+    assert parche_a_json(calcular_parche({'x': 1}, {'x': 2})) == {'x': 2}
+    assert calcular_parche({'x': 1}, {'x': 1}) is None
+
+
+def jugar(juego, nombre, datos):
+    preparar_generador(juego)
+    _, cambio = acciones.ACCIONES[nombre](juego, datos)
+    if cambio:
+        juego['version'] += 1
+
+
+def partida():
+    juego = acciones.nuevo_juego()
+    juego['semilla'] = 1
+    jugar(juego, 'crear_catapulta', {'nombre': 'Prueba'})
+    jugar(juego, 'agregar_materiales',
+          {'palos': [50, 50], 'gomas': [10], 'tapones': 5, 'corchos': 300, 'pegamento': 10})
+    while not juego['catapulta'].construida:
+        jugar(juego, 'construir', {})
+    jugar(juego, 'generar_oleada', {})
+    return juego
+
+
+def test_parches_entre_versiones_del_juego():
+    juego = partida()
+    versiones = CacheVersiones()
+    base = juego['version']
+    anterior = versiones.estado_actual('j', juego)
+    for _ in range(3):
+        jugar(juego, 'disparar', {'id': juego['enemigos'].vivos()[0].id})
+    jugar(juego, 'generar_oleada', {})  # la lista de enemigos cambia entera
+
+    tipo, datos = versiones.respuesta('j', juego, base)
+    assert tipo == 'parche'
+    assert datos['base'] == base and datos['version'] == juego['version']
+    parche = json.loads(json.dumps(datos['parche']))
+    assert aplicar_parche(anterior, parche) == obtener_estado_juego(juego)
+
+    assert versiones.respuesta('j', juego, juego['version']) == ('sin_cambios', None)
+
+
+def test_versiones_olvidadas_dan_el_estado_completo():
+    juego = partida()
+    versiones = CacheVersiones(versiones_por_juego=2)
+    base = juego['version']
+    versiones.estado_actual('j', juego)
+    for _ in range(2):
+        jugar(juego, 'disparar', {'id': juego['enemigos'].vivos()[0].id})
+        versiones.estado_actual('j', juego)
+
+    # La versión del cliente ya salió del historial (y una que nunca existió)
+    for version_cliente in (base, juego['version'] + 5, None):
+        tipo, datos = versiones.respuesta('j', juego, version_cliente)
+        assert tipo == 'completo'
+        assert datos == obtener_estado_juego(juego)
+
+    # Un juego que nunca se ha servido tampoco tiene parches
+    versiones.olvidar('j')
+    assert versiones.respuesta('j', juego, juego['version'] - 1)[0] == 'completo'
@@ -0,0 +1,54 @@
+"""
+Historial de disparos: todos() devuelve los disparos que salieron del buffer
+al registro y después los del buffer, con el registro como ruta o como
+fichero abierto.
+"""
+
+import io
+
+import pytest
+
+from catapulta.historial import Disparo, HistorialDisparos
+
+
+DISPAROS = [Disparo(f'Enemigo {i}', i % 2 == 0, i * 1.5, i % 3 == 0) for i in range(10)]
+
+
+def lleno(registro, capacidad=3):
+    historial = HistorialDisparos(capacidad=capacidad, registro=registro)
+    for disparo in DISPAROS:
+        historial.append(disparo)
+    return historial
+
+
+def test_registro_en_ruta(tmp_path):
+    historial = lleno(str(tmp_path / 'disparos.jsonl'))
+    assert list(historial.todos()) == DISPAROS
+    historial.cerrar()
+
+
+@pytest.mark.parametrize('modo', ['w+', 'a+'])
+def test_registro_en_fichero_abierto(tmp_path, modo):
+    ruta = tmp_path / 'disparos.jsonl'
+    ruta.write_text('["Anterior", true, 1.0, false]\n', encoding='utf-8')
+    with open(ruta, modo, encoding='utf-8') as fichero:
+        historial = lleno(fichero)
+        # Solo lo que escribió el historial, las veces que haga falta
+        assert list(historial.todos()) == DISPAROS
+        historial.registrar('Otro', True, 2.0, True)
+        assert list(historial.todos()) == DISPAROS + [Disparo('Otro', True, 2.0, True)]
+        # Sigue escribiendo al final tras releer
+        historial.flush()
+        assert fichero.tell() == fichero.seek(0, io.SEEK_END)
+
+
+def test_registro_en_memoria_sin_disparos_fuera():
+    historial = lleno(io.StringIO(), capacidad=len(DISPAROS))
+    assert list(historial.todos()) == DISPAROS
+
+
+def test_registro_que_no_se_puede_releer(tmp_path):
+    with open(tmp_path / 'disparos.jsonl', 'a', encoding='utf-8') as fichero:
+        historial = lleno(fichero)
+        with pytest.raises(io.UnsupportedOperation):
+            historial.todos()
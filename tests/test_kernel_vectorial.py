@@ -0,0 +1,28 @@
+"""
+El núcleo vectorial debe dar las mismas estadísticas que el modelo de
+objetos (Simulador) para la misma construcción y política.
+"""
+
+import pytest
+
+pytest.importorskip('numpy')
+
+from catapulta.kernel_vectorial import POLITICAS, comparar_con_modelo
+from catapulta.simulador import Construccion
+
+
+CONSTRUCCIONES = {
+    'equilibrada': Construccion(palos=[40, 40], gomas=[8], tapones=3, corchos=60, pegamento=8),
+    'inestable': Construccion(palos=[30, 30], gomas=[6], tapones=0, corchos=60, pegamento=3),
+    'debil': Construccion(palos=[20, 20], gomas=[3], tapones=0, corchos=40, pegamento=2),
+}
+
+
+@pytest.mark.parametrize('politica', POLITICAS)
+@pytest.mark.parametrize('nombre', sorted(CONSTRUCCIONES))
+def test_coincide_con_el_modelo(nombre, politica):
+    comparacion = comparar_con_modelo(CONSTRUCCIONES[nombre], n_partidas=1000, politica=politica,
+                                      semilla=3, tolerancia=0.1)
+    distintas = {metrica: (modelo, nucleo) for metrica, (modelo, nucleo, coincide) in comparacion.items()
+                 if not coincide}
+    assert not distintas
@@ -0,0 +1,96 @@
+"""
+El índice por distancia de las oleadas (vivos, al alcance, el más cercano)
+debe responder siempre lo mismo que recorrer la oleada entera, también
+tras avanzar, daños de área y bajas sueltas.
+"""
+
+import random
+
+import pytest
+
+from catapulta.enemigos import Oleada, Soldado, Caballero, Arquero, Gigante
+from catapulta.estado_juego import obtener_enemigos
+from catapulta.oleada_masiva import OleadaMasiva
+
+
+TIPOS = [Soldado, Caballero, Arquero, Gigante]
+
+
+def oleada_clasica(rng, n):
+    # Distancias en un rango pequeño: muchos empates
+    return Oleada([rng.choice(TIPOS)(rng.randint(10, 30)) for _ in range(n)])
+
+
+def oleada_masiva(rng, n):
+    return OleadaMasiva([rng.randrange(len(TIPOS)) for _ in range(n)],
+                        [rng.randint(10, 30) for _ in range(n)])
+
+
+OLEADAS = {'clasica': oleada_clasica, 'masiva': oleada_masiva}
+
+
+def vivos(oleada):
+    return [e for e in oleada if e.vivo]
+
+
+def por_distancia(enemigos):
+    return sorted(enemigos, key=lambda e: (e.distancia, e.id))
+
+
+def comprobar(oleada):
+    """Compara cada consulta del índice con la respuesta recorriendo la oleada"""
+    esperados = vivos(oleada)
+    assert [e.id for e in oleada.vivos()] == [e.id for e in esperados]
+    assert oleada.num_vivos == len(esperados)
+    assert oleada.superada == (not esperados)
+
+    distancias = sorted({e.distancia for e in oleada})
+    for alcance in [distancias[0] - 1, *distancias, distancias[-1] + 1]:
+        al_alcance = por_distancia(e for e in esperados if e.distancia <= alcance)
+        assert [e.id for e in oleada.en_alcance(alcance)] == [e.id for e in al_alcance]
+        cercano = oleada.mas_cercano(alcance)
+        assert (cercano.id if cercano else None) == (al_alcance[0].id if al_alcance else None)
+    cercano = oleada.mas_cercano()
+    assert (cercano.id if cercano else None) == (por_distancia(esperados)[0].id if esperados else None)
+
+
+@pytest.mark.parametrize('semilla', range(5))
+@pytest.mark.parametrize('tipo', sorted(OLEADAS))
+def test_indice_igual_que_recorrer_la_oleada(tipo, semilla):
+    rng = random.Random(semilla)
+    oleada = OLEADAS[tipo](rng, 300)
+    bajas = []
+    oleada.suscribir(lambda aviso, _, enemigo: bajas.append(enemigo.id if enemigo else aviso))
+    comprobar(oleada)
+
+    while not oleada.superada:
+        operacion = rng.random()
+        if operacion < 0.3:
+            oleada.avanzar(rng.randint(1, 3))
+        elif operacion < 0.7:
+            centro, radio, danio = rng.randint(-10, 40), rng.randint(0, 4), rng.randint(5, 60)
+            afectados = [e for e in vivos(oleada) if centro - radio <= e.distancia <= centro + radio]
+            antes = {e.id for e in vivos(oleada)}
+            resultado = oleada.danar_area(centro, radio, danio)
+            muertos = antes - {e.id for e in vivos(oleada)}
+            assert resultado == (len(afectados), len(muertos))
+        else:
+            # Una baja suelta (como un disparo a un enemigo)
+            objetivo = rng.choice(vivos(oleada))
+            objetivo.recibir_danio(objetivo.vida + objetivo.armadura)
+        comprobar(oleada)
+
+    # Un aviso por baja y uno de oleada superada, al final
+    assert sorted(bajas[:-1]) == list(range(len(oleada))) and bajas[-1] == 'superada'
+
+
+def test_estado_de_la_oleada_masiva_por_columnas():
+    rng = random.Random(1)
+    oleada = oleada_masiva(rng, 500)
+    oleada.avanzar(5)
+    oleada.danar_area(15, 3, 40)
+    # El mismo estado que con una vista por enemigo, pero sin crearlas
+    esperado = obtener_enemigos(list(oleada))
+    oleada._vistas.clear()
+    assert obtener_enemigos(oleada) == esperado
+    assert not oleada._vistas
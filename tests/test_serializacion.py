@@ -0,0 +1,53 @@
+"""
+Las instantáneas binarias deben devolver el mismo juego, también con los
+valores extremos que admite el modelo (decimales, contadores de más de 32
+bits) y con oleadas masivas.
+"""
+
+import random
+
+import pytest
+
+from catapulta import Catapulta, acciones
+from catapulta.enemigos import generar_oleada_enemigos
+from catapulta.oleada_masiva import generar_oleada_masiva
+from catapulta.serializacion import (juego_a_dict, juego_a_instantanea, juego_desde_bytes,
+                                     juego_desde_dict, juego_desde_instantanea)
+
+
+MATERIALES = {
+    'enteros': dict(palos=[50, 50], gomas=[10], tapones=5, corchos=100, pegamento=7),
+    'pegamento_decimal': dict(palos=[50, 50], gomas=[10], tapones=5, corchos=100, pegamento=7.5),
+    'muchos_tapones': dict(palos=[50, 50], gomas=[10], tapones=2 ** 32, corchos=100, pegamento=7),
+    'decimales_y_muchos_corchos': dict(palos=[50.5, 50], gomas=[9.5], tapones=5, corchos=2 ** 33,
+                                       pegamento=7),
+}
+
+
+def partida(materiales, masiva):
+    """Un juego con la catapulta construida y unos disparos contra la oleada"""
+    rng = random.Random(1)
+    catapulta = Catapulta("Prueba", rng=rng)
+    assert catapulta.agregar_materiales(**materiales)
+    while not catapulta.construir():
+        pass
+    oleada = generar_oleada_masiva(5, rng=rng) if masiva else generar_oleada_enemigos(1, rng=rng)
+    for enemigo in list(oleada)[:3]:
+        catapulta.disparar(enemigo)
+    return {'catapulta': catapulta, 'enemigos': oleada, 'nivel': 2, 'puntos': 150, 'version': 7,
+            'semilla': 12345}
+
+
+@pytest.mark.parametrize('masiva', [False, True])
+@pytest.mark.parametrize('nombre', sorted(MATERIALES))
+def test_ida_y_vuelta(nombre, masiva):
+    datos = juego_a_dict(partida(MATERIALES[nombre], masiva))
+
+    instantanea = juego_a_instantanea(juego_desde_dict(datos))
+    assert juego_a_dict(juego_desde_instantanea(instantanea)) == datos
+    assert juego_a_dict(juego_desde_bytes(instantanea)) == datos
+
+
+def test_juego_nuevo():
+    juego = acciones.nuevo_juego()
+    assert juego_a_dict(juego_desde_instantanea(juego_a_instantanea(juego))) == juego_a_dict(juego)